@@ -0,0 +1,242 @@
+#Artwork (posters and episode stills) download cache
+from Classes.LoggableClass import LoggableClass
+from Classes.Filesystem import Filesystem
+from Classes.SingleFlight import SingleFlight
+from typing import List, Dict, Iterable, Tuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from requests.adapters import HTTPAdapter
+import requests
+import threading
+import hashlib
+import time
+import re as regex
+import os
+#thumbnails are optional (pip install pillow)
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+CHUNK_SIZE:int = 16 * 1024
+"""Read size for downloads.  Small enough that a dropped connection keeps most of what arrived in the partial file."""
+CONTENT_RANGE_REGEX = regex.compile(r"bytes \*/(\d+)$")
+"""Content-Range of a 416 reply, giving the full size"""
+
+class ArtworkStats:
+    """Download counters for an ArtworkCache.  Safe to update from multiple threads."""
+    def __init__(self):
+        self.downloaded:int = 0
+        """Images fetched from the server"""
+        self.cached:int = 0
+        """Images already in the cache"""
+        self.deduplicated:int = 0
+        """Downloaded images whose content was already stored under another path"""
+        self.resumed:int = 0
+        """Downloads continued from a partial file"""
+        self.failed:int = 0
+        self.bytes:int = 0
+        """Bytes received"""
+        self.seconds:float = 0.0
+        """Wall time spent in download()"""
+        self.lock:threading.Lock = threading.Lock()
+
+    def add(self,name:str,count:int = 1) -> None:
+        with self.lock:
+            setattr(self,name,getattr(self,name) + count)
+
+    def getBytesPerSecond(self) -> float:
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.downloaded} downloaded ({self.resumed} resumed, {self.deduplicated} duplicates), {self.cached} cached, "
+                f"{self.failed} failed, {self.bytes/1024/1024:.1f} MB at {self.getBytesPerSecond()/1024/1024:.2f} MB/s")
+
+def makeThumbnail(source_path:str,thumbnail_path:str,size:int) -> bool:
+    """Writes a copy of the image scaled to fit size x size.  Runs in a worker process."""
+    try:
+        with Image.open(source_path) as image:
+            image.thumbnail((size,size))
+            image.convert("RGB").save(thumbnail_path,"JPEG",quality=85)
+        return True
+    except Exception:
+        return False
+
+class ArtworkCache(LoggableClass):
+    """Downloads TMDB images (poster_path/still_path values) on a bounded thread pool into a content addressed store:
+    each file is named by the sha256 of its bytes, so the same image under different paths is stored once, and paths
+    already in the cache are never fetched again.  Interrupted downloads resume with a Range request."""
+    def __init__(self,directory:str,image_url:str = "https://image.tmdb.org/t/p/original",max_workers:int = 8,
+                 timeout:Tuple[float,float] = (5.0,30.0),thumbnail_size:int = 0,
+                 logging=True,logging_warnings=True,logging_errors=True):
+        #super init
+        self.prefix:str = "ART"
+        self.prefix_warning:str = "ART WRN"
+        self.prefix_error:str = "ART ERR"
+        super().__init__(prefix=self.prefix,
+                         prefix_warning=self.prefix_warning,
+                         prefix_error=self.prefix_error,
+                         logging=logging,
+                         log_warning=logging_warnings,
+                         log_errors=logging_errors)
+        self.directory:str = directory
+        self.objects_directory:str = os.path.join(directory,"objects")
+        self.partial_directory:str = os.path.join(directory,"partial")
+        self.thumbnail_directory:str = os.path.join(directory,"thumbnails")
+        self.index_path:str = os.path.join(directory,"index.pkl")
+        self.image_url:str = image_url.rstrip("/")
+        self.max_workers:int = max(1,max_workers)
+        self.timeout:Tuple[float,float] = timeout
+        self.thumbnail_size:int = thumbnail_size
+        """Longest side of generated thumbnails in pixels (0 for none, needs Pillow)"""
+        self.filesystem:Filesystem = Filesystem(logging=False)
+        #image path -> stored file name (hash + extension)
+        self.index:Dict[str,str] = self.filesystem.loadPickle(self.index_path) or {}
+        self.lock:threading.Lock = threading.Lock()
+        self.flights:SingleFlight = SingleFlight()
+        self.session:requests.Session = requests.Session()
+        self.session.mount("https://",HTTPAdapter(pool_maxsize=self.max_workers))
+        self.session.mount("http://",HTTPAdapter(pool_maxsize=self.max_workers))
+        self.stats:ArtworkStats = ArtworkStats()
+
+    @staticmethod
+    def fromConfig(config) -> "ArtworkCache":
+        """Builds the cache from the artwork_workers, artwork_thumbnail_size and api_image_url config values"""
+        return ArtworkCache(config.FILEPATH_ARTWORK,
+                            image_url=getattr(config,'API_IMAGE_URL',None) or "https://image.tmdb.org/t/p/original",
+                            max_workers=getattr(config,'ARTWORK_WORKERS',8),
+                            thumbnail_size=getattr(config,'ARTWORK_THUMBNAIL_SIZE',0))
+
+    def getStats(self) -> ArtworkStats:
+        return self.stats
+
+    def getPath(self,image_path:str) -> str or None:
+        """Returns the local file for a TMDB image path, or None if it is not cached"""
+        with self.lock:
+            stored:str = self.index.get(image_path,None)
+        return os.path.join(self.objects_directory,stored[:2],stored) if stored else None
+
+    def getThumbnailPath(self,image_path:str) -> str or None:
+        """Returns the local thumbnail for a TMDB image path, or None if there is none"""
+        with self.lock:
+            stored:str = self.index.get(image_path,None)
+        if not stored:
+            return None
+        thumbnail_path:str = os.path.join(self.thumbnail_directory,f"{os.path.splitext(stored)[0]}_{self.thumbnail_size}.jpg")
+        return thumbnail_path if os.path.exists(thumbnail_path) else None
+
+    def downloadSeriesArtwork(self,series_list:Iterable) -> Dict[str,str]:
+        """Downloads the poster and episode stills of TMDB rows.  Returns image path -> local file for every image available."""
+        image_paths:List[str] = []
+        for row in series_list:
+            image_paths += [row.series_poster_path,row.episode_still_path]
+        return self.download(image_paths)
+
+    def download(self,image_paths:Iterable[str]) -> Dict[str,str]:
+        """Downloads every image path not in the cache yet (max_workers at a time), then makes thumbnails if enabled.
+        Returns image path -> local file for every image available."""
+        unique_paths:List[str] = [path for path in dict.fromkeys(image_paths) if path and path.startswith("/")]
+        start_time:float = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers,thread_name_prefix="artwork") as executor:
+            local_paths:List[str] = list(executor.map(self.downloadImage,unique_paths))
+        self.stats.add('seconds',time.perf_counter() - start_time)
+        self.saveIndex()
+        results:Dict[str,str] = {path:local for path, local in zip(unique_paths,local_paths) if local}
+        if self.thumbnail_size > 0:
+            self.makeThumbnails(list(results.keys()))
+        self.log(f"Artwork: {self.stats}")
+        return results
+
+    def downloadImage(self,image_path:str) -> str or None:
+        """Returns the local file for one image path, downloading it if needed.  Concurrent calls for a path share one download."""
+        local_path:str = self.getPath(image_path)
+        if local_path is not None and os.path.exists(local_path):
+            self.stats.add('cached')
+            return local_path
+        return self.flights.do(image_path,lambda: self.__fetch(image_path))
+
+    def saveIndex(self) -> bool:
+        """Saves the path index"""
+        with self.lock:
+            index:Dict[str,str] = dict(self.index)
+        return self.filesystem.savePickle(self.index_path,index)
+
+    def makeThumbnails(self,image_paths:List[str]) -> int:
+        """Writes thumbnails for cached images that don't have one yet, in a process pool.  Returns the number made."""
+        if Image is None:
+            self.logWarning("Thumbnails need Pillow (pip install pillow), skipping them")
+            return 0
+        os.makedirs(self.thumbnail_directory,exist_ok=True)
+        jobs:Dict[str,Tuple[str,str]] = {}
+        for image_path in image_paths:
+            with self.lock:
+                stored:str = self.index.get(image_path,None)
+            if not stored:
+                continue
+            thumbnail_path:str = os.path.join(self.thumbnail_directory,f"{os.path.splitext(stored)[0]}_{self.thumbnail_size}.jpg")
+            if not os.path.exists(thumbnail_path):
+                jobs[thumbnail_path] = (os.path.join(self.objects_directory,stored[:2],stored),thumbnail_path)
+        if not jobs:
+            return 0
+        sources, targets = zip(*jobs.values())
+        with ProcessPoolExecutor() as executor:
+            made:int = sum(executor.map(makeThumbnail,sources,targets,[self.thumbnail_size]*len(jobs),chunksize=16))
+        return made
+
+    def __fetch(self,image_path:str) -> str or None:
+        """Downloads one image into the store.  Returns the local file, or None if unsuccessful."""
+        partial_path:str = os.path.join(self.partial_directory,hashlib.sha256(image_path.encode('utf-8')).hexdigest() + ".part")
+        os.makedirs(self.partial_directory,exist_ok=True)
+        try:
+            while True:
+                offset:int = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+                headers:Dict[str,str] = {'Range':f"bytes={offset}-"} if offset else {}
+                with self.session.get(f"{self.image_url}{image_path}",headers=headers,timeout=self.timeout,stream=True) as response:
+                    if response.status_code == 416 and offset:
+                        if self.__getTotalSize(response) == offset:
+                            #the partial file is already complete
+                            return self.__store(image_path,partial_path)
+                        #the partial file is longer than the image (it changed on the server), so start again
+                        self.logWarning(f"Partial download of {image_path} doesn't match the server, restarting it")
+                        os.remove(partial_path)
+                        continue
+                    if response.status_code not in (200,206):
+                        self.logError(f"Error downloading {image_path}: HTTP {response.status_code}")
+                        self.stats.add('failed')
+                        return None
+                    resumed:bool = response.status_code == 206
+                    if resumed:
+                        self.stats.add('resumed')
+                    with open(partial_path,'ab' if resumed else 'wb') as f:
+                        for chunk in response.iter_content(CHUNK_SIZE):
+                            f.write(chunk)
+                            self.stats.add('bytes',len(chunk))
+                return self.__store(image_path,partial_path)
+        except (requests.RequestException,OSError) as e:
+            #the partial file is kept, so the next attempt continues from where this one stopped
+            self.logError(f"Error downloading {image_path}: {e}")
+            self.stats.add('failed')
+            return None
+
+    def __getTotalSize(self,response:requests.Response) -> int:
+        """Returns the full size of the image from the Content-Range header of a 416 reply ('bytes */N'), or -1 if not given"""
+        match = CONTENT_RANGE_REGEX.match(response.headers.get('Content-Range',""))
+        return int(match.group(1)) if match is not None else -1
+
+    def __store(self,image_path:str,partial_path:str) -> str or None:
+        """Moves a finished download into the content addressed store and indexes it"""
+        digest = hashlib.sha256()
+        with open(partial_path,'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE),b""):
+                digest.update(chunk)
+        stored:str = digest.hexdigest() + os.path.splitext(image_path)[1].lower()
+        local_path:str = os.path.join(self.objects_directory,stored[:2],stored)
+        os.makedirs(os.path.dirname(local_path),exist_ok=True)
+        if os.path.exists(local_path):
+            os.remove(partial_path)
+            self.stats.add('deduplicated')
+        else:
+            os.replace(partial_path,local_path)
+        self.stats.add('downloaded')
+        with self.lock:
+            self.index[image_path] = stored
+        return local_path
@@ -23,7 +23,10 @@ class Config(LoggableClass):
         self.CWD = os.path.dirname(self.config_path)    #current working directory
         self.FILEPATH_TMDB_API_KEY_BACKUP = os.path.join(self.CWD, 'api_key.txt')   #backup file for tmdb api key
         self.FILEPATH_TMDB_DATA = os.path.join(self.CWD, 'data','TMDB data','tmdb_data.pkl')  #file to store tmdb data
+        self.FILEPATH_TMDB_CACHE = os.path.join(self.CWD, 'data','TMDB data','responses')   #folder for cached TMDB responses
+        self.FILEPATH_ARTWORK = os.path.join(self.CWD, 'data','artwork')   #folder for downloaded posters and stills
         self.FILEPATH_LST_DATA = os.path.join(self.CWD, 'data','LST data', 'local_series_data.pkl')   #file to store ert data
+        self.FILEPATH_DATABASE = os.path.join(self.CWD, 'data','database.db')   #sqlite cache of TMDB series
         #LOAD CONFIG
         self.loadConfig()
 
@@ -37,6 +40,30 @@ class Config(LoggableClass):
             # ------------------------------- Load and set variable values -------------------------------
             self.TMDB_API_KEY = config.get('tmdb_api_key',"")
             self.FILEPATH_ROOT_SERIES_DATA = config.get('root_series_folder',"")
+            self.ROOT_SERIES_FOLDERS = config.get('root_series_folders',[])
+            if not self.ROOT_SERIES_FOLDERS and self.FILEPATH_ROOT_SERIES_DATA:
+                self.ROOT_SERIES_FOLDERS = [self.FILEPATH_ROOT_SERIES_DATA]
+            self.SCAN_WORKERS = config.get('scan_workers',8)
+            self.DEVICE_CONCURRENCY = config.get('device_concurrency',{})
+            self.SKIP_FILENAMES = config.get('skip_filenames',None)
+            self.SKIP_EXTENSIONS = config.get('skip_extensions',None)
+            self.SKIP_PATTERNS = config.get('skip_patterns',None)
+            self.API_CONNECT_TIMEOUT = config.get('api_connect_timeout',5.0)
+            self.API_READ_TIMEOUT = config.get('api_read_timeout',30.0)
+            self.API_MAX_RETRIES = config.get('api_max_retries',3)
+            self.API_MAX_CONCURRENCY = config.get('api_max_concurrency',16)
+            self.API_RATE_LIMIT = config.get('api_rate_limit',40.0)
+            self.API_BURST = config.get('api_burst',20)
+            self.API_CACHE_SIZE_MB = config.get('api_cache_size_mb',512)
+            self.API_OFFLINE = config.get('api_offline',False)
+            self.API_URL = config.get('api_url',"")
+            self.API_IMAGE_URL = config.get('api_image_url',"")
+            self.ARTWORK_WORKERS = config.get('artwork_workers',8)
+            self.ARTWORK_THUMBNAIL_SIZE = config.get('artwork_thumbnail_size',0)
+            self.DB_JOURNAL_MODE = config.get('db_journal_mode',"WAL")
+            self.DB_SYNCHRONOUS = config.get('db_synchronous',"NORMAL")
+            self.DB_CACHE_SIZE_MB = config.get('db_cache_size_mb',64)
+            self.DB_MMAP_SIZE_MB = config.get('db_mmap_size_mb',256)
 
             # END
         #api key backup file
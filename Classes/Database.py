@@ -1,76 +1,503 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, DateTime, String, Integer, inspect
+from sqlalchemy import Column, DateTime, String, Integer, ForeignKey, ForeignKeyConstraint, Index, inspect, func, select, cast, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.pool import QueuePool
+from urllib.request import pathname2url
 import datetime
+import os
+from difflib import SequenceMatcher
+from typing import List, Dict, NamedTuple, Iterable
 from Classes.LoggableClass import LoggableClass as Class
+from Classes.NameParser import normaliseSeriesName
 import uuid
 
 Base = declarative_base()
 
+NAME_INDEX_TABLE:str = "series_name_index"
+"""FTS5 table of normalised series names and aliases, tokenised into trigrams"""
+TRUNCATED_SYNC_KEY:str = "truncated_series_dropped"
+"""sync_state key set once Database.dropTruncatedSeries() has run"""
+NAME_INDEX_VERSION:str = "2"
+"""Bumped when normaliseSeriesName changes, so indexes built with the old normalisation are rebuilt on start"""
+NAME_INDEX_SYNC_KEY:str = "series_name_index_version"
+MAX_QUERY_TRIGRAMS:int = 64
+
 class Database(Class):
-    def __init__(self):
+    """SQLite cache database.  Writes go through a pooled read/write engine; lookups (getSeriesRows etc.) go through a
+    separate read-only engine.  In WAL mode the readers see the last commit and are never blocked by a writer."""
+    def __init__(self,db_path:str = 'database.db',journal_mode:str = "WAL",synchronous:str = "NORMAL",cache_size_mb:int = 64,
+                 mmap_size_mb:int = 256,busy_timeout:float = 45,pool_size:int = 8):
         super().__init__("DB","DB ERR","DB WRN")
         global Base
-        self.db_path:str = 'database.db'
-        self.engine = create_engine(f'sqlite:///{self.db_path}?timeout=45', echo=False, pool_size=20, max_overflow=30)
+        #absolute, so the database does not depend on the directory the program was started from
+        self.db_path:str = os.path.abspath(db_path)
+        os.makedirs(os.path.dirname(self.db_path),exist_ok=True)
+        self.journal_mode:str = journal_mode
+        self.synchronous:str = synchronous
+        self.cache_size_mb:int = cache_size_mb
+        self.mmap_size_mb:int = mmap_size_mb
+        self.busy_timeout:float = busy_timeout
+        #sqlite connections are cheap, but each keeps its own page cache: a small pool of long lived connections
+        #shared by every thread keeps the caches warm (sessions are per thread, and return their connection on close)
+        self.engine = create_engine(f'sqlite:///{self.db_path}', echo=False, poolclass=QueuePool, pool_size=pool_size, max_overflow=pool_size,
+                                    connect_args={'timeout':busy_timeout,'check_same_thread':False})
+        event.listen(self.engine,"connect",self.__configureConnection)
         self.Session:scoped_session = scoped_session(sessionmaker(bind=self.engine))
         self.Base = Base
         #create the tables
         self.createTables()
+        #move rows of the old single table cache into series/season/episode
+        self.migrateLegacyRows()
+        #read only connections for lookups (opened after the tables exist)
+        self.read_engine = create_engine(f'sqlite:///file:{pathname2url(self.db_path)}?mode=ro&uri=true', echo=False, poolclass=QueuePool,
+                                         pool_size=pool_size, max_overflow=pool_size,
+                                         connect_args={'timeout':busy_timeout,'check_same_thread':False})
+        event.listen(self.read_engine,"connect",self.__configureReadConnection)
+        self.ReadSession:scoped_session = scoped_session(sessionmaker(bind=self.read_engine))
+        #series an earlier migration copied with missing episodes
+        if self.getSyncValue(TRUNCATED_SYNC_KEY) is None:
+            self.dropTruncatedSeries()
+        #databases made while the episode index allowed duplicates
+        self.upgradeEpisodeIndex()
+        #series cached before the name index existed, or indexed with an older normalisation
+        if self.name_index and (self.getSyncValue(NAME_INDEX_SYNC_KEY) != NAME_INDEX_VERSION or
+                                (self.getNameIndexSize() == 0 and self.getOldestSeriesUpdate() is not None)):
+            self.rebuildNameIndex()
+
+    @staticmethod
+    def fromConfig(config) -> "Database":
+        """Builds the database at config.FILEPATH_DATABASE with the db_* config values"""
+        return Database(config.FILEPATH_DATABASE,
+                        journal_mode=getattr(config,'DB_JOURNAL_MODE',"WAL"),
+                        synchronous=getattr(config,'DB_SYNCHRONOUS',"NORMAL"),
+                        cache_size_mb=getattr(config,'DB_CACHE_SIZE_MB',64),
+                        mmap_size_mb=getattr(config,'DB_MMAP_SIZE_MB',256))
+
+    def __configureConnection(self,connection,record) -> None:
+        """Applies the storage profile to a new read/write connection"""
+        cursor = connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        #with WAL, NORMAL only syncs at checkpoints: a power cut can lose the last commits, but never corrupts the file
+        cursor.execute(f"PRAGMA synchronous={self.synchronous}")
+        self.__configureCache(cursor)
+        #sqlite only enforces foreign keys when asked to, per connection
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    def __configureReadConnection(self,connection,record) -> None:
+        """Applies the storage profile to a new read only connection"""
+        cursor = connection.cursor()
+        self.__configureCache(cursor)
+        cursor.close()
+
+    def __configureCache(self,cursor) -> None:
+        #negative cache_size is in KiB
+        cursor.execute(f"PRAGMA cache_size={-int(self.cache_size_mb*1024)}")
+        cursor.execute(f"PRAGMA mmap_size={int(self.mmap_size_mb*1024*1024)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
 
     def getSession(self) -> scoped_session:
         """Returns a scoped session"""
         return self.Session()
-    
+
+    def getReadSession(self) -> scoped_session:
+        """Returns a scoped session on the read only engine, for lookups"""
+        return self.ReadSession()
+
+    def getPragma(self,name:str,read_only:bool = False):
+        """Returns the value of a pragma on a (read only) connection, e.g. getPragma("journal_mode")"""
+        with (self.read_engine if read_only else self.engine).connect() as connection:
+            return connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+    def close(self) -> None:
+        """Closes every pooled connection"""
+        self.ReadSession.remove()
+        self.Session.remove()
+        self.read_engine.dispose()
+        self.engine.dispose()
+
     def createTables(self) -> None:
         """Called on init.  Creates tables if they do not exist"""
         self.log("Creating tables")
         self.Base.metadata.create_all(self.engine,checkfirst=True)
+        #the fuzzy name index needs sqlite 3.34+ (trigram tokenizer); without it names only match exactly
+        try:
+            with self.engine.begin() as connection:
+                connection.exec_driver_sql(f"CREATE VIRTUAL TABLE IF NOT EXISTS {NAME_INDEX_TABLE} USING fts5(name, series_id UNINDEXED, tokenize='trigram')")
+            self.name_index:bool = True
+        except Exception as e:
+            self.logWarning(f"createTables(): No fuzzy series name index, this sqlite can't build one: {e}")
+            self.name_index:bool = False
 
     def generateUniqueID(self) -> str:
         """Generate a random unique ID with uuid4"""
         unique_id:str = str(uuid.uuid4())
 
-    def createTMDB(self,
-                   db_id:str,
-                   episode_name:str,
-                   episode_id:str,
-                   episode_number:int,
-                   episode_overview:str,
-                   episode_still_path:str,
-                   season_number:int,
-                   season_id:str,
-                   number_of_episodes:int,
-                   series_name:str,
-                   series_original_name:str,
-                   series_overview:str,
-                   series_poster_path:str,
-                   series_id:int,
-                   number_of_seasons:int,
-                   search_string:str) -> None:
-        """Create a TMDB object"""
+    def upsertTMDBRows(self,rows:List[Dict[str,object]]) -> int:
+        """Writes flat TMDB rows (dicts of EpisodeRecord values, one per episode) to the series, season and episode tables in
+        one transaction.  Rows that already exist are updated instead; a series keeps its search_string and created_at.
+        Returns the number of episodes written."""
+        if not rows:
+            return 0
+        now:datetime.datetime = datetime.datetime.utcnow()
+        series_rows:Dict[int,dict] = {}
+        season_rows:Dict[tuple,dict] = {}
+        episode_rows:List[dict] = []
+        for row in rows:
+            series_rows.setdefault(row['series_id'],{'db_id':str(row['series_id']),'created_at':now,'updated_at':now,
+                                                     **{name:row[name] for name in SERIES_COLUMNS}})
+            season_rows.setdefault((row['series_id'],row['season_number']),{'db_id':f"{row['series_id']}-{row['season_number']}",'created_at':now,'updated_at':now,
+                                                                             **{name:row[name] for name in SEASON_COLUMNS}})
+            episode_rows.append({'db_id':row['db_id'],'created_at':now,'updated_at':now,**{name:row[name] for name in EPISODE_COLUMNS}})
+        session = self.getSession()
+        try:
+            #parents first, so the foreign keys of the episodes resolve
+            #rows conflict on their natural keys (db_ids are built from them), so an episode is stored once per number
+            for model, values, keys, keep in ((TMDBSeries,list(series_rows.values()),['series_id'],{'db_id','search_string','created_at'}),
+                                              (TMDBSeason,list(season_rows.values()),['series_id','season_number'],{'db_id','created_at'}),
+                                              (TMDBEpisode,episode_rows,['series_id','season_number','episode_number'],{'db_id','created_at'})):
+                statement = sqlite_insert(model.__table__)
+                statement = statement.on_conflict_do_update(index_elements=[model.__table__.c[key] for key in keys],
+                                                            set_={name:statement.excluded[name] for name in values[0] if name not in keep})
+                session.execute(statement,values)
+            self.__indexNames(session,series_rows.keys())
+            session.commit()
+            return len(episode_rows)
+        except Exception as e:
+            session.rollback()
+            self.logError(f"upsertTMDBRows(): Error writing {len(rows)} rows: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def getSeriesRows(self,series_id:int) -> List["EpisodeRecord"]:
+        """Returns the episodes of a cached series (with their season and series fields), ordered by season and episode number"""
+        session = self.getReadSession()
+        rows = session.query(*[getattr(model,name) for model, name in EPISODE_RECORD_SOURCES]) \
+                      .select_from(TMDBEpisode) \
+                      .join(TMDBSeason,(TMDBSeason.series_id == TMDBEpisode.series_id) & (TMDBSeason.season_number == TMDBEpisode.season_number)) \
+                      .join(TMDBSeries,TMDBSeries.series_id == TMDBEpisode.series_id) \
+                      .filter(TMDBEpisode.series_id == series_id) \
+                      .order_by(TMDBEpisode.season_number,TMDBEpisode.episode_number).all()
+        session.close()
+        return [EpisodeRecord(*row) for row in rows]
+
+    def getSeriesIdBySearchString(self,search_string:str) -> int or None:
+        """Returns the id of the cached series stored under search_string, or None"""
+        session = self.getReadSession()
+        series_id:int = session.query(TMDBSeries.series_id).filter(TMDBSeries.search_string == search_string).limit(1).scalar()
+        session.close()
+        return series_id
+
+    def getSeriesIdByName(self,series_name:str) -> int or None:
+        """Returns the id of the cached series named series_name on TMDB, or None"""
+        session = self.getReadSession()
+        series_id:int = session.query(TMDBSeries.series_id).filter(TMDBSeries.series_name == series_name).limit(1).scalar()
+        session.close()
+        return series_id
+
+    def getSearchString(self,series_id:int) -> str or None:
+        """Returns the search_string a cached series is stored under, or None if it is not cached"""
+        session = self.getReadSession()
+        search_string:str = session.query(TMDBSeries.search_string).filter(TMDBSeries.series_id == series_id).scalar()
+        session.close()
+        return search_string
+
+    def getAliasSeriesId(self,key:str) -> int or None:
+        """Returns the id of the series an alias (normalised folder name) points at, or None"""
+        session = self.getReadSession()
+        series_id:int = session.query(SeriesAlias.series_id).filter(SeriesAlias.db_id == key).scalar()
+        session.close()
+        return series_id
+
+    def addAlias(self,key:str,search_string:str,series_id:int) -> None:
+        """Points an alias (normalised folder name) at a cached series, replacing where it pointed before"""
+        session = self.getSession()
+        try:
+            previous:int = session.query(SeriesAlias.series_id).filter(SeriesAlias.db_id == key).scalar()
+            session.merge(SeriesAlias(db_id=key,search_string=search_string,series_id=series_id))
+            session.flush()
+            if previous is None:
+                self.__indexAlias(session,series_id,search_string)
+            elif previous != series_id:
+                self.__indexNames(session,[series_id,previous])
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self.logError(f"addAlias(): Error adding alias '{key}' for series '{series_id}': {e}")
+        finally:
+            session.close()
+
+    def findSeriesFuzzy(self,name:str,limit:int = 5,candidates:int = 25) -> List["FuzzyMatch"]:
+        """Ranks cached series by how closely one of their names (TMDB name, original name, search_string or an alias)
+        resembles name, best first.  The candidates sharing the most trigrams come from the FTS5 index, then each is scored
+        0-1 by comparing normalised names (see NameParser.normaliseSeriesName), 1 being the same normalised name."""
+        query:str = normaliseSeriesName(name)
+        trigrams:List[str] = list(dict.fromkeys(query[i:i+3] for i in range(len(query) - 2)))
+        if not self.name_index or not trigrams:
+            return []
+        #normalised names are only word characters, spaces and the qualifier's brackets, so every trigram quotes as is
+        match:str = " OR ".join(f'"{trigram}"' for trigram in trigrams[:MAX_QUERY_TRIGRAMS])
+        session = self.getReadSession()
+        try:
+            rows = session.execute(text(f"SELECT series_id, name FROM {NAME_INDEX_TABLE} WHERE {NAME_INDEX_TABLE} MATCH :match ORDER BY rank LIMIT :limit"),
+                                   {'match':match,'limit':candidates}).all()
+        except Exception as e:
+            self.logError(f"findSeriesFuzzy(): Error searching for '{name}': {e}")
+            return []
+        finally:
+            session.close()
+        best:Dict[int,FuzzyMatch] = {}
+        for series_id, indexed_name in rows:
+            score:float = SequenceMatcher(None,query,indexed_name).ratio()
+            if series_id not in best or score > best[series_id].score:
+                best[series_id] = FuzzyMatch(series_id,indexed_name,score)
+        return sorted(best.values(),key=lambda fuzzy_match: fuzzy_match.score,reverse=True)[:limit]
+
+    def getNameIndexSize(self) -> int:
+        """Returns the number of names in the fuzzy name index"""
+        if not self.name_index:
+            return 0
+        session = self.getReadSession()
+        size:int = session.execute(text(f"SELECT count(*) FROM {NAME_INDEX_TABLE}")).scalar()
+        session.close()
+        return size
+
+    def rebuildNameIndex(self) -> int:
+        """Rebuilds the fuzzy name index from every cached series and alias.  Returns the number of series indexed."""
+        if not self.name_index:
+            return 0
+        session = self.getSession()
+        try:
+            series_ids:List[int] = [series_id for series_id, in session.query(TMDBSeries.series_id).all()]
+            session.execute(text(f"DELETE FROM {NAME_INDEX_TABLE}"))
+            for first in range(0,len(series_ids),500):
+                self.__indexNames(session,series_ids[first:first+500],replace=False)
+            session.commit()
+            self.setSyncValue(NAME_INDEX_SYNC_KEY,NAME_INDEX_VERSION)
+            self.log(f"rebuildNameIndex(): Indexed the names of {len(series_ids)} series")
+            return len(series_ids)
+        except Exception as e:
+            session.rollback()
+            self.logError(f"rebuildNameIndex(): Error rebuilding the name index: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def __indexAlias(self,session,series_id:int,search_string:str) -> None:
+        """Adds one new alias of a series to the fuzzy name index, in the session's transaction, unless the series already has its normalised name"""
+        name:str = normaliseSeriesName(search_string)
+        if not self.name_index or not name:
+            return
+        if len(name) >= 3:
+            indexed:List[int] = session.execute(text(f"SELECT series_id FROM {NAME_INDEX_TABLE} WHERE name MATCH :phrase AND name = :name"),
+                                                {'phrase':f'"{name}"','name':name}).scalars().all()
+            if series_id in indexed:
+                return
+        session.execute(text(f"INSERT INTO {NAME_INDEX_TABLE} (name, series_id) VALUES (:name, :series_id)"),{'name':name,'series_id':series_id})
+
+    def __indexNames(self,session,series_ids:Iterable[int],replace:bool = True) -> None:
+        """Writes the normalised names and aliases of some series to the fuzzy name index, in the session's transaction"""
+        series_ids = [int(series_id) for series_id in series_ids]
+        if not self.name_index or not series_ids:
+            return
+        if replace:
+            session.execute(text(f"DELETE FROM {NAME_INDEX_TABLE} WHERE series_id IN ({','.join(map(str,series_ids))})"))
+        names:set = set()
+        for series_id, *series_names in session.query(TMDBSeries.series_id,TMDBSeries.series_name,TMDBSeries.series_original_name,
+                                                      TMDBSeries.search_string).filter(TMDBSeries.series_id.in_(series_ids)):
+            names.update((normaliseSeriesName(series_name),series_id) for series_name in series_names if series_name)
+        for series_id, search_string in session.query(SeriesAlias.series_id,SeriesAlias.search_string).filter(SeriesAlias.series_id.in_(series_ids)):
+            names.add((normaliseSeriesName(search_string),series_id))
+        rows:List[dict] = [{'name':name,'series_id':series_id} for name, series_id in names if name]
+        if rows:
+            session.execute(text(f"INSERT INTO {NAME_INDEX_TABLE} (name, series_id) VALUES (:name, :series_id)"),rows)
+
+    def updateSeries(self,series_id:int,values:Dict[str,object]) -> bool:
+        """Updates columns of a cached series.  Returns True if successful."""
+        session = self.getSession()
+        try:
+            session.query(TMDBSeries).filter(TMDBSeries.series_id == series_id).update(values,synchronize_session=False)
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            self.logError(f"updateSeries(): Error updating series '{series_id}': {e}")
+            return False
+        finally:
+            session.close()
+
+    def getLatestSeasons(self) -> Dict[int,int]:
+        """Returns the highest cached season number keyed by series id"""
+        session = self.getReadSession()
+        latest:Dict[int,int] = dict(session.query(TMDBSeason.series_id,func.max(TMDBSeason.season_number)).group_by(TMDBSeason.series_id).all())
+        session.close()
+        return latest
+
+    def getOldestSeriesUpdate(self) -> datetime.datetime or None:
+        """Returns when the least recently written series was written, or None if none are cached"""
+        session = self.getReadSession()
+        oldest:datetime.datetime = session.query(func.min(TMDBSeries.updated_at)).scalar()
+        session.close()
+        return oldest
+
+    def migrateLegacyRows(self) -> int:
+        """One-shot move of the rows in the old single table cache (tmbd) into the series, season and episode tables, in
+        one transaction, then rebuilds the fuzzy name index.  Series stored with missing episodes (db_ids ending in -None) are
+        not moved.  The legacy rows are deleted afterwards, so this does nothing on later runs.  Returns the number of legacy rows read."""
+        session = self.getSession()
+        try:
+            legacy_count:int = session.query(func.count(TMDB.db_id)).scalar()
+            if not legacy_count:
+                return 0
+            self.log(f"migrateLegacyRows(): Moving {legacy_count} cached episodes to the series/season/episode tables")
+            legacy = TMDB.__table__.c
+            #old versions read episode ids from a field TMDB doesn't send, so every episode of a season got the same
+            #db_id (ending in -None) and only one survived: those series are left out, and fetched again when looked up
+            truncated = select(legacy.series_id).where(legacy.db_id.like("%-None"))
+            complete = legacy.series_id.not_in(truncated)
+            #sqlite takes the bare columns of a group from the row holding the max(), so each series/season gets the values of its newest row
+            copies = ((TMDBSeries,
+                       [cast(legacy.series_id,String)] + [legacy[name] for name in SERIES_COLUMNS],
+                       ['db_id'] + SERIES_COLUMNS,
+                       [legacy.series_id]),
+                      (TMDBSeason,
+                       [cast(legacy.series_id,String) + "-" + cast(legacy.season_number,String)] + [legacy[name] for name in SEASON_COLUMNS],
+                       ['db_id'] + SEASON_COLUMNS,
+                       [legacy.series_id,legacy.season_number]))
+            for model, columns, names, group in copies:
+                query = select(*columns,func.min(legacy.created_at),func.max(legacy.updated_at)).where(complete).group_by(*group)
+                session.execute(model.__table__.insert().prefix_with("OR IGNORE").from_select(names + ['created_at','updated_at'],query))
+            names:List[str] = ['created_at','updated_at'] + EPISODE_COLUMNS
+            episode_db_id = cast(legacy.series_id,String) + "-" + cast(legacy.season_number,String) + "-" + cast(legacy.episode_number,String)
+            session.execute(TMDBEpisode.__table__.insert().prefix_with("OR IGNORE").from_select(['db_id'] + names,
+                                                                                                 select(episode_db_id,*[legacy[name] for name in names]).where(complete)))
+            skipped:int = session.execute(select(func.count(func.distinct(legacy.series_id))).where(~complete)).scalar()
+            if skipped:
+                self.logWarning(f"migrateLegacyRows(): Left out {skipped} series cached with missing episodes, they will be fetched again")
+            session.query(TMDB).delete(synchronize_session=False)
+            session.commit()
+            self.rebuildNameIndex()
+            return legacy_count
+        except Exception as e:
+            session.rollback()
+            self.logError(f"migrateLegacyRows(): Error moving the legacy rows, they are kept: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def dropTruncatedSeries(self) -> int:
+        """Deletes the series (with their seasons, episodes and aliases) that migrateLegacyRows copied before it left out
+        series with missing episodes, so they are fetched again when looked up.  Returns the number of series deleted."""
+        session = self.getSession()
+        try:
+            series_ids:List[int] = [series_id for series_id, in session.query(TMDBEpisode.series_id).filter(TMDBEpisode.db_id.like("%-None")).distinct()]
+            if series_ids:
+                session.query(TMDBSeries).filter(TMDBSeries.series_id.in_(series_ids)).delete(synchronize_session=False)
+                self.__indexNames(session,series_ids)
+            session.commit()
+            if series_ids:
+                self.logWarning(f"dropTruncatedSeries(): Deleted {len(series_ids)} series cached with missing episodes, they will be fetched again")
+        except Exception as e:
+            session.rollback()
+            self.logError(f"dropTruncatedSeries(): Error deleting series with missing episodes: {e}")
+            return 0
+        finally:
+            session.close()
+        self.setSyncValue(TRUNCATED_SYNC_KEY,datetime.datetime.utcnow().isoformat())
+        return len(series_ids)
+
+    def upgradeEpisodeIndex(self) -> bool:
+        """Makes the (series_id, season_number, episode_number) index of an older database unique: keeps the most
+        recently written episode of each number, and renames db_ids to series_id-season_number-episode_number.
+        Returns True if the index was upgraded."""
+        indexes:List[dict] = inspect(self.engine).get_indexes(TMDBEpisode.__tablename__)
+        if any(index['name'] == EPISODE_INDEX and index['unique'] for index in indexes):
+            return False
         session = self.getSession()
-        tmdb = TMDB(db_id=db_id,
-                    episode_name=episode_name,
-                    episode_id=episode_id,
-                    episode_number=episode_number,
-                    episode_overview=episode_overview,
-                    episode_still_path=episode_still_path,
-                    season_number=season_number,
-                    season_id=season_id,
-                    number_of_episodes=number_of_episodes,
-                    series_name=series_name,
-                    series_original_name=series_original_name,
-                    series_overview=series_overview,
-                    series_poster_path=series_poster_path,
-                    series_id=series_id,
-                    number_of_seasons=number_of_seasons,
-                    search_string=search_string
-                    )
-        session.add(tmdb)
-        session.commit()
+        try:
+            session.execute(text("DELETE FROM episode WHERE rowid NOT IN (SELECT max(rowid) FROM episode GROUP BY series_id, season_number, episode_number)"))
+            session.execute(text(f"DROP INDEX IF EXISTS {EPISODE_INDEX}"))
+            session.execute(text(f"CREATE UNIQUE INDEX {EPISODE_INDEX} ON episode (series_id, season_number, episode_number)"))
+            session.execute(text("UPDATE episode SET db_id = series_id || '-' || season_number || '-' || episode_number"))
+            session.commit()
+            self.log("upgradeEpisodeIndex(): Episode numbers are now unique per season")
+            return True
+        except Exception as e:
+            session.rollback()
+            self.logError(f"upgradeEpisodeIndex(): Error making the episode index unique: {e}")
+            return False
+        finally:
+            session.close()
+
+    def getSyncValue(self,key:str) -> str or None:
+        """Returns a stored sync value (e.g. the time of the last refresh), or None if it was never set"""
+        session = self.getReadSession()
+        sync_state:SyncState = session.query(SyncState).filter(SyncState.db_id == key).first()
+        value:str = sync_state.value if sync_state else None
+        session.close()
+        return value
+
+    def getNegativeResult(self,key:str) -> "NegativeResult" or None:
+        """Returns the unexpired negative cache entry for a series key, or None"""
+        session = self.getReadSession()
+        negative:NegativeResult = session.query(NegativeResult).filter(NegativeResult.db_id == key,
+                                                                       NegativeResult.expires_at > datetime.datetime.utcnow()).first()
+        session.close()
+        return negative
+
+    def getNegativeResults(self) -> List["NegativeResult"]:
+        """Returns every unexpired negative cache entry, oldest first"""
+        session = self.getReadSession()
+        negatives:List[NegativeResult] = session.query(NegativeResult).filter(NegativeResult.expires_at > datetime.datetime.utcnow()).order_by(NegativeResult.created_at).all()
         session.close()
+        return negatives
+
+    def addNegativeResult(self,key:str,search_string:str,reason:str,ttl_seconds:float) -> None:
+        """Records that a series search failed, so it is not repeated for ttl_seconds"""
+        session = self.getSession()
+        try:
+            session.merge(NegativeResult(db_id=key,
+                                         search_string=search_string,
+                                         reason=reason,
+                                         expires_at=datetime.datetime.utcnow() + datetime.timedelta(seconds=ttl_seconds)))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self.logError(f"addNegativeResult(): Error adding '{key}': {e}")
+        finally:
+            session.close()
+
+    def clearNegativeResults(self,key:str = None) -> int:
+        """Deletes the negative cache entry for a key, or every entry (and all expired ones).  Returns the number deleted."""
+        session = self.getSession()
+        try:
+            query = session.query(NegativeResult)
+            if key is not None:
+                query = query.filter((NegativeResult.db_id == key) | (NegativeResult.expires_at <= datetime.datetime.utcnow()))
+            deleted:int = query.delete(synchronize_session=False)
+            session.commit()
+            return deleted
+        except Exception as e:
+            session.rollback()
+            self.logError(f"clearNegativeResults(): Error deleting entries: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def setSyncValue(self,key:str,value:str) -> None:
+        """Stores a sync value, replacing the previous one"""
+        session = self.getSession()
+        try:
+            session.merge(SyncState(db_id=key,value=value))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self.logError(f"setSyncValue(): Error setting '{key}': {e}")
+        finally:
+            session.close()
 
 
 
@@ -81,6 +508,8 @@ class BaseModel(Base):
     updated_at:DateTime = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
 class TMDB(BaseModel):
+    """Legacy single table cache, one row per episode with the season and series fields repeated.  Nothing writes to it
+    any more; Database.migrateLegacyRows() moves the rows older versions left into TMDBSeries/TMDBSeason/TMDBEpisode."""
     __tablename__ = "tmbd"
     #episode data
     episode_name:str = Column(String, nullable=False)
@@ -105,3 +534,98 @@ class TMDB(BaseModel):
     def __repr__(self):
         return f"<TMDB(series_name = {self.series_name}, series_id = {self.series_id}, season_number = {self.season_number}, episode_number = {self.episode_number})>"
 
+EPISODE_INDEX:str = "ix_episode_series_id_season_number_episode_number"
+
+class TMDBSeries(BaseModel):
+    """A cached TMDB series (db_id is the TMDB id as a string)"""
+    __tablename__ = "series"
+    series_id:int = Column(Integer, nullable=False, unique=True)
+    series_name:str = Column(String, nullable=False, index=True)
+    series_original_name:str = Column(String, nullable=False)
+    series_overview:str = Column(String, nullable=True)
+    series_poster_path:str = Column(String, nullable=True)
+    number_of_seasons:int = Column(Integer, nullable=False)
+    number_of_episodes:int = Column(Integer, nullable=False)
+    #search data
+    search_string:str = Column(String, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<TMDBSeries(series_name = {self.series_name}, series_id = {self.series_id})>"
+
+class TMDBSeason(BaseModel):
+    """A season of a cached series (db_id is series_id-season_number)"""
+    __tablename__ = "season"
+    __table_args__ = (Index("ix_season_series_id_season_number","series_id","season_number",unique=True),)
+    series_id:int = Column(Integer, ForeignKey("series.series_id", ondelete="CASCADE"), nullable=False)
+    season_number:int = Column(Integer, nullable=False)
+    season_id:str = Column(String, nullable=False)
+
+class TMDBEpisode(BaseModel):
+    """An episode of a cached season (db_id is series_id-season_number-episode_number)"""
+    __tablename__ = "episode"
+    __table_args__ = (ForeignKeyConstraint(["series_id","season_number"],["season.series_id","season.season_number"],ondelete="CASCADE"),
+                      Index(EPISODE_INDEX,"series_id","season_number","episode_number",unique=True))
+    series_id:int = Column(Integer, nullable=False)
+    season_number:int = Column(Integer, nullable=False)
+    episode_number:int = Column(Integer, nullable=False)
+    episode_id:str = Column(String, nullable=False)
+    episode_name:str = Column(String, nullable=False)
+    episode_overview:str = Column(String, nullable=True)
+    episode_still_path:str = Column(String, nullable=True)
+
+class SeriesAlias(BaseModel):
+    """A folder name a cached series was found under (db_id is the normalised name, see TMDBManager.getSeriesKey).
+    Any number of aliases can point at one series."""
+    __tablename__ = "series_alias"
+    series_id:int = Column(Integer, ForeignKey("series.series_id", ondelete="CASCADE"), nullable=False, index=True)
+    search_string:str = Column(String, nullable=False)
+    """The name as it was looked up"""
+
+class FuzzyMatch(NamedTuple):
+    """A cached series found by Database.findSeriesFuzzy()"""
+    series_id:int
+    name:str
+    """The normalised name or alias that matched"""
+    score:float
+    """0-1, 1 when the normalised names are the same"""
+
+class EpisodeRecord(NamedTuple):
+    """One cached episode with its season and series fields, as returned by Database.getSeriesRows().  Has the same
+    fields as the legacy TMDB rows."""
+    db_id:str
+    episode_name:str
+    episode_id:str
+    episode_number:int
+    episode_overview:str
+    episode_still_path:str
+    season_number:int
+    season_id:str
+    number_of_episodes:int
+    series_name:str
+    series_original_name:str
+    series_overview:str
+    series_poster_path:str
+    series_id:int
+    number_of_seasons:int
+    search_string:str
+
+SERIES_COLUMNS:List[str] = ['series_id','series_name','series_original_name','series_overview','series_poster_path',
+                            'number_of_seasons','number_of_episodes','search_string']
+SEASON_COLUMNS:List[str] = ['series_id','season_number','season_id']
+EPISODE_COLUMNS:List[str] = ['series_id','season_number','episode_number','episode_id','episode_name','episode_overview','episode_still_path']
+#which table each EpisodeRecord field is read from
+EPISODE_RECORD_SOURCES:List[tuple] = [(TMDBSeries if name in SERIES_COLUMNS and name != 'series_id' else
+                                       TMDBSeason if name == 'season_id' else TMDBEpisode,name) for name in EpisodeRecord._fields]
+
+class SyncState(BaseModel):
+    """Key/value bookkeeping for refresh jobs (db_id is the key)"""
+    __tablename__ = "sync_state"
+    value:str = Column(String, nullable=False)
+
+class NegativeResult(BaseModel):
+    """A series search that failed (db_id is the normalised series name), remembered until expires_at"""
+    __tablename__ = "negative_cache"
+    search_string:str = Column(String, nullable=False)
+    reason:str = Column(String, nullable=False)
+    """'no results', 'api error' or 'rate limited'"""
+    expires_at:DateTime = Column(DateTime, nullable=False, index=True)
@@ -60,6 +60,22 @@ class Filesystem(LoggableClass):
             self.logError(f"Error loading pickle: {e}")
             return None
         
+    def savePickle(self,filepath:str,data:object) -> bool:
+        """Save an object to a pickle file, creating the parent folder if needed.  Returns True if successful, False if not"""
+        try:
+            folder:str = os.path.dirname(filepath)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder)
+            #write to a temporary file first so a crash never leaves a half written pickle
+            temp_filepath:str = filepath + ".tmp"
+            with open(temp_filepath, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_filepath, filepath)
+            return True
+        except Exception as e:
+            self.logError(f"Error saving pickle: {e}")
+            return False
+        
     def getFolders(self,filepath:str) -> List[str]:
         """Returns a list of folders in the given directory. Returns an empty list if none found."""
         if not os.path.exists(filepath):
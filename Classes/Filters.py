@@ -1,10 +1,17 @@
 import re as regex
 from Classes.LoggableClass import LoggableClass
+from Classes.NameParser import parseSeasonNumber
 from typing import List
 
 class Filter(LoggableClass):
-    def __init__(self):
-        super().__init__("FLT","FLT ERR","FLT WRN")
+    def __init__(self,logging=True,logging_warnings=True,logging_errors=True,keep_logs=True):
+        super().__init__(prefix="FLT",
+                         prefix_error="FLT ERR",
+                         prefix_warning="FLT WRN",
+                         logging=logging,
+                         log_warning=logging_warnings,
+                         log_errors=logging_errors,
+                         keep_logs=keep_logs)
         
     def seriesName(self,series_name:str) -> str:
         """Returns a formatted season name"""
@@ -20,28 +27,21 @@ class Filter(LoggableClass):
         """Returns a formatted season name"""
         original_name:str = season_name
         season_name = self.__basicFormatting(season_name)
-        season_name = self.__removeYear(season_name)
-        digits:List[str] = [char for char in season_name if char.isdigit()]
-        if len(digits) > 0:
-            season_number = int("".join(digits))
-            season_number_str = str(season_number)
-            while(len(season_number_str) < 2):
-                season_number_str = "0" + season_number_str
-            season_name = f"Season {season_number_str}"
+        season_number:int = parseSeasonNumber(season_name)
+        if season_number != -1:
+            season_name = f"Season {season_number:02d}"
+        else:
+            season_name = self.__removeYear(season_name)
         #log any changes
         if original_name != season_name:
             self.log(f"Season name changed from '{original_name}' to '{season_name}'")
         return season_name
             
-    def determineSeasonNumber(self,formatted_season_name:str) -> int:
-        """Returns the index of the season number.  Returns -1 of none found"""
-        digits:List[str] = [char for char in formatted_season_name[6:] if char.isdigit()]
-        if len(digits) > 0:
-            number = int("".join(digits))
-        else:
-            number = -1
+    def determineSeasonNumber(self,season_name:str) -> int:
+        """Returns the season number from a raw or formatted season name.  Returns -1 of none found"""
+        number:int = parseSeasonNumber(season_name)
         #log determination
-        self.log(f"Season number for '{formatted_season_name}' determined to be '{number}'")
+        self.log(f"Season number for '{season_name}' determined to be '{number}'")
         return number
 
     def episodeName(self, episode_name:str) -> str:
@@ -0,0 +1,121 @@
+#Ignore rules for the Local Scraper Tool
+from typing import List, Tuple, Iterable, Pattern
+import fnmatch
+import re as regex
+
+IGNORE_FILENAME:str = ".ertignore"
+"""Per directory rules file.  Its rules apply to everything below the directory it is in."""
+
+DEFAULT_SKIP_FILENAMES:List[str] = [
+    'metadata',
+    'folder.jpg',
+    'folder.png',
+    'commentaries',
+    'cover.jpg',
+    'logo.png',
+    'extras',
+    'sample'
+]
+DEFAULT_SKIP_EXTENSIONS:List[str] = [
+    'png',
+    'jpg',
+    'jpeg',
+    'txt',
+    'gif',
+    'nfo'
+]
+
+class IgnoreRules:
+    """Skip rules compiled once into fast matchers: an exact name set, an extension set and one combined glob regex.
+    Rules from .ertignore files are layered on top with extend(), gitignore style:
+        # comment            blank lines and comments are skipped
+        featurettes          matches any entry with that name (case insensitive, globs allowed)
+        behind the scenes/   trailing slash: only matches directories
+        !Extras Season 1     leading '!': un-ignores a name an earlier rule ignored
+    Rules are matched against single names, not paths.  Later rules win, so a child directory can override its parent."""
+    def __init__(self,
+                 skip_filenames:Iterable[str] = None,
+                 skip_extensions:Iterable[str] = None,
+                 skip_patterns:Iterable[str] = None):
+        skip_filenames = DEFAULT_SKIP_FILENAMES if skip_filenames is None else skip_filenames
+        skip_extensions = DEFAULT_SKIP_EXTENSIONS if skip_extensions is None else skip_extensions
+        self.names:frozenset = frozenset([name.lower() for name in skip_filenames] + [IGNORE_FILENAME])
+        """Exact names to skip (lowercase)"""
+        self.extensions:frozenset = frozenset(extension.lower().lstrip(".") for extension in skip_extensions)
+        """Extensions to skip (lowercase, no dot)"""
+        self.patterns:List[str] = list(skip_patterns) if skip_patterns else []
+        self.pattern_regex:Pattern = self.__compileGlobs(self.patterns)
+        """All glob patterns from config in one regex, or None"""
+        self.rules:List[Tuple[Pattern,bool,bool]] = []
+        """Ordered (regex, negate, directories_only) rules from .ertignore files"""
+        self.rules_regex:Pattern = None
+        """All .ertignore rules in one regex, when none of them are negated or directory only"""
+
+    @staticmethod
+    def fromConfig(config) -> "IgnoreRules":
+        """Builds the rules from the skip_filenames, skip_extensions and skip_patterns config values"""
+        return IgnoreRules(skip_filenames=getattr(config,'SKIP_FILENAMES',None),
+                           skip_extensions=getattr(config,'SKIP_EXTENSIONS',None),
+                           skip_patterns=getattr(config,'SKIP_PATTERNS',None))
+
+    def isIgnored(self,name:str,is_directory:bool = False) -> bool:
+        """Returns True if the given file or folder name should be skipped"""
+        lowered:str = name.lower()
+        ignored:bool = lowered in self.names
+        if not ignored and "." in lowered:
+            ignored = lowered.rsplit(".",1)[1] in self.extensions
+        if not ignored and self.pattern_regex is not None:
+            ignored = self.pattern_regex.match(lowered) is not None
+        if not self.rules:
+            return ignored
+        if self.rules_regex is not None:
+            return ignored or self.rules_regex.match(lowered) is not None
+        #last matching rule wins
+        for rule_regex, negate, directories_only in reversed(self.rules):
+            if directories_only and not is_directory:
+                continue
+            if rule_regex.match(lowered) is not None:
+                return not negate
+        return ignored
+
+    def extend(self,lines:Iterable[str]) -> "IgnoreRules":
+        """Returns new rules with the given .ertignore lines added after these ones.  Returns self if there are no rules in the lines."""
+        new_rules:List[Tuple[Pattern,bool,bool]] = []
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            negate:bool = line.startswith("!")
+            if negate:
+                line = line[1:]
+            directories_only:bool = line.endswith("/")
+            line = line.strip("/")
+            if not line:
+                continue
+            new_rules.append((regex.compile(fnmatch.translate(line.lower())), negate, directories_only))
+        if not new_rules:
+            return self
+        child:IgnoreRules = IgnoreRules.__new__(IgnoreRules)
+        child.names = self.names
+        child.extensions = self.extensions
+        child.patterns = self.patterns
+        child.pattern_regex = self.pattern_regex
+        child.rules = self.rules + new_rules
+        child.rules_regex = None
+        if not any(negate or directories_only for _, negate, directories_only in child.rules):
+            child.rules_regex = regex.compile("|".join(f"(?:{rule_regex.pattern})" for rule_regex, _, _ in child.rules))
+        return child
+
+    def extendFromFile(self,filepath:str) -> "IgnoreRules":
+        """Returns new rules with the lines of the given .ertignore file added.  Returns self if the file can't be read."""
+        try:
+            with open(filepath,'r',encoding='utf-8') as f:
+                return self.extend(f.readlines())
+        except OSError:
+            return self
+
+    def __compileGlobs(self,patterns:List[str]) -> Pattern or None:
+        """Combines glob patterns into one case insensitive regex"""
+        if not patterns:
+            return None
+        return regex.compile("|".join(f"(?:{fnmatch.translate(pattern.lower())})" for pattern in patterns))
@@ -2,13 +2,18 @@
 #Local Scraper Tool
 from Classes.LoggableClass import LoggableClass
 from Classes.Filesystem import Filesystem
+from Classes.Scanner import Scanner, ScanStats
+from Classes.Snapshot import DirectorySnapshot
+from Classes.Watcher import LibraryWatcher
+from Classes.IgnoreRules import IgnoreRules
 from Classes.LocalFile import Series, Season, Episode
-from typing import List, Dict
+from typing import List, Dict, Iterator
+import threading
 import os
 
 class LST(LoggableClass):
     """Local Series Tool"""
-    def __init__(self,root_directory:str,logging=True,logging_warnings=True,logging_errors=True):
+    def __init__(self,root_directory:str or List[str],snapshot_path:str=None,ignore_rules:IgnoreRules=None,scan_workers:int=8,device_limits:Dict[str,int]=None,scan_on_init:bool=True,logging=True,logging_warnings=True,logging_errors=True):
         #super init
         self.prefix:str = "LST"
         self.prefix_warning:str = "LST WRN"
@@ -19,170 +24,117 @@ class LST(LoggableClass):
                          logging=logging,
                          log_warning=logging_warnings,
                          log_errors=logging_errors)
-        #root directory
-        self.root_directory:str = root_directory
+        #root directories (one or more, possibly on different devices)
+        self.root_directories:List[str] = [root_directory] if isinstance(root_directory,str) else list(root_directory)
+        self.root_directory:str = self.root_directories[0] if self.root_directories else ""
         #filesystem
         self.filesystem:Filesystem = Filesystem()
-        #filenames to skip
-        self.skip_filenames:List[str] = [
-            'metadata',
-            'folder.jpg',
-            'folder.png',
-            'commentaries',
-            'cover.jpg',
-            'logo.png',
-            'extras',
-            'sample'
-        ]
-        self.skip_extensions = [
-            'png',
-            'jpg',
-            'jpeg',
-            'txt',
-            'gif',
-            'nfo'
-        ]
-        #local series data
+        #snapshot of the previous scan (None disables incremental rescans)
+        self.snapshot_path:str = snapshot_path
+        self.snapshot:DirectorySnapshot = self.loadSnapshot()
+        #compiled skip rules (config values, extended by .ertignore files while scanning)
+        self.ignore_rules:IgnoreRules = ignore_rules if ignore_rules is not None else IgnoreRules()
+        #scanning engine
+        self.scanner:Scanner = Scanner(ignore_rules=self.ignore_rules,
+                                       max_workers=scan_workers,
+                                       device_limits=device_limits,
+                                       logging=logging,
+                                       logging_warnings=logging_warnings,
+                                       logging_errors=logging_errors)
+        #local series data (held under lock while a LibraryWatcher is updating it)
         self.local_series_data:List[Series] = []
-        #scan 
-        self.scanLocalSeries()
+        self.lock:threading.RLock = threading.RLock()
+        #series found in more than one folder, keyed by normalised series name
+        self.duplicate_series:Dict[str,List[Series]] = {}
+        #scan (pass scan_on_init=False to stream with iterSeries() instead)
+        if scan_on_init:
+            self.scanLocalSeries()
 
     def getData(self) -> List[Series]:
         """Returns a list of 'Series' objects, containing 'Season' objects, which contain 'Episode' objects."""
         return self.local_series_data
     
-    def scanLocalSeries(self) -> List[Series]:
-        """Returns a list of 'Series' objects, containing 'Season' objects, which contain 'Episode' objects."""
-        series_list:List[Series] = []
-        #get all series directories
-        series_directories:List[str] = self.filesystem.getFolders(self.root_directory)
-        if len(series_directories) == 0:
-            self.logError(f"No series directories found in {self.root_directory}")
-            return []
-        #------------------------------------------------- SERIES -------------------------------------------------
-        for series_folder in series_directories:
-            if self.__determineSkip(series_folder):
-                self.log(f"Skipping {series_folder}")
-                continue
-            series_data:Series = Series(series_folder)
-            series_data.filepath:str = os.path.join(self.root_directory,series_folder)
-            #get all season directories
-            season_directories:List[str] = self.filesystem.getFolders(os.path.join(self.root_directory,series_folder))
-            if len(season_directories) == 0:
-                self.logError(f"No season directories found in {series_folder}")
-                continue
-            #------------------------------------------------- SEASONS -------------------------------------------------
-            for season_folder in season_directories:
-                if self.__determineSkip(season_folder):
-                    self.log(f"Skipping {season_folder} in {series_folder}")
-                    continue
-                season_data:Season = Season(season_folder)
-                season_data.filepath = os.path.join(self.root_directory,series_folder,season_folder)
-                season_data.number = self.__getSeasonNumber(season_folder)
-                #get all episode files
-                episode_files:List[str] = self.filesystem.getFiles(os.path.join(self.root_directory,series_folder,season_folder))
-                if len(episode_files) == 0:
-                    self.logError(f"No episode files found in {season_folder}")
-                    continue
-                #------------------------------------------------- EPISODES -------------------------------------------------
-                for episode_file in episode_files:
-                    if self.__determineSkip(episode_file):
-                        self.log(f"Skipping {episode_file} in {season_folder}")
-                        continue
-                    split_data:List[str] = self.__splitNameExtension(episode_file)
-                    if len(split_data) != 2:
-                        self.logError(f"Error splitting name and extension from {episode_file}")
-                        continue
-                    episode_data:Episode = Episode(episode_file)
-                    episode_data.filepath:str = os.path.join(self.root_directory,series_folder,season_folder,episode_file)
-                    episode_data.original_name:str = split_data[0]
-                    episode_data.extension:str = split_data[1]
-                    #add the episode data to the season data
-                    season_data.episodes.append(episode_data)
-                #add the season data to the series data
-                series_data.seasons.append(season_data)
-            #add the series data to the series list
-            series_list.append(series_data)
-        self.local_series_data = series_list
+    def getDuplicateSeries(self) -> Dict[str,List[Series]]:
+        """Returns the series that were found in more than one folder (usually on different roots), keyed by normalised name"""
+        return self.duplicate_series
+
+    def getScanStats(self) -> ScanStats:
+        """Returns the directory/file throughput stats for the most recent scan"""
+        return self.scanner.getStats()
+
+    def loadSnapshot(self) -> DirectorySnapshot or None:
+        """Loads the directory snapshot from snapshot_path.  Returns None if there is no usable snapshot."""
+        if not self.snapshot_path:
+            return None
+        snapshot:DirectorySnapshot = DirectorySnapshot.fromData(self.filesystem.loadPickle(self.snapshot_path))
+        if snapshot is None:
+            self.log(f"No usable snapshot at {self.snapshot_path}, running a full scan")
+            return None
+        self.log(f"Loaded snapshot of {len(snapshot)} directories from {self.snapshot_path}")
+        return snapshot
+
+    def saveSnapshot(self) -> bool:
+        """Saves the directory snapshot to snapshot_path.  Returns True if successful, False if not."""
+        if not self.snapshot_path or self.snapshot is None:
+            return False
+        return self.filesystem.savePickle(self.snapshot_path,self.snapshot.toData())
+
+    def scanLocalSeries(self) -> bool:
+        """Scans the root directory into a list of 'Series' objects, containing 'Season' objects, which contain 'Episode' objects.  Returns True if any series were found.
+        Only directories that changed since the saved snapshot are listed again."""
+        for series_data in self.iterSeries(ordered=True):
+            pass
         if len(self.local_series_data) == 0:
-            self.logError(f"No series found in {self.root_directory}")
+            self.logError(f"No series found in {', '.join(self.root_directories)}")
             return False
         return True
+
+    def iterSeries(self,max_buffer:int=16,cancel_event:threading.Event=None,ordered:bool=False) -> Iterator[Series]:
+        """Yields each 'Series' as soon as its seasons are scanned, so lookups can start before the scan finishes.
+        At most max_buffer scanned series wait to be consumed.  Set cancel_event, or stop iterating, to cancel the scan.
+        Yielded series are also collected into getData(), and the snapshot is saved once the scan completes."""
+        with self.lock:
+            self.local_series_data = []
+            self.duplicate_series = {}
+        series_by_key:Dict[str,Series] = {}
+        stream:Iterator[Series] = self.scanner.iterScan(self.root_directories,
+                                                        previous_snapshot=self.snapshot,
+                                                        max_buffer=max_buffer,
+                                                        cancel_event=cancel_event,
+                                                        ordered=ordered)
+        try:
+            for series_data in stream:
+                with self.lock:
+                    self.local_series_data.append(series_data)
+                    self.__checkDuplicate(series_data,series_by_key)
+                yield series_data
+        finally:
+            #stops the scanner workers right away if the caller stopped iterating early
+            stream.close()
+        if self.scanner.isCompleted():
+            self.snapshot = self.scanner.getSnapshot()
+            self.saveSnapshot()
     
-    def __determineSkip(self,filename:str) -> bool:
-        """Determines if the given filename should be skipped.  Returns True if it should be skipped, False if not."""
-        for name in self.skip_filenames:
-            if filename.lower() == name.lower():
-                return True
-        for extension in self.skip_extensions:
-            if filename.lower().endswith(extension.lower()):
-                return True
-        return False
-    
-    def __getSeasonNumber(self,season_string:str) -> int:
-        """Returns the season number from the given string.  Returns -1 if not found."""
-        #check if a number follows a space
-        if season_string.__contains__(" "):
-            possible_number:str = season_string.rsplit(" ")[1]
-            if possible_number.isdigit():
-                return int(possible_number)
-        #check if a number follows the word 'season'
-        if season_string.lower().__contains__("season"):
-            try:
-                possible_number:str = season_string.lower().split("season")[1]
-                if possible_number.isdigit():
-                    return int(possible_number)
-            except Exception as e:
-                self.log(f"{season_string} contains 'season' but could not be split: {e}")
-        #check if a number is written out
-        number_text:List[str] = ["one","two","three","four","five","six","seven","eight","nine","ten","eleven","twelve","thirteen","fourteen", "fifteen","sixteen","seventeen","eighteen","nineteen","twenty"]
-        for i in range(0,len(number_text)):
-            if season_string.lower().__contains__(number_text[i]):
-                return i+1
-        #check digits in the string, starting from the end
-        digits:List[str] = []
-        for i in range(len(season_string)-1,-1,-1):
-            if season_string[i].isdigit():
-                digits.append(season_string[i])
-            else:
-                break
-        #reverse the digits
-        digits.reverse()
-        #join the digits into a string
-        digits_string:str = "".join(digits)
-        #return the digits as an int
-        if digits_string.isdigit():
-            return int(digits_string)
-        #check digits in the string, starting from the beginning
-        digits:List[str] = []
-        for i in range(0,len(season_string)):
-            if season_string[i].isdigit():
-                digits.append(season_string[i])
-            else:
-                break
-        #join the digits into a string
-        digits_string:str = "".join(digits)
-        #return the digits as an int
-        if digits_string.isdigit():
-            return int(digits_string)
-        #just grab all digits and put them in a string
-        digits:List[str] = []
-        for i in range(0,len(season_string)):
-            if season_string[i].isdigit():
-                digits.append(season_string[i])
-        #join the digits into a string
-        digits_string:str = "".join(digits)
-        #return the digits as an int
-        if digits_string.isdigit():
-            return int(digits_string)
-        #if no number was found, return -1
-        return -1
+    def __checkDuplicate(self,series_data:Series,series_by_key:Dict[str,Series]) -> None:
+        """Records the series in duplicate_series if another folder with the same normalised name was already found"""
+        key:str = " ".join(series_data.formatted_name.lower().split())
+        first:Series = series_by_key.setdefault(key,series_data)
+        if first is series_data:
+            return
+        if key not in self.duplicate_series:
+            self.duplicate_series[key] = [first]
+        self.duplicate_series[key].append(series_data)
+        self.logWarning(f"Duplicate series '{series_data.formatted_name}': {first.filepath} and {series_data.filepath}")
 
-    def __splitNameExtension(self,episode_string:str) -> List[str]:
-        """Splits the episode name and extension from the given string.  Returns a list of two strings, or an empty list if not found."""
-        #check if a period exists
-        if episode_string.__contains__("."):
-            #split the string by the period
-            data:List[str] = episode_string.rsplit(".",1)
-            return data
-        return []
\ No newline at end of file
+    def watch(self,debounce_seconds:float=2.0,max_delay_seconds:float=30.0) -> LibraryWatcher or None:
+        """Starts keeping the scanned tree live with inotify (Linux only).  Returns the running LibraryWatcher, whose
+        getEvents() feed lists what changed, or None if watching could not start."""
+        watcher:LibraryWatcher = LibraryWatcher(self,
+                                                debounce_seconds=debounce_seconds,
+                                                max_delay_seconds=max_delay_seconds,
+                                                logging=self.logging,
+                                                logging_warnings=self.log_warning,
+                                                logging_errors=self.log_errors)
+        if not watcher.start():
+            return None
+        return watcher
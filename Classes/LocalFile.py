@@ -1,19 +1,44 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple, Iterable
 from Classes.Filters import Filter
+from Classes.NameParser import parseNameUncached, parseSeasonNumber, ParsedName
+import sys
+import os
+
+NAME_FILTER:Filter = Filter(logging=False,logging_warnings=False,logging_errors=False,keep_logs=False)
+"""One quiet Filter shared by every LocalFile, instead of a full LoggableClass per object"""
 
 class LocalFile:
-    """Local file object"""
-    def __init__(self,name_on_disc:str):
+    """Local file object.  Uses __slots__, as a library holds one of these per series, season and episode."""
+    __slots__ = ('name_on_disc','formatted_name','proposed_name','parent','_filepath')
+
+    def __init__(self,name_on_disc:str,parent:"LocalFile" = None):
         self.name_on_disc:str = name_on_disc
         """Full name of file on disc (without path)"""
         self.formatted_name:str = ""
         """Filename after running through filters"""
         self.proposed_name:str = ""
         """Proposed name after querying and comparing to API/database"""
-        self.filepath:str = ""
-        """Full filepath"""
-        self.filter:Filter = Filter()
-        """Filter object for formatting names"""
+        self.parent:LocalFile = parent
+        """Containing Series/Season, used to build the filepath"""
+        self._filepath:str = None
+
+    @property
+    def filepath(self) -> str:
+        """Full filepath.  Built from the parent's filepath unless it was set directly, so episodes don't each store a full path."""
+        if self._filepath is not None:
+            return self._filepath
+        if self.parent is not None:
+            return os.path.join(self.parent.filepath,self.name_on_disc)
+        return ""
+
+    @filepath.setter
+    def filepath(self,filepath:str) -> None:
+        self._filepath = filepath
+
+    @property
+    def filter(self) -> Filter:
+        """Filter object for formatting names (shared)"""
+        return NAME_FILTER
 
     def getProposedName(self) -> str:
         """Returns the proposed name"""
@@ -23,52 +48,97 @@ class LocalFile:
 #Series
 class Series(LocalFile):
     """Series object"""
+    __slots__ = ('seasons',)
+
     def __init__(self,name:str):
         super().__init__(name)
         self.seasons:List[Season] = []
-        self.formatted_name = self.filter.seriesName(self.name_on_disc)
+        self.formatted_name = NAME_FILTER.seriesName(self.name_on_disc)
 
     def getSeasons(self) -> List[object]:
         return self.seasons
-    
+
 #Season
 class Season(LocalFile):
     """Season object"""
-    def __init__(self,name:str):
-        super().__init__(name)
+    __slots__ = ('episodes','season_number','number','episode_index')
+
+    def __init__(self,name:str,parent:Series = None):
+        #season folder names repeat across every series, so share one copy of each
+        super().__init__(sys.intern(name),parent)
         self.episodes:List[Episode] = []
-        self.formatted_name = self.filter.seasonName(self.name_on_disc)
-        # unchanged if 'season' is not in the folder name
-        self.season_number:int = self.filter.determineSeasonNumber(self.formatted_name)
+        self.formatted_name = sys.intern(NAME_FILTER.seasonName(self.name_on_disc))
+        # unchanged if no season number is found in the folder name
+        self.season_number:int = parseSeasonNumber(self.name_on_disc)
         # -1 if no season number found
-    
+        self.number:int = self.season_number
+        """Same as season_number"""
+        self.episode_index:Dict[int,Episode] = {}
+        """episode number -> Episode.  Multi-episode files are indexed under every number they cover"""
+
     def getEpisodes(self) -> List[object]:
         return self.episodes
-    
-    def __formatName(self) -> None:
-        """Format the season name"""
-        self.formatted_name = self.filter.seasonName(self.name_on_disc)
-
-    def __determineSeasonNumber(self) -> None:
-        """Determine the season number"""
-        #get the numbers after season (from formatted name)
-        digits:List[str] = [char for char in self.formatted_name[6:] if char.isdigit()]
-        if len(digits) > 0:
-            self.number = int("".join(digits))
-        else:
-            self.number = -1
+
+    def addEpisode(self,episode:"Episode") -> None:
+        """Adds an episode to the season and its index"""
+        episode.parent = self
+        if episode.season_number == -1:
+            episode.season_number = self.season_number
+        self.episodes.append(episode)
+        for episode_number in episode.getEpisodeNumbers():
+            self.episode_index[episode_number] = episode
+
+    def removeEpisode(self,episode:"Episode") -> None:
+        """Removes an episode from the season and its index"""
+        self.episodes.remove(episode)
+        for episode_number in episode.getEpisodeNumbers():
+            if self.episode_index.get(episode_number,None) is episode:
+                del self.episode_index[episode_number]
+
+    def getEpisode(self,episode_number:int) -> "Episode" or None:
+        """Returns the episode with the given number, or None if there is no file for it"""
+        return self.episode_index.get(episode_number,None)
+
+    def getMissingEpisodes(self,episode_numbers:Iterable[int]) -> List[int]:
+        """Returns the given episode numbers that have no file in this season"""
+        return [episode_number for episode_number in episode_numbers if episode_number not in self.episode_index]
 
 #Episode
 class Episode(LocalFile):
     """Episode object"""
-    def __init__(self,name:str):
-        super().__init__(name)
-        self.extension:str = ""
+    __slots__ = ('extension','season_number','episode_number','end_episode')
+
+    def __init__(self,name:str,parent:Season = None):
+        super().__init__(name,parent)
+        split_data:List[str] = name.rsplit(".",1) if "." in name else [name,""]
+        self.extension:str = sys.intern(split_data[1])
         """Extension of the file"""
-        self.original_name:str = ""
-        """Name without Extensions"""
-        self.formatted_name:str = self.filter.episodeName(self.original_name)
+        self.formatted_name = NAME_FILTER.episodeName(split_data[0])
         """Name after running through the filters"""
+        #each file name is parsed once, so skip parseName's cache rather than fill it with names never seen again
+        parsed:ParsedName = parseNameUncached(split_data[0])
+        self.season_number:int = parsed.season if parsed.season != -1 or parent is None else parent.season_number
+        """Season number from the file name, or from the season folder.  -1 if neither has one"""
+        self.episode_number:int = parsed.episode
+        """Episode number from the file name.  -1 if not found"""
+        self.end_episode:int = parsed.end_episode
+        """Last episode number of a multi-episode file, or -1"""
+
+    @property
+    def original_name(self) -> str:
+        """Name without Extensions"""
+        if self.extension:
+            return self.name_on_disc[:-(len(self.extension)+1)]
+        return self.name_on_disc
+
+    def getEpisodeNumbers(self) -> List[int]:
+        """Returns every episode number this file covers (empty if the number is unknown)"""
+        if self.episode_number == -1:
+            return []
+        if self.end_episode == -1:
+            return [self.episode_number]
+        return list(range(self.episode_number,self.end_episode+1))
 
-ep = Episode("test")
-ep.original_name
\ No newline at end of file
+    def getKey(self) -> Tuple[int,int]:
+        """Returns (season_number, episode_number), the key TMDB rows are matched on"""
+        return (self.season_number,self.episode_number)
@@ -8,7 +8,8 @@ class LoggableClass:
                  prefix_warning:str = "UND WRN",
                  logging:bool = True,
                  log_warning:bool = True,
-                 log_errors:bool = True
+                 log_errors:bool = True,
+                 keep_logs:bool = True
                  ):
         #colors
         self.colorama:colorama = colorama
@@ -44,6 +45,8 @@ class LoggableClass:
         self.logging:bool = logging
         self.log_warning:bool = log_warning
         self.log_errors:bool = log_errors
+        self.keep_logs:bool = keep_logs
+        """Set to False to stop collecting messages in the lists below (for long lived, shared objects)"""
             #lists
         self.log_list:List[str] = []
         self.warning_list:List[str] = []
@@ -80,8 +83,9 @@ class LoggableClass:
         if not prefix: prefix = self.prefix
         current_time:str = self.getTimestamp()
         line:str = f"[{self.prefix_color}{prefix}{self.reset}]:[{self.timestamp_color}{current_time}{self.reset}] {self.messsage_color}{message}{self.reset}"
-        self.log_list.append(line)
-        self.full_logs.append(line)
+        if self.keep_logs:
+            self.log_list.append(line)
+            self.full_logs.append(line)
         if self.logging:
             print(line)
 
@@ -90,8 +94,9 @@ class LoggableClass:
         if not prefix: prefix = self.prefix_error
         current_time:str = self.getTimestamp()
         line:str = f"[{self.error_color}{prefix}{self.reset}]:[{self.timestamp_color}{current_time}{self.reset}] {self.messsage_color}{message}{self.reset}"
-        self.error_list.append(line)
-        self.full_logs.append(line)
+        if self.keep_logs:
+            self.error_list.append(line)
+            self.full_logs.append(line)
         if self.log_errors:
             print(line)
 
@@ -100,8 +105,9 @@ class LoggableClass:
         if not prefix: prefix = self.prefix_warning
         current_time:str = self.getTimestamp()
         line:str = f"[{self.warning_color}{prefix}{self.reset}]:[{self.timestamp_color}{current_time}{self.reset}] {self.messsage_color}{message}{self.reset}"
-        self.warning_list.append(line)
-        self.full_logs.append(line)
+        if self.keep_logs:
+            self.warning_list.append(line)
+            self.full_logs.append(line)
         if self.log_warning:
             print(line)
 
@@ -0,0 +1,127 @@
+#Season/episode/year parser for folder and file names
+from typing import NamedTuple, Dict, List, Tuple
+import functools
+import re as regex
+
+NUMBER_WORDS:Dict[str,int] = {
+    "one":1,"two":2,"three":3,"four":4,"five":5,"six":6,"seven":7,"eight":8,"nine":9,"ten":10,
+    "eleven":11,"twelve":12,"thirteen":13,"fourteen":14,"fifteen":15,"sixteen":16,"seventeen":17,
+    "eighteen":18,"nineteen":19,"twenty":20
+}
+MAX_EPISODE_RANGE:int = 20
+"""An end episode further than this from the start is treated as noise (e.g. 'S01E01 - 720p')"""
+CACHE_SIZE:int = 65536
+
+#every pattern is an alternative of one regex, so a name is parsed in a single left to right pass.  Every token starts
+#at a word boundary; checking that once, before the alternatives, halves the scan time over repeating it in each one.
+TOKEN_REGEX = regex.compile(r"""(?<![a-z0-9])(?:
+    s(?P<se_season>\d{1,4})[ ._-]*e(?P<se_episode>\d{1,4})(?:(?:[ ._]*-[ ._]*e?|e)(?P<se_end>\d{1,4}))?(?!\d)
+  | (?P<x_season>\d{1,2})x(?P<x_episode>\d{1,3})(?:-(?:\d{1,2}x)?(?P<x_end>\d{1,3}))?(?!\d)
+  | (?:season|series|saison|staffel)[ ._-]*(?:(?P<word_season_number>\d{1,4})(?!\d)|(?P<word_season_text>""" + "|".join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r"""))(?![a-z])
+  | s(?P<s_season>\d{1,4})(?![a-z0-9])
+  | (?:episode|ep|e)[ ._-]*(?P<e_episode>\d{1,4})(?!\d)
+  | [(\[{'"]?(?P<year>(?:19|20)\d{2})[)\]}'"]?(?![a-z0-9])
+)""", regex.IGNORECASE | regex.VERBOSE)
+LEADING_NUMBER_REGEX = regex.compile(r"^\D*?(\d{1,4})(?!\d)")
+#series name normalisation (normaliseSeriesName)
+COUNTRY_CODES:str = "us|uk|gb|au|ca|nz|ie|de|fr|es|it|nl|be|se|dk|no|fi|br|mx|in|jp|kr"
+BRACKETED_REGEX = regex.compile(r"[(\[{]((?:19|20)\d{2}|" + COUNTRY_CODES + r")[)\]}]", regex.IGNORECASE)
+#a bare code only counts in capitals, so 'This Is Us' keeps its last word
+TRAILING_COUNTRY_REGEX = regex.compile(r"[ ._-]+(" + COUNTRY_CODES.upper() + r")$")
+QUALIFIER_REGEX = regex.compile(r"^(.*?)(?: \(([\w ]+)\))?$")
+ACRONYM_REGEX = regex.compile(r"(?<!\w)(?:\w\.){2,}(?:\w(?!\w))?")
+SEPARATOR_REGEX = regex.compile(r"[\W_]+")
+LEADING_ARTICLE_REGEX = regex.compile(r"^the ")
+
+class ParsedName(NamedTuple):
+    """Numbers found in a name.  -1 for anything not found"""
+    season:int = -1
+    episode:int = -1
+    end_episode:int = -1
+    """Last episode of a multi-episode file (S01E01-E02), or -1 for a single episode"""
+    year:int = -1
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def parseName(name:str) -> ParsedName:
+    """Returns the season, episode, end episode and year found in a folder or file name.  Results are memoised, which only
+    pays off for names that repeat (season folders): use parseNameUncached for episode file names."""
+    return parseNameUncached(name)
+
+def parseNameUncached(name:str) -> ParsedName:
+    """parseName without the memoisation, for names that are each parsed once"""
+    season:int = -1
+    episode:int = -1
+    end_episode:int = -1
+    year:int = -1
+    for match in TOKEN_REGEX.finditer(name):
+        groups:Dict[str,str] = match.groupdict()
+        if groups['se_season'] is not None or groups['x_season'] is not None:
+            #explicit season+episode markers beat anything found before them
+            if groups['se_season'] is not None:
+                season, episode, end = int(groups['se_season']), int(groups['se_episode']), groups['se_end']
+            else:
+                season, episode, end = int(groups['x_season']), int(groups['x_episode']), groups['x_end']
+            end_episode = -1
+            if end is not None and episode < int(end) <= episode + MAX_EPISODE_RANGE:
+                end_episode = int(end)
+        elif groups['word_season_number'] is not None:
+            if season == -1:
+                season = int(groups['word_season_number'])
+        elif groups['word_season_text'] is not None:
+            if season == -1:
+                season = NUMBER_WORDS[groups['word_season_text'].lower()]
+        elif groups['s_season'] is not None:
+            if season == -1:
+                season = int(groups['s_season'])
+        elif groups['e_episode'] is not None:
+            if episode == -1:
+                episode = int(groups['e_episode'])
+        elif groups['year'] is not None:
+            if year == -1:
+                year = int(groups['year'])
+    return ParsedName(season,episode,end_episode,year)
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def parseSeasonNumber(season_folder:str) -> int:
+    """Returns the season number of a season folder name ('Season 3', 'S03', 'Series Three', '3', '2019').  Returns -1 if not found."""
+    parsed:ParsedName = parseName(season_folder)
+    if parsed.season != -1:
+        return parsed.season
+    #TMDB numbers some shows' seasons by year ('2019', matching S2019E01)
+    if season_folder.strip().isdigit():
+        return int(season_folder)
+    #a bare number that isn't a year ('3', '03 - Extras')
+    match = LEADING_NUMBER_REGEX.match(season_folder)
+    if match is not None and parsed.year == -1 and parsed.episode == -1:
+        return int(match.group(1))
+    return -1
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def normaliseSeriesName(name:str) -> str:
+    """Returns a series name reduced to what fuzzy name matching compares: lowercase words separated by single spaces,
+    '&' as 'and', no apostrophes, acronyms joined (S.H.I.E.L.D. -> shield) and no leading 'the'.  A bracketed year or
+    country code, or trailing capitalised one, is kept as a qualifier in brackets at the end, because it tells shows of
+    the same name apart ('The Office (US)' -> 'office (us)', 'Shameless UK' -> 'shameless (uk)')."""
+    qualifiers:List[str] = [match.group(1).lower() for match in BRACKETED_REGEX.finditer(name)]
+    name = BRACKETED_REGEX.sub(" ",name).strip()
+    trailing = TRAILING_COUNTRY_REGEX.search(name)
+    if trailing is not None:
+        qualifiers.append(trailing.group(1).lower())
+        name = name[:trailing.start()]
+    name = ACRONYM_REGEX.sub(lambda match: match.group(0).replace(".",""),name)
+    name = name.lower().replace("&"," and ").replace("'","").replace("\u2019","")
+    name = LEADING_ARTICLE_REGEX.sub(""," ".join(SEPARATOR_REGEX.sub(" ",name).split()))
+    if qualifiers:
+        name = f"{name} ({' '.join(sorted(set(qualifiers)))})".strip()
+    return name
+
+def splitSeriesQualifier(normalised_name:str) -> Tuple[str,str]:
+    """Returns (name, qualifier) of a normaliseSeriesName result, the qualifier being "" if there is none"""
+    match = QUALIFIER_REGEX.match(normalised_name)
+    return match.group(1), match.group(2) or ""
+
+def clearCache() -> None:
+    """Clears the memoised results"""
+    parseName.cache_clear()
+    parseSeasonNumber.cache_clear()
+    normaliseSeriesName.cache_clear()
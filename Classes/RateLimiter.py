@@ -0,0 +1,74 @@
+#Token bucket rate limiter, shared by every thread that sends requests to the same service
+import threading
+import time
+
+class RateLimiter:
+    """Token bucket.  Holds up to burst tokens, refilled at rate tokens per second.  acquire() takes one token,
+    sleeping until one is available.  pause() stops everyone until a time (e.g. a 429 Retry-After) has passed.
+    Safe to share between threads."""
+    def __init__(self,rate:float = 40.0,burst:int = 20):
+        self.rate:float = rate
+        """Tokens added per second"""
+        self.burst:int = burst
+        """Most tokens held at once (requests that can go out back to back)"""
+        self.tokens:float = float(burst)
+        self.updated:float = time.monotonic()
+        self.paused_until:float = 0.0
+        self.lock:threading.Lock = threading.Lock()
+        #stats
+        self.throttled_seconds:float = 0.0
+        """Total time callers spent waiting in acquire()"""
+        self.throttled_requests:int = 0
+        """Number of acquire() calls that had to wait"""
+        self.pauses:int = 0
+        """Number of pause() calls (rate limit responses)"""
+
+    def configure(self,rate:float = None,burst:int = None) -> None:
+        """Changes the rate and/or burst size"""
+        with self.lock:
+            self.__refill(time.monotonic())
+            if rate is not None:
+                self.rate = rate
+            if burst is not None:
+                self.burst = burst
+                self.tokens = min(self.tokens,float(burst))
+
+    def acquire(self) -> float:
+        """Takes one token, waiting for it if needed.  Returns the seconds waited."""
+        waited:float = 0.0
+        while True:
+            with self.lock:
+                now:float = time.monotonic()
+                self.__refill(now)
+                wait:float = self.paused_until - now
+                if wait <= 0 and self.tokens >= 1:
+                    self.tokens -= 1
+                    if waited > 0:
+                        self.throttled_seconds += waited
+                        self.throttled_requests += 1
+                    return waited
+                wait = max(wait,(1 - self.tokens) / self.rate if self.rate > 0 else 1.0)
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self,seconds:float) -> None:
+        """Holds back every caller for the given seconds (keeps the longer pause if one is already running)"""
+        with self.lock:
+            now:float = time.monotonic()
+            self.__refill(now)
+            self.paused_until = max(self.paused_until,now + seconds)
+            #tokens start earning again when the pause ends, not from the last acquire()
+            self.tokens = 0.0
+            self.updated = self.paused_until
+            self.pauses += 1
+
+    def getThrottledSeconds(self) -> float:
+        """Returns the total time callers spent waiting for a token"""
+        return self.throttled_seconds
+
+    def __refill(self,now:float) -> None:
+        """Adds the tokens earned since the last update.  Call while holding the lock."""
+        if now <= self.updated: #still paused
+            return
+        self.tokens = min(float(self.burst),self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
@@ -0,0 +1,172 @@
+#On-disk cache of raw API responses
+from typing import Dict, List, Tuple, Pattern
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import threading
+import hashlib
+import json
+import time
+import os
+import re as regex
+
+DAY:float = 24 * 60 * 60
+DEFAULT_TTLS:List[Tuple[str,float]] = [
+    (r"/search/", 7 * DAY),
+    (r"/tv/changes$", 0.0),
+    (r"/tv/\d+/changes$", 0.0),
+    (r"/tv/\d+/season/\d+$", 7 * DAY),
+    (r"/tv/\d+$", 1 * DAY),
+]
+"""(url path regex, seconds) pairs, searched in order, first match wins"""
+DEFAULT_TTL:float = 1 * DAY
+SECRET_PARAMS:frozenset = frozenset(['api_key'])
+"""Query parameters left out of cache keys (and never written to disk)"""
+
+class CacheEntry:
+    """One cached response"""
+    __slots__ = ('url','body','stored','etag','last_modified')
+
+    def __init__(self,url:str,body:dict,stored:float,etag:str = None,last_modified:str = None):
+        self.url:str = url
+        """Request url without secret parameters"""
+        self.body:dict = body
+        """Decoded JSON body"""
+        self.stored:float = stored
+        """Time the response was fetched or last revalidated"""
+        self.etag:str = etag
+        self.last_modified:str = last_modified
+
+    def getAge(self) -> float:
+        """Returns the seconds since the entry was fetched or revalidated"""
+        return time.time() - self.stored
+
+class ResponseCache:
+    """Content addressed response cache.  Each response is one JSON file named by the hash of its normalised url
+    (query parameters sorted, api_key removed), so the same request always maps to the same file.
+    Entries are fresh for a per endpoint TTL, then revalidated with ETag/Last-Modified.  When the files grow past
+    max_bytes, the least recently used are deleted.  Safe to share between threads."""
+    def __init__(self,directory:str,max_bytes:int = 512*1024*1024,ttls:List[Tuple[str,float]] = None,default_ttl:float = DEFAULT_TTL):
+        self.directory:str = directory
+        self.max_bytes:int = max_bytes
+        self.ttls:List[Tuple[Pattern,float]] = [(regex.compile(pattern),ttl) for pattern, ttl in (DEFAULT_TTLS if ttls is None else ttls)]
+        self.default_ttl:float = default_ttl
+        self.lock:threading.Lock = threading.Lock()
+        self.entries:Dict[str,Tuple[int,float]] = {}
+        """key -> (file size, last used), rebuilt from the files on start"""
+        self.total_bytes:int = 0
+        self.__loadIndex()
+
+    def getKey(self,url:str) -> str:
+        """Returns the cache key for a url"""
+        return hashlib.sha256(self.normaliseUrl(url).encode('utf-8')).hexdigest()
+
+    def normaliseUrl(self,url:str) -> str:
+        """Returns the url with its query parameters sorted and secret parameters removed"""
+        parts = urlsplit(url)
+        query:List[Tuple[str,str]] = sorted((name,value) for name, value in parse_qsl(parts.query,keep_blank_values=True) if name not in SECRET_PARAMS)
+        return f"{parts.scheme}://{parts.netloc}{parts.path}" + (f"?{urlencode(query)}" if query else "")
+
+    def getTTL(self,url:str) -> float:
+        """Returns the seconds a response for the url stays fresh"""
+        path:str = urlsplit(url).path
+        for pattern, ttl in self.ttls:
+            if pattern.search(path) is not None:
+                return ttl
+        return self.default_ttl
+
+    def isFresh(self,entry:CacheEntry) -> bool:
+        """Returns True if the entry can be used without asking the server"""
+        return entry.getAge() < self.getTTL(entry.url)
+
+    def get(self,url:str) -> CacheEntry or None:
+        """Returns the cached response for the url (fresh or not), or None"""
+        key:str = self.getKey(url)
+        with self.lock:
+            if key not in self.entries:
+                return None
+            size, _ = self.entries[key]
+            self.entries[key] = (size,time.time())
+        try:
+            with open(self.__getPath(key),'r',encoding='utf-8') as f:
+                data:dict = json.load(f)
+            return CacheEntry(data['url'],data['body'],data['stored'],data.get('etag',None),data.get('last_modified',None))
+        except (OSError,ValueError,KeyError):
+            self.__forget(key)
+            return None
+
+    def store(self,url:str,body:dict,etag:str = None,last_modified:str = None) -> None:
+        """Stores a response for the url, then evicts old entries if the cache is over max_bytes"""
+        key:str = self.getKey(url)
+        data:str = json.dumps({'url':self.normaliseUrl(url),'body':body,'stored':time.time(),'etag':etag,'last_modified':last_modified})
+        path:str = self.__getPath(key)
+        try:
+            os.makedirs(os.path.dirname(path),exist_ok=True)
+            tmp_path:str = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path,'w',encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path,path)
+        except OSError:
+            return
+        with self.lock:
+            old_size, _ = self.entries.get(key,(0,0.0))
+            self.entries[key] = (len(data),time.time())
+            self.total_bytes += len(data) - old_size
+        self.__evict()
+
+    def refresh(self,url:str,entry:CacheEntry) -> None:
+        """Marks an entry as fresh again after the server confirmed it is unchanged (304)"""
+        self.store(url,entry.body,entry.etag,entry.last_modified)
+
+    def clear(self) -> None:
+        """Deletes every cached response"""
+        with self.lock:
+            keys:List[str] = list(self.entries.keys())
+        for key in keys:
+            self.__forget(key)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getPath(self,key:str) -> str:
+        """Returns the file for a key (split into 256 sub folders)"""
+        return os.path.join(self.directory,key[:2],f"{key}.json")
+
+    def __forget(self,key:str) -> None:
+        """Deletes an entry and its file"""
+        with self.lock:
+            size, _ = self.entries.pop(key,(0,0.0))
+            self.total_bytes -= size
+        try:
+            os.remove(self.__getPath(key))
+        except OSError:
+            pass
+
+    def __evict(self) -> None:
+        """Deletes least recently used entries until the cache is at 90% of max_bytes"""
+        with self.lock:
+            if self.total_bytes <= self.max_bytes:
+                return
+            target:int = int(self.max_bytes * 0.9)
+            oldest_first:List[str] = sorted(self.entries,key=lambda key: self.entries[key][1])
+            evicted:List[str] = []
+            freed:int = 0
+            for key in oldest_first:
+                if self.total_bytes - freed <= target:
+                    break
+                freed += self.entries[key][0]
+                evicted.append(key)
+        for key in evicted:
+            self.__forget(key)
+
+    def __loadIndex(self) -> None:
+        """Builds the entry index from the files on disk, using each file's access time as its last use"""
+        if not os.path.isdir(self.directory):
+            return
+        for sub_folder in os.scandir(self.directory):
+            if not sub_folder.is_dir():
+                continue
+            for entry in os.scandir(sub_folder.path):
+                if not entry.name.endswith(".json"):
+                    continue
+                stat = entry.stat()
+                self.entries[entry.name[:-5]] = (stat.st_size,max(stat.st_atime,stat.st_mtime))
+                self.total_bytes += stat.st_size
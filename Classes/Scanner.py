@@ -0,0 +1,348 @@
+#Library scanning engine
+from Classes.LoggableClass import LoggableClass
+from Classes.LocalFile import Series, Season, Episode
+from Classes.Snapshot import DirectorySnapshot
+from Classes.IgnoreRules import IgnoreRules, IGNORE_FILENAME
+from typing import List, Dict, Tuple, Iterator
+import threading
+import queue
+import time
+import os
+
+class ScanStats:
+    """Counters for a single scan.  Safe to update from multiple threads."""
+    def __init__(self):
+        self.directories:int = 0
+        """Number of directories listed"""
+        self.files:int = 0
+        """Number of files seen"""
+        self.reused:int = 0
+        """Number of directories whose listing was reused from the previous snapshot"""
+        self.start_time:float = time.time()
+        self.end_time:float = None
+        self.lock:threading.Lock = threading.Lock()
+
+    def addListing(self,files:int) -> None:
+        """Record one listed directory, containing the given number of files"""
+        with self.lock:
+            self.directories += 1
+            self.files += files
+
+    def addReused(self,files:int) -> None:
+        """Record one directory reused from the snapshot, containing the given number of files"""
+        with self.lock:
+            self.reused += 1
+            self.files += files
+
+    def stop(self) -> None:
+        """Stop the scan timer"""
+        self.end_time = time.time()
+
+    def getElapsed(self) -> float:
+        """Returns the elapsed scan time in seconds"""
+        end_time:float = self.end_time if self.end_time is not None else time.time()
+        return max(end_time - self.start_time, 1e-9)
+
+    def getDirectoriesPerSecond(self) -> float:
+        """Returns the number of directories listed per second"""
+        return self.directories / self.getElapsed()
+
+    def getFilesPerSecond(self) -> float:
+        """Returns the number of files seen per second"""
+        return self.files / self.getElapsed()
+
+    def __str__(self):
+        return (f"{self.directories} directories listed, {self.reused} reused, {self.files} files in {self.getElapsed():.2f}s "
+                f"({self.getDirectoriesPerSecond():.1f} dirs/s, {self.getFilesPerSecond():.1f} files/s)")
+
+class Scanner(LoggableClass):
+    """Builds the Series/Season/Episode tree with os.scandir, scanning series folders concurrently.
+    Roots are grouped by the device they live on (st_dev), and each device gets its own worker limit."""
+    def __init__(self,
+                 ignore_rules:IgnoreRules,
+                 max_workers:int = 8,
+                 device_limits:Dict[str,int] = None,
+                 logging=True,
+                 logging_warnings=True,
+                 logging_errors=True):
+        #super init
+        self.prefix:str = "SCN"
+        self.prefix_warning:str = "SCN WRN"
+        self.prefix_error:str = "SCN ERR"
+        super().__init__(prefix=self.prefix,
+                         prefix_warning=self.prefix_warning,
+                         prefix_error=self.prefix_error,
+                         logging=logging,
+                         log_warning=logging_warnings,
+                         log_errors=logging_errors)
+        #ignore rules, plus the rules of every directory that has its own .ertignore file
+        self.ignore_rules:IgnoreRules = ignore_rules
+        self.directory_rules:Dict[str,IgnoreRules] = {}
+        #workers per device: max_workers unless a root on that device has its own limit
+        self.max_workers:int = max(1, int(max_workers))
+        self.device_limits:Dict[str,int] = {os.path.normpath(root):max(1,int(limit)) for root, limit in (device_limits or {}).items()}
+        """root directory -> number of workers for the device that root is on"""
+        #stats for the most recent scan
+        self.stats:ScanStats = ScanStats()
+        #snapshots: the one being reused, and the one being built by the current scan
+        self.previous_snapshot:DirectorySnapshot = None
+        self.snapshot:DirectorySnapshot = DirectorySnapshot()
+        #False while a scan is running, or if it was cancelled
+        self.completed:bool = False
+
+    def getStats(self) -> ScanStats:
+        """Returns the stats for the most recent scan"""
+        return self.stats
+
+    def getSnapshot(self) -> DirectorySnapshot:
+        """Returns the snapshot built by the most recent scan"""
+        return self.snapshot
+
+    def listDirectory(self,path:str) -> Tuple[List[str],List[str]]:
+        """Returns (folders, files) for the given directory, reusing the previous snapshot when the directory is unchanged.  Returns two empty lists on error."""
+        try:
+            stat:os.stat_result = os.stat(path)
+        except OSError as e:
+            self.logError(f"Error listing {path}: {e}")
+            return [], []
+        if self.previous_snapshot is not None:
+            cached = self.previous_snapshot.lookup(path,stat)
+            if cached is not None:
+                folders, files = cached
+                self.snapshot.store(path,stat,folders,files)
+                self.stats.addReused(len(files))
+                return folders, files
+        folders, files = self.scanDirectory(path)
+        #store the stat taken before listing, so a change made during the listing shows up next time
+        self.snapshot.store(path,stat,folders,files)
+        return folders, files
+
+    def loadDirectoryRules(self,path:str,files:List[str]) -> None:
+        """Loads the .ertignore file of a listed directory, if it has one.  Only directories listing that file cost a read."""
+        if IGNORE_FILENAME not in files:
+            self.directory_rules.pop(path,None)
+            return
+        parent_rules:IgnoreRules = self.getRules(os.path.dirname(path))
+        self.directory_rules[path] = parent_rules.extendFromFile(os.path.join(path,IGNORE_FILENAME))
+
+    def getRules(self,directory:str) -> IgnoreRules:
+        """Returns the rules that apply to entries of the given directory: the nearest .ertignore rules above it, or the base rules"""
+        while True:
+            rules:IgnoreRules = self.directory_rules.get(directory,None)
+            if rules is not None:
+                return rules
+            parent:str = os.path.dirname(directory)
+            if parent == directory:
+                return self.ignore_rules
+            directory = parent
+
+    def isIgnored(self,directory:str,name:str,is_directory:bool) -> bool:
+        """Returns True if the named entry of the given directory should be skipped"""
+        return self.getRules(directory).isIgnored(name,is_directory)
+
+    def scanDirectory(self,path:str) -> Tuple[List[str],List[str]]:
+        """Lists the given directory with one os.scandir call.  Returns (folders, files), or two empty lists on error."""
+        folders:List[str] = []
+        files:List[str] = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    #DirEntry caches the type from the directory read, so no extra stat is needed here
+                    try:
+                        if entry.is_dir():
+                            folders.append(entry.name)
+                        elif entry.is_file():
+                            files.append(entry.name)
+                    except OSError as e:
+                        self.logWarning(f"Could not determine type of {entry.path}: {e}")
+        except OSError as e:
+            self.logError(f"Error listing {path}: {e}")
+            return [], []
+        self.stats.addListing(len(files))
+        return folders, files
+
+    def scan(self,root_directories:List[str],previous_snapshot:DirectorySnapshot = None) -> List[Series]:
+        """Scans the root directories and returns a list of 'Series' objects, in root then directory listing order.
+        Directories unchanged since the previous snapshot are not listed again."""
+        return list(self.iterScan(root_directories,previous_snapshot=previous_snapshot,ordered=True))
+
+    def iterScan(self,
+                 root_directories:List[str],
+                 previous_snapshot:DirectorySnapshot = None,
+                 max_buffer:int = 16,
+                 cancel_event:threading.Event = None,
+                 ordered:bool = False) -> Iterator[Series]:
+        """Scans the root directories and yields each 'Series' as soon as all of its seasons are scanned.
+        At most max_buffer finished series wait for the caller before the workers pause.  Setting cancel_event,
+        or closing the generator, stops the workers.  With ordered=True series are yielded in root then directory listing order."""
+        if isinstance(root_directories,str):
+            root_directories = [root_directories]
+        root_directories = [os.path.normpath(root_directory) for root_directory in root_directories]
+        self.stats = ScanStats()
+        self.previous_snapshot = previous_snapshot
+        self.snapshot = DirectorySnapshot(created=self.stats.start_time)
+        self.directory_rules = {}
+        self.completed = False
+        #internal stop signal for the workers, so the caller's event is never set by us
+        stop_event:threading.Event = threading.Event()
+        #folders waiting to be scanned, one queue per device
+        device_queues:Dict[int,queue.Queue] = {}
+        device_workers:Dict[int,int] = {}
+        total:int = 0
+        for root_directory in root_directories:
+            try:
+                device:int = os.stat(root_directory).st_dev
+            except OSError as e:
+                self.logError(f"Error reading root directory {root_directory}: {e}")
+                continue
+            if device not in device_queues:
+                device_queues[device] = queue.Queue()
+                device_workers[device] = 0
+            device_workers[device] = max(device_workers[device],self.device_limits.get(root_directory,0))
+            for series_folder in self.getSeriesFolders(root_directory):
+                device_queues[device].put((total,root_directory,series_folder))
+                total += 1
+        if total == 0:
+            self.stats.stop()
+            self.completed = True
+            return
+        #finished (index, series) results waiting for the caller
+        results:queue.Queue = queue.Queue(maxsize=max(1,max_buffer))
+        workers:List[threading.Thread] = []
+        for device, pending in device_queues.items():
+            worker_count:int = device_workers[device] or self.max_workers
+            for i in range(min(worker_count,pending.qsize())):
+                worker:threading.Thread = threading.Thread(target=self.__scanWorker,
+                                                           args=(pending,results,stop_event),
+                                                           name=f"scanner-{device}-{i}",
+                                                           daemon=True)
+                worker.start()
+                workers.append(worker)
+        #hand results to the caller
+        received:int = 0
+        next_index:int = 0
+        held:Dict[int,Series] = {}
+        try:
+            while received < total:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                try:
+                    index, series_data = results.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                received += 1
+                if not ordered:
+                    if series_data is not None:
+                        yield series_data
+                    continue
+                #ordered: hold results until every earlier folder has been yielded
+                held[index] = series_data
+                while next_index in held:
+                    series_data = held.pop(next_index)
+                    next_index += 1
+                    if series_data is not None:
+                        yield series_data
+            self.completed = received == total
+        finally:
+            stop_event.set()
+            for worker in workers:
+                worker.join()
+            self.stats.stop()
+            roots:str = ", ".join(root_directories)
+            if self.completed:
+                self.log(f"Scanned {roots} ({len(device_queues)} devices): {self.stats}")
+            else:
+                self.logWarning(f"Scan of {roots} cancelled after {received}/{total} series: {self.stats}")
+
+    def isCompleted(self) -> bool:
+        """Returns True if the most recent scan finished without being cancelled"""
+        return self.completed
+
+    def getSeriesFolders(self,root_directory:str) -> List[str]:
+        """Returns the series folders in the root directory that are not skipped"""
+        series_directories, files = self.listDirectory(root_directory)
+        if len(series_directories) == 0:
+            self.logError(f"No series directories found in {root_directory}")
+            return []
+        self.loadDirectoryRules(root_directory,files)
+        rules:IgnoreRules = self.getRules(root_directory)
+        series_folders:List[str] = []
+        for series_folder in series_directories:
+            #ignored folders are pruned here, before they are ever listed
+            if rules.isIgnored(series_folder,True):
+                self.log(f"Skipping {series_folder}")
+                continue
+            series_folders.append(series_folder)
+        return series_folders
+
+    def __scanWorker(self,pending:queue.Queue,results:queue.Queue,stop_event:threading.Event) -> None:
+        """Worker thread: scans series folders from its device's pending queue and puts (index, series) on results until stopped or done"""
+        while not stop_event.is_set():
+            try:
+                index, root_directory, series_folder = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                series_data:Series = self.scanSeries(root_directory,series_folder)
+            except Exception as e:
+                self.logError(f"Error scanning {series_folder}: {e}")
+                series_data = None
+            #wait for room in the buffer, giving up if the scan is stopped
+            while not stop_event.is_set():
+                try:
+                    results.put((index,series_data),timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def scanSeries(self,root_directory:str,series_folder:str) -> Series or None:
+        """Scans a single series folder.  Returns the 'Series' object, or None if it has no seasons."""
+        series_path:str = os.path.join(root_directory,series_folder)
+        series_data:Series = Series(series_folder)
+        series_data.filepath = series_path
+        #get all season directories
+        season_directories, files = self.listDirectory(series_path)
+        if len(season_directories) == 0:
+            self.logError(f"No season directories found in {series_folder}")
+            return None
+        self.loadDirectoryRules(series_path,files)
+        rules:IgnoreRules = self.getRules(series_path)
+        #------------------------------------------------- SEASONS -------------------------------------------------
+        for season_folder in season_directories:
+            if rules.isIgnored(season_folder,True):
+                self.log(f"Skipping {season_folder} in {series_folder}")
+                continue
+            season_data:Season = self.scanSeason(series_data,season_folder)
+            if season_data is None:
+                continue
+            series_data.seasons.append(season_data)
+        return series_data
+
+    def scanSeason(self,series_data:Series,season_folder:str) -> Season or None:
+        """Scans a single season folder of the given series.  Returns the 'Season' object, or None if it has no episode files."""
+        season_data:Season = Season(season_folder,parent=series_data)
+        season_path:str = season_data.filepath
+        #get all episode files
+        _, episode_files = self.listDirectory(season_path)
+        if len(episode_files) == 0:
+            self.logError(f"No episode files found in {season_folder}")
+            return None
+        self.loadDirectoryRules(season_path,episode_files)
+        rules:IgnoreRules = self.getRules(season_path)
+        #------------------------------------------------- EPISODES -------------------------------------------------
+        for episode_file in episode_files:
+            if rules.isIgnored(episode_file,False):
+                self.log(f"Skipping {episode_file} in {season_folder}")
+                continue
+            episode_data:Episode = self.buildEpisode(season_data,episode_file)
+            if episode_data is None:
+                continue
+            season_data.addEpisode(episode_data)
+        return season_data
+
+    def buildEpisode(self,season_data:Season,episode_file:str) -> Episode or None:
+        """Builds an 'Episode' object for the given file.  Returns None if the name has no extension."""
+        if not episode_file.__contains__("."):
+            self.logError(f"Error splitting name and extension from {episode_file}")
+            return None
+        return Episode(episode_file,parent=season_data)
@@ -0,0 +1,154 @@
+#In-process LRU of cached series, in front of the database
+from Classes.Database import EpisodeRecord
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, List, Set, Tuple, Mapping, NamedTuple
+import threading
+
+SERIES_FIELDS:Tuple[str,...] = ('number_of_episodes','series_name','series_original_name','series_overview','series_poster_path',
+                                'series_id','number_of_seasons','search_string')
+"""EpisodeRecord fields that are the same for every episode of a series"""
+
+class SeriesRecord(NamedTuple):
+    """Immutable, compact copy of a cached series: its episodes share one copy of the series fields, and are indexed by (season, episode)"""
+    series_id:int
+    series_name:str
+    rows:Tuple[EpisodeRecord,...]
+    """Episodes ordered by season and episode number"""
+    episodes:Mapping[Tuple[int,int],EpisodeRecord]
+    """(season number, episode number) -> episode (read only)"""
+
+    @staticmethod
+    def fromRows(rows:List[EpisodeRecord]) -> "SeriesRecord":
+        """Builds the record from the database rows of one series (at least one)"""
+        shared:Dict[str,object] = {name:getattr(rows[0],name) for name in SERIES_FIELDS}
+        compact:Tuple[EpisodeRecord,...] = tuple(row._replace(**shared) for row in rows)
+        return SeriesRecord(series_id=rows[0].series_id,
+                            series_name=rows[0].series_name,
+                            rows=compact,
+                            episodes=MappingProxyType({(row.season_number,row.episode_number):row for row in compact}))
+
+    def getEpisodeName(self,season_number:int,episode_number:int) -> str or None:
+        """Returns the title of an episode, or None if the series has no such episode"""
+        episode:EpisodeRecord = self.episodes.get((season_number,episode_number),None)
+        return episode.episode_name if episode is not None else None
+
+class SeriesCache:
+    """LRU of SeriesRecords keyed by TMDB series id, bounded by the total number of episodes held.  Safe to share between threads.
+    A fill that started before the series was invalidated is dropped, so a slow reader can't put back data a writer replaced:
+    read getVersion() before reading the database, and pass it to put().  The name keys looked up for a cached series can
+    be added with addName(), and are dropped with its record, so getByName() stays as bounded as the records."""
+    def __init__(self,max_episodes:int = 100000):
+        self.max_episodes:int = max_episodes
+        self.lock:threading.Lock = threading.Lock()
+        self.records:"OrderedDict[int,SeriesRecord]" = OrderedDict()
+        self.versions:Dict[int,int] = {}
+        self.names:Dict[str,int] = {}
+        """Name key -> series id, only for series in records"""
+        self.series_names:Dict[int,Set[str]] = {}
+        """Series id -> its name keys in names"""
+        self.episode_count:int = 0
+        self.hits:int = 0
+        self.misses:int = 0
+        self.evictions:int = 0
+        """Records dropped to stay under max_episodes"""
+        self.invalidations:int = 0
+        """Records dropped because their series was written"""
+
+    def get(self,series_id:int) -> SeriesRecord or None:
+        """Returns the record of a series and marks it recently used, or None if it is not cached"""
+        with self.lock:
+            record:SeriesRecord = self.records.get(series_id,None)
+            if record is None:
+                self.misses += 1
+                return None
+            self.records.move_to_end(series_id)
+            self.hits += 1
+            return record
+
+    def getByName(self,key:str) -> SeriesRecord or None:
+        """Returns the record a name key was added for (see addName) and marks it recently used, or None.  Only counts hits:
+        a miss is looked up by id next."""
+        with self.lock:
+            series_id:int = self.names.get(key,None)
+            if series_id is None:
+                return None
+            self.records.move_to_end(series_id)
+            self.hits += 1
+            return self.records[series_id]
+
+    def addName(self,key:str,series_id:int) -> bool:
+        """Points a name key at a cached series, replacing where it pointed before.  Returns False if the series is not cached."""
+        with self.lock:
+            if series_id not in self.records:
+                return False
+            previous:int = self.names.get(key,None)
+            if previous is not None and previous != series_id:
+                self.series_names[previous].discard(key)
+            self.names[key] = series_id
+            self.series_names.setdefault(series_id,set()).add(key)
+            return True
+
+    def getVersion(self,series_id:int) -> int:
+        """Returns the number of times a series was invalidated"""
+        with self.lock:
+            return self.versions.get(series_id,0)
+
+    def put(self,record:SeriesRecord,version:int) -> bool:
+        """Caches a record read at version (see getVersion), evicting the least recently used ones to make room.
+        Returns False if the series was invalidated since, or is too big to cache."""
+        size:int = len(record.rows)
+        with self.lock:
+            if self.versions.get(record.series_id,0) != version or size > self.max_episodes:
+                return False
+            previous:SeriesRecord = self.records.pop(record.series_id,None)
+            if previous is not None:
+                self.episode_count -= len(previous.rows)
+            while self.records and self.episode_count + size > self.max_episodes:
+                evicted_id, evicted = self.records.popitem(last=False)
+                self.episode_count -= len(evicted.rows)
+                self.__dropNames(evicted_id)
+                self.evictions += 1
+            self.records[record.series_id] = record
+            self.episode_count += size
+            return True
+
+    def invalidate(self,series_id:int) -> None:
+        """Drops the record of a series that was written, and any fill of it still in progress"""
+        with self.lock:
+            self.versions[series_id] = self.versions.get(series_id,0) + 1
+            record:SeriesRecord = self.records.pop(series_id,None)
+            if record is not None:
+                self.episode_count -= len(record.rows)
+                self.__dropNames(series_id)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drops every record"""
+        with self.lock:
+            for series_id in self.records:
+                self.versions[series_id] = self.versions.get(series_id,0) + 1
+            self.records.clear()
+            self.names.clear()
+            self.series_names.clear()
+            self.episode_count = 0
+
+    def getHitRate(self) -> float:
+        total:int = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def getStats(self) -> Dict[str,int]:
+        """Returns the hit/miss/eviction counters and the current size"""
+        with self.lock:
+            return {'hits':self.hits,'misses':self.misses,'evictions':self.evictions,'invalidations':self.invalidations,
+                    'series':len(self.records),'episodes':self.episode_count,'names':len(self.names)}
+
+    def __str__(self) -> str:
+        stats:Dict[str,int] = self.getStats()
+        return (f"{stats['series']} series ({stats['episodes']} episodes), {stats['hits']} hits, {stats['misses']} misses "
+                f"({self.getHitRate()*100:.1f}% hit rate), {stats['evictions']} evictions, {stats['invalidations']} invalidations")
+
+    def __dropNames(self,series_id:int) -> None:
+        """Drops the name keys of a series whose record left the cache.  Call while holding the lock."""
+        for key in self.series_names.pop(series_id,()):
+            del self.names[key]
@@ -0,0 +1,37 @@
+#Coalesces concurrent calls for the same key into one
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Any
+import threading
+
+class SingleFlight:
+    """Runs at most one call per key at a time.  Callers that ask for a key while its call is running wait for
+    that call and share its result (or exception) instead of repeating the work.  Safe to share between threads."""
+    def __init__(self):
+        self.lock:threading.Lock = threading.Lock()
+        self.in_flight:Dict[Hashable,Future] = {}
+        self.calls:int = 0
+        """Calls that ran"""
+        self.shared:int = 0
+        """Calls that waited for another caller's result"""
+
+    def do(self,key:Hashable,function:Callable[[],Any]) -> Any:
+        """Returns function(), or the result of the call already running for key"""
+        with self.lock:
+            future:Future = self.in_flight.get(key,None)
+            leader:bool = future is None
+            if leader:
+                future = Future()
+                self.in_flight[key] = future
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+        try:
+            future.set_result(function())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+        return future.result()
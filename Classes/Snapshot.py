@@ -0,0 +1,53 @@
+#Directory snapshot used for incremental rescans
+from typing import List, Dict, Tuple
+import threading
+import time
+import os
+
+class DirectorySnapshot:
+    """Listing of every scanned directory, keyed by path, along with the mtime, inode and size it had when listed.
+    A directory whose stat still matches can reuse its stored listing instead of being listed again."""
+    VERSION:int = 1
+    RACY_SECONDS:float = 2.0
+    """Directories modified this close to the snapshot time are always re-listed (coarse mtime resolution on network shares)"""
+
+    def __init__(self,records:Dict[str,tuple] = None,created:float = None):
+        self.records:Dict[str,tuple] = records if records is not None else {}
+        """path -> (mtime_ns, inode, size, folders, files)"""
+        self.created:float = created if created is not None else time.time()
+        """Time the scan that built this snapshot started"""
+        self.lock:threading.Lock = threading.Lock()
+
+    @staticmethod
+    def fromData(data:dict) -> "DirectorySnapshot" or None:
+        """Builds a snapshot from the data returned by toData().  Returns None if the data is missing or from another version."""
+        if not isinstance(data,dict) or data.get('version',None) != DirectorySnapshot.VERSION:
+            return None
+        return DirectorySnapshot(records=data.get('records',{}),created=data.get('created',0.0))
+
+    def toData(self) -> dict:
+        """Returns plain picklable data for this snapshot"""
+        with self.lock:
+            return {'version':self.VERSION,'created':self.created,'records':dict(self.records)}
+
+    def lookup(self,path:str,stat:os.stat_result) -> Tuple[List[str],List[str]] or None:
+        """Returns the stored (folders, files) for the path if its stat is unchanged, or None if it must be listed again"""
+        record:tuple = self.records.get(path,None)
+        if record is None:
+            return None
+        mtime_ns, inode, size, folders, files = record
+        if mtime_ns != stat.st_mtime_ns or inode != stat.st_ino or size != stat.st_size:
+            return None
+        #a change in the same mtime tick as the previous scan would not move the mtime, so don't trust it
+        if mtime_ns / 1e9 >= self.created - self.RACY_SECONDS:
+            return None
+        return list(folders), list(files)
+
+    def store(self,path:str,stat:os.stat_result,folders:List[str],files:List[str]) -> None:
+        """Stores the listing for the path"""
+        record:tuple = (stat.st_mtime_ns, stat.st_ino, stat.st_size, tuple(folders), tuple(files))
+        with self.lock:
+            self.records[path] = record
+
+    def __len__(self):
+        return len(self.records)
@@ -1,68 +1,231 @@
 import requests
+from requests.adapters import HTTPAdapter
 from Classes.LoggableClass import LoggableClass
 from Classes.Filesystem import Filesystem
-from typing import List, Dict
+from typing import List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote
+import threading
+import datetime
+import asyncio
+import random
+import time
 import os
 import json
 #Database
-from Classes.Database import Database, TMDB
+from Classes.Database import Database, EpisodeRecord, NegativeResult, FuzzyMatch
 #filter
 from Classes.Filters import Filter
+#rate limiting
+from Classes.RateLimiter import RateLimiter
+#response cache
+from Classes.ResponseCache import ResponseCache, CacheEntry
+#request coalescing
+from Classes.SingleFlight import SingleFlight
+#fuzzy name matching
+from Classes.NameParser import normaliseSeriesName, splitSeriesQualifier
+#in-process series cache
+from Classes.SeriesCache import SeriesCache, SeriesRecord
 
+REFRESH_SYNC_KEY:str = "tv_changes_last_sync"
+"""sync_state key holding the end of the last refresh (ISO date)"""
+CHANGES_MAX_DAYS:int = 14
+"""Longest date range TMDB's changes endpoints accept"""
+#why a lookup failed (API.getLastFailure), and how long each reason is remembered in the negative cache
+FAILURE_NO_RESULTS:str = "no results"
+FAILURE_API_ERROR:str = "api error"
+FAILURE_RATE_LIMITED:str = "rate limited"
+FAILURE_OFFLINE:str = "offline"
+NEGATIVE_TTLS:Dict[str,float] = {
+    FAILURE_NO_RESULTS:30*24*60*60,
+    FAILURE_API_ERROR:24*60*60,
+    FAILURE_RATE_LIMITED:60*60
+}
+"""Seconds a failed search is not retried, by reason.  Reasons missing here (offline) are not remembered."""
+FUZZY_THRESHOLD:float = 0.92
+"""Lowest Database.findSeriesFuzzy score a folder name is resolved to a cached series with, instead of searching TMDB"""
 
 class TMDBManager(LoggableClass):
     """Class for getting data from the TMDB API and the database"""
-    def __init__(self,database:Database,api_key:str):
+    def __init__(self,database:Database,api_key:str,api:"API" = None,negative_ttls:Dict[str,float] = None,cache_episodes:int = 100000,
+                 fuzzy_threshold:float = FUZZY_THRESHOLD):
         #super init
         super().__init__(prefix="TMDB",prefix_error="TMDB ERR",prefix_warning="TMDB WRN")
         #database
         self.database:Database = database
-        #api
+        #api (pass a configured API to change timeouts, retries etc.)
         self.api_key:str = api_key
-        self.api:API = API(api_key=self.api_key)
+        self.api:API = api if api is not None else API(api_key=self.api_key)
         #filter
         self.filter:Filter = Filter()
         #error tracking
         self.error_series_list:List[str] = []
+        #concurrent lookups of the same name, or of names that resolve to the same TMDB id, share one fetch
+        self.name_flights:SingleFlight = SingleFlight()
+        self.id_flights:SingleFlight = SingleFlight()
+        #names TMDB could not match are not searched again until their entry expires
+        self.negative_ttls:Dict[str,float] = NEGATIVE_TTLS if negative_ttls is None else negative_ttls
+        self.negative_hits:int = 0
+        #hit counters are updated from getManySeries' threads (see addCount)
+        self.counter_lock:threading.Lock = threading.Lock()
+        #lookups answered by the alias table, and by the fuzzy name index (names within fuzzy_threshold of a cached one; above 1 turns it off)
+        self.alias_hits:int = 0
+        self.fuzzy_threshold:float = fuzzy_threshold
+        self.fuzzy_hits:int = 0
+        #series read recently, up to cache_episodes episodes, with the name keys they were looked up by
+        self.series_cache:SeriesCache = SeriesCache(max_episodes=cache_episodes)
 
-    def getSeries(self,series_name:str) -> List[TMDB]:
-        """Get the series data for the given series name"""
+    def getSeries(self,series_name:str) -> List[EpisodeRecord]:
+        """Get the series data for the given series name.  Safe to call from many threads: callers asking for the same
+        series at the same time wait for one database/API lookup and share its rows.  Series looked up recently come from
+        series_cache without touching the database."""
         #filter the series_name
         series_name:str = self.filter.seriesName(series_name)
-        #check if the series is already in the database
-        session = self.database.getSession()
-        #see if the series_name is a search_string in the database
-        series_list:List[TMDB] = session.query(TMDB).filter(TMDB.search_string == series_name).all()
-        #if the series_name is not a search_string, see if it is a series_name
-        if not series_list:
-            series_list:List[TMDB] = session.query(TMDB).filter(TMDB.series_name == series_name).all()
-            #update the search_string if this yields results
-            if series_list:
-                for series in series_list:
-                    series.search_string = series_name
-                    self.logWarning(f"getSeries(): Updating search_string for '{series_name}' to '{series_name}'")
-                session.commit()
-        session.close()
-        #if the series is not in the database, get the data from the API
-        if not series_list:
-            series_data:dict = self.api.getSeriesData(series_name)
-            if not series_data:
-                self.logError(f"getSeries(): No series data for '{series_name}'")
-                return []
-            #add the series to the database
-            if not self.addSeriesToDatabase(series_data,series_name):
-                self.logError(f"getSeries(): Could not add API results for series '{series_name}' to database")
+        return self.name_flights.do(self.getSeriesKey(series_name),lambda: self.__lookupSeries(series_name))
+
+    def getSeriesKey(self,series_name:str) -> str:
+        """Returns the key concurrent lookups are coalesced on: the filtered name, lowercased, with single spaces"""
+        return " ".join(series_name.lower().split())
+
+    def getManySeries(self,series_names:List[str]) -> Dict[str,List[EpisodeRecord]]:
+        """Get the series data for many series names at once.  The names are looked up on parallel threads
+        (API.max_concurrency of them); seasons of each series are fetched concurrently too.  Returns the rows keyed by the given series names."""
+        unique_names:List[str] = list(dict.fromkeys(series_names))
+        with ThreadPoolExecutor(max_workers=min(self.api.max_concurrency,max(1,len(unique_names))),thread_name_prefix="tmdb-lookup") as executor:
+            return dict(zip(unique_names,executor.map(self.getSeries,unique_names)))
+
+    def __lookupSeries(self,series_name:str) -> List[EpisodeRecord]:
+        """Database, then API lookup for the (filtered) series name.  Run once per name at a time by getSeries."""
+        series_list:List[EpisodeRecord] = self.__findInDatabase(series_name)
+        if series_list:
+            return series_list
+        #skip names that recently failed
+        key:str = self.getSeriesKey(series_name)
+        negative:NegativeResult = self.database.getNegativeResult(key)
+        if negative is not None:
+            self.addCount('negative_hits')
+            self.error_series_list.append(f"{series_name}: Not found on TMDB ({negative.reason}, cached until {negative.expires_at:%Y-%m-%d %H:%M})")
+            return []
+        #if the series is not in the database, search the API for its id
+        step_one_data:dict = self.api.searchSeries(series_name)
+        if not step_one_data:
+            reason:str = self.api.getLastFailure() or FAILURE_API_ERROR
+            self.logError(f"getSeries(): No series data for '{series_name}' ({reason})")
+            self.error_series_list.append(f"{series_name}: Could not get series data from database, or TMDB API")
+            if reason in self.negative_ttls:
+                self.database.addNegativeResult(key,series_name,reason,self.negative_ttls[reason])
+            return []
+        #different spellings can find the same show, so only one of them fetches and stores it
+        series_list:List[EpisodeRecord] = self.id_flights.do(step_one_data['id'],lambda: self.__fetchSeries(series_name,step_one_data))
+        if series_list:
+            #the next lookup of this spelling is one alias lookup
+            self.database.addAlias(key,series_name,step_one_data['id'])
+            self.series_cache.addName(key,step_one_data['id'])
+        return series_list
+
+    def addCount(self,name:str,count:int = 1) -> None:
+        """Adds to one of the hit counters (negative_hits, alias_hits, fuzzy_hits).  Safe to call from multiple threads."""
+        with self.counter_lock:
+            setattr(self,name,getattr(self,name) + count)
+
+    def __fetchSeries(self,series_name:str,step_one_data:dict) -> List[EpisodeRecord]:
+        """Gets the rows for a TMDB id found by searching for series_name, fetching and storing the series if it is not in the database yet"""
+        series_list:List[EpisodeRecord] = self.__getSeriesRows(step_one_data['id'])
+        if series_list:
+            return series_list
+        series_data:dict = self.api.getSeriesDetails(step_one_data)
+        return self.__storeSeriesData(series_name,series_data)
+
+    def __findInDatabase(self,series_name:str) -> List[EpisodeRecord]:
+        """Returns the database rows for the (filtered) series name, or an empty list"""
+        key:str = self.getSeriesKey(series_name)
+        #any spelling looked up before is an alias of its series (recent ones are kept with the cached series)
+        record:SeriesRecord = self.series_cache.getByName(key)
+        if record is not None:
+            self.addCount('alias_hits')
+            return list(record.rows)
+        series_id:int = self.database.getAliasSeriesId(key)
+        if series_id is not None:
+            self.addCount('alias_hits')
+            return self.__getSeriesRows(series_id,key)
+        #see if the series_name is the search_string a series was stored under (before aliases), or a series_name
+        series_id = self.database.getSeriesIdBySearchString(series_name)
+        if series_id is None:
+            series_id = self.database.getSeriesIdByName(series_name)
+        if series_id is None:
+            #near spellings of a cached name ('Law & Order', 'Mr.Robot') resolve without searching TMDB, but a year or
+            #country qualifier must be the same on both: 'The Office (US)' is not 'The Office (UK)', or a 'The Office' of either
+            matches:List[FuzzyMatch] = self.resolveSeries(series_name,limit=1,filtered=True)
+            if not matches or matches[0].score < self.fuzzy_threshold or \
+               splitSeriesQualifier(matches[0].name)[1] != splitSeriesQualifier(normaliseSeriesName(series_name))[1]:
                 return []
-            #get the series from the database
-            session = self.database.getSession()
-            series_list:List[TMDB] = session.query(TMDB).filter(TMDB.series_name == series_name).all()
-            session.close()
+            series_id = matches[0].series_id
+            self.addCount('fuzzy_hits')
+            self.log(f"getSeries(): '{series_name}' resolved to cached series {series_id} ('{matches[0].name}', score {matches[0].score:.2f})")
+        self.database.addAlias(key,series_name,series_id)
+        return self.__getSeriesRows(series_id,key)
+
+    def resolveSeries(self,series_name:str,limit:int = 5,filtered:bool = False) -> List[FuzzyMatch]:
+        """Ranks the cached series whose names or aliases resemble a folder name, best first, with a 0-1 score.  Only reads the local cache."""
+        if not filtered:
+            series_name = self.filter.seriesName(series_name)
+        return self.database.findSeriesFuzzy(series_name,limit=limit)
+
+    def __getSeriesRows(self,series_id:int,key:str = None) -> List[EpisodeRecord]:
+        """Returns the rows of a cached series from the series cache, reading them from the database on a miss.
+        A name key given is added to the series cache, so the next lookup by that name skips the alias table."""
+        record:SeriesRecord = self.getSeriesRecord(series_id)
+        if record is None:
+            return []
+        if key is not None:
+            self.series_cache.addName(key,series_id)
+        return list(record.rows)
+
+    def getSeriesRecord(self,series_id:int) -> SeriesRecord or None:
+        """Returns the immutable record (episodes keyed by (season, episode)) of a series in the database, or None.
+        Served from the in-process LRU when possible."""
+        record:SeriesRecord = self.series_cache.get(series_id)
+        if record is not None:
+            return record
+        version:int = self.series_cache.getVersion(series_id)
+        rows:List[EpisodeRecord] = self.database.getSeriesRows(series_id)
+        if not rows:
+            return None
+        record = SeriesRecord.fromRows(rows)
+        self.series_cache.put(record,version)
+        return record
+
+    def __storeSeriesData(self,series_name:str,series_data:dict) -> List[EpisodeRecord]:
+        """Adds API data for the (filtered) series name to the database and returns its rows, or an empty list"""
+        if not series_data:
+            self.logError(f"getSeries(): No series data for '{series_name}'")
+            return []
+        #add the series to the database
+        if not self.addSeriesToDatabase(series_data,series_name):
+            self.logError(f"getSeries(): Could not add API results for series '{series_name}' to database")
+            return []
+        #get the series from the database
+        series_list:List[EpisodeRecord] = self.__getSeriesRows(series_data['id'])
         if not series_list:
             self.logError(f"Could not get series data for {series_name} from database, or TMDB API")
             self.error_series_list.append(f"{series_name}: Could not get series data from database, or TMDB API")
             return []
         return series_list
     
+    def indexSeries(self,series_list:List[EpisodeRecord]) -> Dict[Tuple[int,int],EpisodeRecord]:
+        """Returns the rows of a series keyed by (season_number, episode_number), so local episodes match with one lookup"""
+        return {(row.season_number,row.episode_number):row for row in series_list}
+
+    def getNegativeResults(self) -> List[NegativeResult]:
+        """Returns the unexpired negative cache entries (series names TMDB could not match, and why)"""
+        return self.database.getNegativeResults()
+
+    def clearNegativeResults(self,series_name:str = None) -> int:
+        """Forgets the negative cache entry for one series name, or every entry.  Returns the number removed."""
+        key:str = self.getSeriesKey(self.filter.seriesName(series_name)) if series_name is not None else None
+        return self.database.clearNegativeResults(key)
+
     def getErrors(self) -> List[str]:
         errors:List[str] = []
         #add series errors
@@ -72,56 +235,208 @@ class TMDBManager(LoggableClass):
         return errors
 
     def addSeriesToDatabase(self,series_data:dict,search_string:str) -> bool:
-        """Add the json data for the given series to the database"""
-        add_count:int = 0
-        total_items:int = 0
-        for season in series_data['seasons']:
-            for episode in season['episodes']:
-                total_items += 1
-                #generate a unique database ID [db_id]
-                #series_id + season_id + episode_id
-                db_id:str = f"{series_data['id']}-{season['id']}-{episode['id']}"
-                #check if the series is already in the database
-                session = self.database.getSession()
-                tmdb:TMDB = session.query(TMDB).filter(TMDB.db_id == db_id).first()
-                session.close()
-                if tmdb:
-                    self.logWarning(f"addSeriesToDatabase(): Series '{series_data['name']}' is already in the database")
-                    continue
-                #add the series to the database
-                try:
-                    self.database.createTMDB(
-                        db_id=db_id,
-                        episode_name=episode['name'],
-                        episode_id=episode['id'],
-                        episode_number=episode['episode_number'],
-                        episode_overview=episode['overview'],
-                        episode_still_path=episode['still_path'],
-                        season_number=season['season_number'],
-                        season_id=season['id'],
-                        number_of_episodes=series_data['number_of_episodes'],
-                        series_name=series_data['name'],
-                        series_original_name=series_data['original_name'],
-                        series_overview=series_data['overview'],
-                        series_poster_path=series_data['poster_path'],
-                        series_id=series_data['id'],
-                        number_of_seasons=series_data['number_of_seasons'],
-                        search_string=search_string
-                    )
-                    add_count += 1
-                except Exception as e:
-                    self.logError(f"addSeriesToDatabase(): Error adding series '{series_data['name']}' to database: {e}")
-                    continue
+        """Add the json data for the given series to the database, in one transaction.  Episodes already in the database are updated."""
+        rows:List[Dict[str,object]] = self.buildRows(series_data,search_string)
+        if not rows:
+            self.logError(f"addSeriesToDatabase(): No episodes to add for series '{series_data.get('name',None)}'")
+            return False
+        add_count:int = self.database.upsertTMDBRows(rows)
+        self.series_cache.invalidate(series_data['id'])
         if add_count == 0:
             self.logError(f"addSeriesToDatabase(): No series added to database")
             return False
-        self.log(f"addSeriesToDatabase(): Added {add_count}/{total_items} items to database.")
+        self.log(f"addSeriesToDatabase(): Added {add_count}/{len(rows)} items to database.")
         return True
 
+    def buildRows(self,series_data:dict,search_string:str) -> List[Dict[str,object]]:
+        """Returns one dict of EpisodeRecord values per episode in the series data (see Database.upsertTMDBRows)"""
+        rows:List[Dict[str,object]] = []
+        for season in series_data['seasons']:
+            for episode in season['episodes']:
+                rows.append({
+                    #generate a unique database ID [db_id]
+                    #series_id + season_number + episode_number (the episode table is unique on these)
+                    'db_id':f"{series_data['id']}-{season['season_number']}-{episode['episode_number']}",
+                    'episode_name':episode['name'],
+                    'episode_id':episode['id'],
+                    'episode_number':episode['episode_number'],
+                    'episode_overview':episode['overview'],
+                    'episode_still_path':episode['still_path'],
+                    'season_number':season['season_number'],
+                    'season_id':season['id'],
+                    'number_of_episodes':series_data['number_of_episodes'],
+                    'series_name':series_data['name'],
+                    'series_original_name':series_data['original_name'],
+                    'series_overview':series_data['overview'],
+                    'series_poster_path':series_data['poster_path'],
+                    'series_id':series_data['id'],
+                    'number_of_seasons':series_data['number_of_seasons'],
+                    'search_string':search_string
+                })
+        return rows
+
+    def refreshChangedSeries(self) -> Dict[int,List[int]]:
+        """Brings cached series up to date with TMDB's changes feed.  Asks /tv/changes which series changed since the
+        last refresh, and re-fetches only the changed seasons of the ones in the database (plus any new seasons; the
+        latest season if the change names none).  The refresh time is saved once every changed series is updated.
+        Returns the refreshed season numbers keyed by series id."""
+        now:datetime.datetime = datetime.datetime.utcnow()
+        last_sync:datetime.datetime = self.getLastRefresh()
+        if last_sync is None:
+            #never refreshed: everything cached since the oldest series could be out of date
+            last_sync = self.database.getOldestSeriesUpdate()
+            if last_sync is None:
+                self.database.setSyncValue(REFRESH_SYNC_KEY,now.date().isoformat())
+                return {}
+        windows:List[Tuple[str,str]] = []
+        start:datetime.datetime = max(last_sync,now - datetime.timedelta(days=365))
+        while True:
+            end:datetime.datetime = min(start + datetime.timedelta(days=CHANGES_MAX_DAYS),now)
+            windows.append((start.date().isoformat(),end.date().isoformat()))
+            if end >= now:
+                break
+            start = end
+        changed_ids:set = set()
+        for start_date, end_date in windows:
+            series_ids:List[int] = self.api.getChangedSeriesIds(start_date,end_date)
+            if series_ids is None:
+                self.logError(f"refreshChangedSeries(): Could not read the changes feed for {start_date} to {end_date}")
+                return {}
+            changed_ids.update(series_ids)
+        #latest cached season of each series that changed
+        cached:Dict[int,int] = self.database.getLatestSeasons()
+        to_refresh:List[int] = sorted(changed_ids & cached.keys())
+        self.log(f"refreshChangedSeries(): {len(changed_ids)} series changed since {windows[0][0]}, {len(to_refresh)} of them cached")
+        refreshed:Dict[int,List[int]] = {}
+        failed:int = 0
+        with ThreadPoolExecutor(max_workers=min(self.api.max_concurrency,max(1,len(to_refresh))),thread_name_prefix="tmdb-refresh") as executor:
+            #a refresh and a first fetch of the same id never run at once
+            refresh = lambda series_id: self.id_flights.do(series_id,lambda: self.__refreshSeries(series_id,cached[series_id],windows))
+            for series_id, season_numbers in zip(to_refresh,executor.map(refresh,to_refresh)):
+                if season_numbers is None:
+                    failed += 1
+                else:
+                    refreshed[series_id] = season_numbers
+        if failed:
+            self.logError(f"refreshChangedSeries(): {failed} series could not be refreshed, they will be retried next time")
+        else:
+            self.database.setSyncValue(REFRESH_SYNC_KEY,now.date().isoformat())
+        return refreshed
+
+    def getLastRefresh(self) -> datetime.datetime or None:
+        """Returns the time of the last completed refreshChangedSeries, or None if it never ran"""
+        value:str = self.database.getSyncValue(REFRESH_SYNC_KEY)
+        if not value:
+            return None
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return None
+
+    def __refreshSeries(self,series_id:int,latest_season:int,windows:List[Tuple[str,str]]) -> List[int] or None:
+        """Re-fetches and upserts the changed seasons of one cached series.  Returns the refreshed season numbers, or None if unsuccessful."""
+        season_numbers:set = set()
+        for start_date, end_date in windows:
+            changed:List[int] = self.api.getChangedSeasons(series_id,start_date,end_date)
+            if changed is None:
+                return None
+            season_numbers.update(changed)
+        if not season_numbers:
+            #new episodes of a running show land in its latest season
+            season_numbers.add(latest_season)
+        series_data:dict = self.api.getSeasons(series_id,list(season_numbers),newer_than=latest_season)
+        if not series_data or not self.__upsertSeasons(series_data):
+            return None
+        return [season['season_number'] for season in series_data['seasons']]
+
+    def __upsertSeasons(self,series_data:dict) -> bool:
+        """Inserts or updates the seasons in series_data and the series fields (one transaction), keeping the series' search_string"""
+        search_string:str = self.database.getSearchString(series_data['id'])
+        try:
+            if series_data['seasons']:
+                return self.database.upsertTMDBRows(self.buildRows(series_data,search_string or series_data['name'])) > 0
+            return self.database.updateSeries(series_data['id'],{
+                'number_of_episodes':series_data['number_of_episodes'],
+                'number_of_seasons':series_data['number_of_seasons'],
+                'series_overview':series_data['overview'],
+                'series_poster_path':series_data['poster_path']
+            })
+        finally:
+            self.series_cache.invalidate(series_data['id'])
+
+SEASONS_PER_REQUEST:int = 20
+"""Most sub-requests TMDB accepts in one append_to_response"""
+TMDB_RATE_LIMITER:RateLimiter = RateLimiter(rate=40.0,burst=20)
+"""Shared by every API object in the process, so parallel lookups stay under TMDB's limits together"""
+
+class APIStats:
+    """Request counters for an API object.  Safe to update from multiple threads."""
+    def __init__(self):
+        self.requests:int = 0
+        """Number of HTTP requests sent, including retries"""
+        self.retries:int = 0
+        self.failures:int = 0
+        """Requests that gave up after all retries"""
+        self.rate_limited:int = 0
+        """429 responses (waited for and retried)"""
+        self.cache_hits:int = 0
+        """Responses served from the cache without a request"""
+        self.cache_revalidated:int = 0
+        """Cached responses the server confirmed unchanged (304)"""
+        self.total_latency:float = 0.0
+        self.max_latency:float = 0.0
+        self.lock:threading.Lock = threading.Lock()
+
+    def addRequest(self,latency:float) -> None:
+        """Record one finished HTTP request and how long it took in seconds"""
+        with self.lock:
+            self.requests += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency,latency)
+
+    def addRetry(self) -> None:
+        with self.lock:
+            self.retries += 1
+
+    def addFailure(self) -> None:
+        with self.lock:
+            self.failures += 1
+
+    def addRateLimited(self) -> None:
+        with self.lock:
+            self.rate_limited += 1
+
+    def addCacheHit(self) -> None:
+        with self.lock:
+            self.cache_hits += 1
+
+    def addCacheRevalidated(self) -> None:
+        with self.lock:
+            self.cache_revalidated += 1
+
+    def getAverageLatency(self) -> float:
+        """Returns the average request latency in seconds"""
+        return self.total_latency / self.requests if self.requests else 0.0
+
 class API(LoggableClass):
-    """Class for interfacing with the TMDB API.  Created by the Manager class"""
+    """Class for interfacing with the TMDB API.  Created by the Manager class.
+    Requests go through one pooled keep-alive session, with timeouts and retries (jittered exponential backoff)
+    for connection errors, timeouts and 5xx responses."""
     def __init__(self,
                  api_key:str,
+                 connect_timeout:float = 5.0,
+                 read_timeout:float = 30.0,
+                 max_retries:int = 3,
+                 backoff_base:float = 0.5,
+                 backoff_max:float = 30.0,
+                 pool_size:int = 32,
+                 max_concurrency:int = 16,
+                 max_rate_limit_retries:int = 10,
+                 rate_limiter:RateLimiter = None,
+                 cache:ResponseCache = None,
+                 offline:bool = False,
+                 api_url:str = "https://api.themoviedb.org/3",
+                 api_image_url:str = "https://image.tmdb.org/t/p/original",
                  logging=True,
                  logging_warnings=True,
                  logging_errors=True):
@@ -137,24 +452,203 @@ class API(LoggableClass):
                          log_errors=logging_errors)
         #api
         self.api_key:str = api_key
-        self.api_url:str = "https://api.themoviedb.org/3"
-        self.api_image_url:str = "https://image.tmdb.org/t/p/original"
+        #(point these at benchmarks/fake_tmdb.py to run without network)
+        self.api_url:str = api_url.rstrip("/")
+        self.api_image_url:str = api_image_url.rstrip("/")
+        #connection handling
+        self.timeout:Tuple[float,float] = (connect_timeout,read_timeout)
+        self.max_retries:int = max(0,int(max_retries))
+        self.backoff_base:float = backoff_base
+        self.backoff_max:float = backoff_max
+        self.session:requests.Session = requests.Session()
+        self.adapter:HTTPAdapter = HTTPAdapter(pool_connections=4,pool_maxsize=pool_size,max_retries=0)
+        self.session.mount("https://",self.adapter)
+        self.session.mount("http://",self.adapter)
+        #cap on requests in flight at once, shared by every series, thread and event loop using this API
+        self.max_concurrency:int = max(1,int(max_concurrency))
+        self.concurrency:threading.BoundedSemaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self.executor:ThreadPoolExecutor = ThreadPoolExecutor(max_workers=self.max_concurrency,thread_name_prefix="tmdb-api")
+        """Runs the blocking requests for the async methods"""
+        #rate limiting (shared process wide unless a limiter is passed in)
+        self.rate_limiter:RateLimiter = rate_limiter if rate_limiter is not None else TMDB_RATE_LIMITER
+        self.max_rate_limit_retries:int = max_rate_limit_retries
+        """429 responses to wait out for one request before giving up.  Counted apart from max_retries."""
+        #raw response cache (None disables caching).  Offline only answers from the cache.
+        self.cache:ResponseCache = cache
+        self.offline:bool = offline
+        #reason the last failed lookup on each thread failed (see getLastFailure)
+        self.failure:threading.local = threading.local()
+        #stats
+        self.stats:APIStats = APIStats()
 
-    def sendGet(self,url:str,params:str=None,headers:str=None)->dict or None:
-        """Sends a GET request to the given URL.  Returns the response as a dictionary, or None if unsuccessful."""
-        try:
-            response = requests.get(url,params=params,headers=headers).json()
-            return response
-        except Exception as e:
-            self.logError(f"Error sending GET request to {url}: {e}")
-            self.logError(f"Params: {params}")
-            self.logError(f"Headers: {headers}")
+    @staticmethod
+    def fromConfig(config) -> "API":
+        """Builds an API from the tmdb_api_key and api_* config values.  Also sets the rate and burst of the shared rate limiter."""
+        TMDB_RATE_LIMITER.configure(rate=getattr(config,'API_RATE_LIMIT',None),burst=getattr(config,'API_BURST',None))
+        cache:ResponseCache = None
+        if getattr(config,'API_CACHE_SIZE_MB',0) > 0:
+            cache = ResponseCache(config.FILEPATH_TMDB_CACHE,max_bytes=int(config.API_CACHE_SIZE_MB*1024*1024))
+        return API(api_key=config.TMDB_API_KEY,
+                   cache=cache,
+                   offline=getattr(config,'API_OFFLINE',False),
+                   api_url=getattr(config,'API_URL',None) or "https://api.themoviedb.org/3",
+                   api_image_url=getattr(config,'API_IMAGE_URL',None) or "https://image.tmdb.org/t/p/original",
+                   connect_timeout=getattr(config,'API_CONNECT_TIMEOUT',5.0),
+                   read_timeout=getattr(config,'API_READ_TIMEOUT',30.0),
+                   max_retries=getattr(config,'API_MAX_RETRIES',3),
+                   max_concurrency=getattr(config,'API_MAX_CONCURRENCY',16))
+
+    def setOffline(self,offline:bool) -> None:
+        """Turns offline mode on or off.  Offline, requests are only answered from the response cache (stale or not)."""
+        self.offline = offline
+
+    def getLastFailure(self) -> str or None:
+        """Returns why the last failed request or search on this thread failed (one of the FAILURE_ values), or None"""
+        return getattr(self.failure,'reason',None)
+
+    def __setFailure(self,reason:str or None) -> None:
+        self.failure.reason = reason
+
+    def getStats(self) -> APIStats:
+        """Returns the request counters"""
+        return self.stats
+
+    def getConnectionCounts(self) -> Tuple[int,int]:
+        """Returns (connections opened, requests that reused an open connection) for the session's live pools"""
+        opened:int = 0
+        sent:int = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            sent += pool.num_requests
+        return opened, max(0,sent - opened)
+
+    def logStats(self) -> None:
+        """Logs the request and connection counters"""
+        opened, reused = self.getConnectionCounts()
+        self.log(f"{self.stats.requests} requests, {self.stats.retries} retries, {self.stats.failures} failures, "
+                 f"{self.stats.rate_limited} rate limited, {self.rate_limiter.getThrottledSeconds():.1f}s throttled, "
+                 f"{self.stats.cache_hits} cache hits, {self.stats.cache_revalidated} revalidated, "
+                 f"avg latency {self.stats.getAverageLatency()*1000:.0f}ms, max {self.stats.max_latency*1000:.0f}ms, "
+                 f"{opened} connections opened, {reused} reused")
+
+    def close(self) -> None:
+        """Closes the pooled connections and request threads"""
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+    def getBackoff(self,attempt:int) -> float:
+        """Returns the seconds to wait before retry number attempt (full jitter exponential backoff)"""
+        return random.uniform(0,min(self.backoff_max,self.backoff_base * (2 ** attempt)))
+
+    def sendGet(self,url:str,params:str=None,headers:str=None,revalidate:bool=False)->dict or None:
+        """Sends a GET request to the given URL.  Returns the response as a dictionary, or None if unsuccessful.
+        Waits for the rate limiter before each attempt.  A 429 pauses the limiter for its Retry-After and is retried.
+        With a response cache, fresh entries are returned without a request and stale ones (or all, with revalidate) are revalidated."""
+        entry:CacheEntry = self.cache.get(url) if self.cache is not None and not params else None
+        if entry is not None and (self.offline or (not revalidate and self.cache.isFresh(entry))):
+            self.stats.addCacheHit()
+            return entry.body
+        if self.offline:
+            self.logError(f"Offline, and no cached response for {self.__redact(url)}")
+            self.__setFailure(FAILURE_OFFLINE)
             return None
+        if entry is not None:
+            headers = dict(headers) if headers else {}
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        attempt:int = 0
+        rate_limit_attempts:int = 0
+        while attempt <= self.max_retries:
+            self.rate_limiter.acquire()
+            start_time:float = time.perf_counter()
+            try:
+                response:requests.Response = self.session.get(url,params=params,headers=headers,timeout=self.timeout)
+                self.stats.addRequest(time.perf_counter() - start_time)
+                if response.status_code == 429 and rate_limit_attempts >= self.max_rate_limit_retries:
+                    self.logError(f"GET {self.__redact(url)} still rate limited after {rate_limit_attempts} waits")
+                    self.stats.addFailure()
+                    self.__setFailure(FAILURE_RATE_LIMITED)
+                    return None
+                if response.status_code == 429:
+                    retry_after:float = self.getRetryAfter(response,rate_limit_attempts)
+                    self.logWarning(f"GET {self.__redact(url)} rate limited, pausing requests for {retry_after:.1f}s")
+                    self.stats.addRateLimited()
+                    self.rate_limiter.pause(retry_after)
+                    rate_limit_attempts += 1
+                    continue
+                if response.status_code == 304 and entry is not None:
+                    self.stats.addCacheRevalidated()
+                    self.cache.refresh(url,entry)
+                    return entry.body
+                if 400 <= response.status_code < 500:
+                    #bad key, unknown id etc: retrying won't help
+                    self.logError(f"GET {self.__redact(url)} failed: HTTP {response.status_code} {response.text[:200]}")
+                    self.stats.addFailure()
+                    self.__setFailure(FAILURE_API_ERROR)
+                    return None
+                if response.status_code < 500:
+                    body:dict = response.json()
+                    if self.cache is not None and response.status_code == 200 and not params:
+                        self.cache.store(url,body,response.headers.get('ETag',None),response.headers.get('Last-Modified',None))
+                    return body
+                error:str = f"HTTP {response.status_code}"
+            except (requests.ConnectionError,requests.Timeout) as e:
+                self.stats.addRequest(time.perf_counter() - start_time)
+                error:str = str(e)
+            except Exception as e:
+                self.logError(f"Error sending GET request to {self.__redact(url)}: {e}")
+                self.logError(f"Params: {params}")
+                self.logError(f"Headers: {headers}")
+                self.stats.addFailure()
+                self.__setFailure(FAILURE_API_ERROR)
+                return None
+            if attempt < self.max_retries:
+                backoff:float = self.getBackoff(attempt)
+                self.logWarning(f"GET {self.__redact(url)} failed ({error}), retrying in {backoff:.1f}s")
+                self.stats.addRetry()
+                time.sleep(backoff)
+            attempt += 1
+        self.logError(f"Error sending GET request to {self.__redact(url)}: {error} after {self.max_retries + 1} attempts")
+        self.stats.addFailure()
+        self.__setFailure(FAILURE_API_ERROR)
+        return None
+
+    def getRetryAfter(self,response:requests.Response,rate_limit_attempt:int) -> float:
+        """Returns the seconds to wait after a 429 response, from its Retry-After header (seconds or an HTTP date),
+        or the backoff for the attempt if there is no usable header"""
+        retry_after:str = response.headers.get('Retry-After',"")
+        try:
+            return max(0.0,float(retry_after))
+        except ValueError:
+            pass
+        try:
+            return max(0.0,parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError,ValueError,IndexError):
+            return max(1.0,self.getBackoff(rate_limit_attempt))
+
+    async def sendGetAsync(self,url:str,params:str=None,headers:str=None,revalidate:bool=False) -> dict or None:
+        """Awaitable sendGet.  Runs the request on a worker thread once a slot under max_concurrency is free."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor,self.__sendGetLimited,url,params,headers,revalidate)
+
+    def __sendGetLimited(self,url:str,params:str=None,headers:str=None,revalidate:bool=False) -> dict or None:
+        """sendGet, holding one of the max_concurrency slots"""
+        with self.concurrency:
+            return self.sendGet(url,params=params,headers=headers,revalidate=revalidate)
+
+    def __redact(self,url:str) -> str:
+        """Returns the url with the api key hidden, for logging"""
+        return url.replace(self.api_key,"***") if self.api_key else url
         
     def sendPost(self,url:str,params:str=None,headers:str=None)->dict or None:
         """Sends a POST request to the given URL.  Returns the response as a dictionary, or None if unsuccessful."""
         try:
-            response = requests.post(url,params=params,headers=headers).json()
+            response = self.session.post(url,params=params,headers=headers,timeout=self.timeout).json()
             return response
         except Exception as e:
             self.logError(f"Error sending POST request to {url}: {e}")
@@ -165,9 +659,9 @@ class API(LoggableClass):
     def __stepOne(self,series_name:str) -> dict:
         """Get the series ID, Series Name, Overview, original name, and poster path for the series"""
         # Construct the search URL
-        url:str = f"{self.api_url}/search/tv?api_key={self.api_key}&query={series_name}"
+        url:str = f"{self.api_url}/search/tv?api_key={self.api_key}&query={quote(series_name)}"
         # Make the search request
-        response_data:dict = self.sendGet(url)
+        response_data:dict = self.__sendGetLimited(url)
         if not response_data:
             self.logError(f"__stepOne(): No response data for '{series_name}'")
             return None
@@ -175,6 +669,7 @@ class API(LoggableClass):
             results:List[dict] = response_data.get('results',None)
             if not results:
                 self.logError(f"__stepOne(): No results found for '{series_name}'")
+                self.__setFailure(FAILURE_NO_RESULTS)
                 return None
             result:dict = results[0]
             #get the series ID
@@ -201,88 +696,200 @@ class API(LoggableClass):
             self.logError(f"Error getting series ID for '{series_name}': {e}")
             return None
 
-    def __stepTwo(self,step_one_data:dict) -> dict:
-        """Take the data from step one, and get the Season count and episode count, and add it to the data"""
-        # Construct the search URL
+    async def __stepTwo(self,step_one_data:dict) -> dict:
+        """Take the data from step one, and add the Season count, episode count and the episode data for each season.
+        Seasons are appended to the /tv/{id} details request (append_to_response), SEASONS_PER_REQUEST per call.
+        The first call asks for the first chunk before the season count is known, the rest are requested at once."""
         series_id:int = step_one_data.get('id',None)
-        url:str = f"{self.api_url}/tv/{series_id}?api_key={self.api_key}"
-        # Make the search request
-        response_data:dict = self.sendGet(url)
+        response_data:dict = await self.sendGetAsync(self.__detailsUrl(series_id,list(range(1,SEASONS_PER_REQUEST+1))))
         if not response_data:
             self.logError(f"__stepTwo(): No response data for '{series_id}'")
             return None
         try:
-            number_of_seasons:int = response_data.get('number_of_seasons',None)
+            number_of_seasons:int = response_data.get('number_of_seasons',None) or 0
             number_of_episodes:int = response_data.get('number_of_episodes',None)
-            step_two_data = step_one_data
-            step_two_data['number_of_seasons'] = number_of_seasons
-            step_two_data['number_of_episodes'] = number_of_episodes
-            return step_two_data
         except Exception as e:
             self.logError(f"Error getting step two data for '{series_id}': {e}")
             return None
-        
-    def __stepThree(self,step_two_data:dict) -> dict:
-        """Take the data from step two, and get the episode data for each season, and add it to the data"""
-        # Construct the search URL
-        series_id:int = step_two_data.get('id',None)
-        number_of_seasons:int = step_two_data.get('number_of_seasons',None)
-        step_three_data:dict = step_two_data
-        step_three_data['seasons'] = []
+        responses:List[dict] = [response_data]
+        chunks:List[List[int]] = self.__chunkSeasons(list(range(SEASONS_PER_REQUEST+1,number_of_seasons+1)))
+        responses += await asyncio.gather(*[self.sendGetAsync(self.__detailsUrl(series_id,chunk)) for chunk in chunks])
+        step_two_data:dict = step_one_data
+        step_two_data['number_of_seasons'] = number_of_seasons
+        step_two_data['number_of_episodes'] = number_of_episodes
+        step_two_data['seasons'] = []
         for i in range(1,number_of_seasons+1):
-            url:str = f"{self.api_url}/tv/{series_id}/season/{i}?api_key={self.api_key}"
-            # Make the search request
-            response_data:dict = self.sendGet(url)
-            if not response_data:
-                self.logError(f"__stepThree(): No response data for '{series_id}'")
-                continue
-            #create a season data object
-            episodes:List[dict] = response_data.get('episodes',None)
-            if not episodes:
-                self.logError(f"__stepThree(): No episodes found for '{series_id}'")
-                continue
-            #create a season data object
-            season_data:dict = {}
-            season_data['season_number']:int = i
-            season_data['id']:str = response_data.get('_id','None')
-            season_data['episodes']:List[dict] = []
-
-            for episode in episodes:
-                episode_data:dict = {}
-                episode_data['name']:str = episode.get('name','None')
-                episode_data['id']:str = episode.get('_id','None')
-                episode_data['episode_number']:int = episode.get('episode_number','None')
-                episode_data['overview']:str = episode.get('overview','None')
-                episode_data['still_path']:str = episode.get('still_path','None')
-                #add the episode data to the season data
-                season_data['episodes'].append(episode_data)
-            step_three_data['seasons'].append(season_data)
+            season_response:dict = responses[(i-1)//SEASONS_PER_REQUEST]
+            season_data:dict = self.__parseSeason(series_id,i,season_response.get(f"season/{i}",None) if season_response else None)
+            if season_data:
+                step_two_data['seasons'].append(season_data)
         #verify that the number of seasons is correct
-        if len(step_three_data['seasons']) != number_of_seasons:
-            self.logError(f"__stepThree(): The number of seasons for '{series_id}' is incorrect")
+        if len(step_two_data['seasons']) != number_of_seasons:
+            self.logError(f"__stepTwo(): The number of seasons for '{series_id}' is incorrect")
         #verify that the number of episodes is correct
         number_of_episodes:int = 0
-        for season in step_three_data['seasons']:
+        for season in step_two_data['seasons']:
             number_of_episodes += len(season['episodes'])
-        if number_of_episodes != step_three_data['number_of_episodes']:
-            self.logError(f"__stepThree(): The number of episodes for '{series_id}' is incorrect")
-        return step_three_data
+        if number_of_episodes != step_two_data['number_of_episodes']:
+            self.logError(f"__stepTwo(): The number of episodes for '{series_id}' is incorrect")
+        return step_two_data
+
+    def __detailsUrl(self,series_id:int,season_numbers:List[int]) -> str:
+        """Returns the /tv/{id} url with the given seasons (at most SEASONS_PER_REQUEST) appended"""
+        seasons:str = ",".join(f"season/{i}" for i in season_numbers)
+        return f"{self.api_url}/tv/{series_id}?api_key={self.api_key}&append_to_response={seasons}"
+
+    def __chunkSeasons(self,season_numbers:List[int]) -> List[List[int]]:
+        """Splits season numbers into lists of SEASONS_PER_REQUEST"""
+        return [season_numbers[i:i+SEASONS_PER_REQUEST] for i in range(0,len(season_numbers),SEASONS_PER_REQUEST)]
+
+    def getSeasons(self,series_id:int,season_numbers:List[int],newer_than:int = None) -> dict or None:
+        """Re-fetches some seasons of a series, bypassing fresh cache entries.  Seasons after newer_than are added if the
+        series now has more.  Returns the series data (as getSeriesData) holding only those seasons, or None if unsuccessful.
+        Blocking wrapper around getSeasonsAsync."""
+        return asyncio.run(self.getSeasonsAsync(series_id,season_numbers,newer_than))
+
+    async def getSeasonsAsync(self,series_id:int,season_numbers:List[int],newer_than:int = None) -> dict or None:
+        """Re-fetches some seasons of a series.  See getSeasons."""
+        #the same seasons a full fetch stores: 1 to number_of_seasons
+        wanted:List[int] = sorted(set(i for i in season_numbers if i >= 1))
+        first_chunk:List[int] = wanted[:SEASONS_PER_REQUEST]
+        response_data:dict = await self.sendGetAsync(self.__detailsUrl(series_id,first_chunk),revalidate=True)
+        if not response_data or not response_data.get('id',None):
+            self.logError(f"getSeasons(): No response data for '{series_id}'")
+            return None
+        number_of_seasons:int = response_data.get('number_of_seasons',None) or 0
+        remaining:List[int] = wanted[SEASONS_PER_REQUEST:]
+        if newer_than is not None:
+            remaining += [i for i in range(newer_than+1,number_of_seasons+1) if i not in wanted]
+        chunks:List[List[int]] = [first_chunk] + self.__chunkSeasons(remaining)
+        responses:List[dict] = [response_data] + await asyncio.gather(*[self.sendGetAsync(self.__detailsUrl(series_id,chunk),revalidate=True) for chunk in chunks[1:]])
+        series_data:dict = {
+            'id':response_data.get('id'),
+            'name':response_data.get('name',None),
+            'original_name':response_data.get('original_name',"None"),
+            'overview':response_data.get('overview',"None"),
+            'poster_path':response_data.get('poster_path',"None"),
+            'number_of_seasons':number_of_seasons,
+            'number_of_episodes':response_data.get('number_of_episodes',None),
+            'seasons':[]
+        }
+        for chunk, chunk_response in zip(chunks,responses):
+            for i in chunk:
+                if i > number_of_seasons:
+                    continue
+                season_data:dict = self.__parseSeason(series_id,i,chunk_response.get(f"season/{i}",None) if chunk_response else None)
+                if season_data:
+                    series_data['seasons'].append(season_data)
+        return series_data
+
+    def getChangedSeriesIds(self,start_date:str,end_date:str) -> List[int] or None:
+        """Returns the ids of every TV series changed on TMDB between the dates (YYYY-MM-DD, at most 14 days apart),
+        from the /tv/changes feed.  Returns None if the feed could not be read."""
+        series_ids:List[int] = []
+        page:int = 1
+        total_pages:int = 1
+        while page <= total_pages:
+            url:str = f"{self.api_url}/tv/changes?api_key={self.api_key}&start_date={start_date}&end_date={end_date}&page={page}"
+            response_data:dict = self.__sendGetLimited(url,revalidate=True)
+            if not response_data or 'results' not in response_data:
+                self.logError(f"getChangedSeriesIds(): No response data for page {page} of {start_date} to {end_date}")
+                return None
+            series_ids += [result['id'] for result in response_data['results'] if result.get('id',None) is not None]
+            total_pages = response_data.get('total_pages',1) or 1
+            page += 1
+        return series_ids
+
+    def getChangedSeasons(self,series_id:int,start_date:str,end_date:str) -> List[int] or None:
+        """Returns the season numbers changed between the dates, from /tv/{id}/changes.  An empty list means only
+        series level fields changed (or the change has no season number).  Specials (season 0) are left out, as a full
+        fetch (getSeriesData) never stores them.  Returns None if the changes could not be read."""
+        url:str = f"{self.api_url}/tv/{series_id}/changes?api_key={self.api_key}&start_date={start_date}&end_date={end_date}"
+        response_data:dict = self.__sendGetLimited(url,revalidate=True)
+        if not response_data or 'changes' not in response_data:
+            self.logError(f"getChangedSeasons(): No response data for '{series_id}'")
+            return None
+        season_numbers:List[int] = []
+        for change in response_data['changes']:
+            if change.get('key',None) != "season":
+                continue
+            for item in change.get('items',[]):
+                value = item.get('value',None)
+                if isinstance(value,dict) and isinstance(value.get('season_number',None),int) and value['season_number'] >= 1:
+                    season_numbers.append(value['season_number'])
+        return sorted(set(season_numbers))
+
+    def __parseSeason(self,series_id:int,season_number:int,response_data:dict) -> dict or None:
+        """Builds the season data object from a /tv/{id}/season/{n} response.  Returns None if it has no episodes."""
+        if not response_data:
+            self.logError(f"__stepTwo(): No data for season {season_number} of '{series_id}'")
+            return None
+        #create a season data object
+        episodes:List[dict] = response_data.get('episodes',None)
+        if not episodes:
+            self.logError(f"__stepTwo(): No episodes found for '{series_id}'")
+            return None
+        #create a season data object
+        season_data:dict = {}
+        season_data['season_number']:int = season_number
+        season_data['id']:str = response_data.get('_id','None')
+        season_data['episodes']:List[dict] = []
+
+        for episode in episodes:
+            episode_data:dict = {}
+            episode_data['name']:str = episode.get('name','None')
+            episode_data['id']:str = episode.get('id',episode.get('_id','None'))
+            episode_data['episode_number']:int = episode.get('episode_number','None')
+            episode_data['overview']:str = episode.get('overview','None')
+            episode_data['still_path']:str = episode.get('still_path','None')
+            #add the episode data to the season data
+            season_data['episodes'].append(episode_data)
+        return season_data
             
     def getSeriesData(self,series_name:str) -> dict:
+        """Build a dictionary object of information about the given series and return it.
+        Blocking wrapper around getSeriesDataAsync (don't call from inside a running event loop)."""
+        return asyncio.run(self.getSeriesDataAsync(series_name))
+
+    def getManySeriesData(self,series_names:List[str]) -> Dict[str,dict]:
+        """Builds the data for many series at once.  Returns series name -> data (None if the lookup failed).
+        Blocking wrapper around getManySeriesDataAsync."""
+        return asyncio.run(self.getManySeriesDataAsync(series_names))
+
+    async def getManySeriesDataAsync(self,series_names:List[str]) -> Dict[str,dict]:
+        """Looks up every series concurrently.  Requests in flight never exceed max_concurrency."""
+        unique_names:List[str] = list(dict.fromkeys(series_names))
+        results:List[dict] = await asyncio.gather(*[self.getSeriesDataAsync(name) for name in unique_names])
+        return dict(zip(unique_names,results))
+
+    def searchSeries(self,series_name:str) -> dict:
+        """Searches for the series name.  Returns the id, name, original name, overview and poster path of the best match,
+        or None (getLastFailure() then says why)."""
+        self.__setFailure(None)
+        data:dict = self.__stepOne(series_name)
+        if data is None and self.getLastFailure() is None:
+            self.__setFailure(FAILURE_API_ERROR)
+        return data
+
+    def getSeriesDetails(self,step_one_data:dict) -> dict:
+        """Adds the season/episode data to a searchSeries() result.  Returns None if unsuccessful.
+        Blocking wrapper around getSeriesDetailsAsync."""
+        return asyncio.run(self.getSeriesDetailsAsync(step_one_data))
+
+    async def getSeriesDetailsAsync(self,step_one_data:dict) -> dict:
+        """Adds the season/episode data to a searchSeries() result.  Returns None if unsuccessful."""
+        return await self.__stepTwo(step_one_data)
+
+    async def getSeriesDataAsync(self,series_name:str) -> dict:
         """Build a dictionary object of information about the given series and return it."""
-        step_one_data:dict = self.__stepOne(series_name)
+        step_one_data:dict = await asyncio.get_running_loop().run_in_executor(self.executor,self.__stepOne,series_name)
         if not step_one_data:
             self.logError(f"buildSeriesData(): No step one data for '{series_name}'")
             return None
-        step_two_data:dict = self.__stepTwo(step_one_data)
+        step_two_data:dict = await self.getSeriesDetailsAsync(step_one_data)
         if not step_two_data:
             self.logError(f"buildSeriesData(): No step two data for '{series_name}'")
             return None
-        step_three_data:dict = self.__stepThree(step_two_data)
-        if not step_three_data:
-            self.logError(f"buildSeriesData(): No step three data for '{series_name}'")
-            return None
-        return step_three_data
+        return step_two_data
     
 
-
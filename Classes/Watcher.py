@@ -0,0 +1,438 @@
+#Watch mode for the Local Scraper Tool (Linux inotify)
+from Classes.LoggableClass import LoggableClass
+from Classes.LocalFile import Series, Season, Episode
+from Classes.Snapshot import DirectorySnapshot
+from typing import List, Dict, Set, Tuple, Callable
+import ctypes
+import ctypes.util
+import threading
+import select
+import struct
+import queue
+import time
+import sys
+import os
+
+#inotify constants (linux/inotify.h)
+IN_CLOSE_WRITE:int = 0x00000008
+IN_MOVED_FROM:int = 0x00000040
+IN_MOVED_TO:int = 0x00000080
+IN_CREATE:int = 0x00000100
+IN_DELETE:int = 0x00000200
+IN_DELETE_SELF:int = 0x00000400
+IN_MOVE_SELF:int = 0x00000800
+IN_Q_OVERFLOW:int = 0x00004000
+IN_IGNORED:int = 0x00008000
+IN_ONLYDIR:int = 0x01000000
+IN_ISDIR:int = 0x40000000
+WATCH_MASK:int = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+EVENT_HEADER:struct.Struct = struct.Struct("iIII")
+
+class Inotify:
+    """Minimal ctypes wrapper around the Linux inotify API"""
+    def __init__(self):
+        libc_name:str = ctypes.util.find_library("c") or "libc.so.6"
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd:int = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno:int = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+
+    def addWatch(self,path:str,mask:int = WATCH_MASK) -> int:
+        """Adds (or updates) a watch on the given directory.  Returns the watch descriptor."""
+        wd:int = self.libc.inotify_add_watch(self.fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0:
+            errno:int = ctypes.get_errno()
+            raise OSError(errno, f"inotify_add_watch failed for {path}: {os.strerror(errno)}")
+        return wd
+
+    def removeWatch(self,wd:int) -> None:
+        """Removes a watch.  Errors are ignored, the kernel drops watches on deleted directories by itself."""
+        self.libc.inotify_rm_watch(self.fd, ctypes.c_int(wd))
+
+    def read(self,timeout:float) -> List[Tuple[int,int,int,str]]:
+        """Waits up to timeout seconds and returns the pending events as (wd, mask, cookie, name)"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data:bytes = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+        events:List[Tuple[int,int,int,str]] = []
+        offset:int = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name:str = os.fsdecode(data[offset:offset+length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, cookie, name))
+        return events
+
+    def close(self) -> None:
+        """Closes the inotify file descriptor"""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+class ChangeEvent:
+    """A change applied to the library tree.  kind is one of the *_ADDED/*_REMOVED constants."""
+    SERIES_ADDED:str = "series_added"
+    SERIES_REMOVED:str = "series_removed"
+    SEASON_ADDED:str = "season_added"
+    SEASON_REMOVED:str = "season_removed"
+    EPISODE_ADDED:str = "episode_added"
+    EPISODE_REMOVED:str = "episode_removed"
+
+    def __init__(self,kind:str,series:Series,season:Season = None,episode:Episode = None):
+        self.kind:str = kind
+        self.series:Series = series
+        self.season:Season = season
+        self.episode:Episode = episode
+        self.timestamp:float = time.time()
+
+    def getPath(self) -> str:
+        """Returns the filepath of the most specific item this event is about"""
+        for item in (self.episode, self.season, self.series):
+            if item is not None:
+                return item.filepath
+        return ""
+
+    def __repr__(self):
+        return f"<ChangeEvent({self.kind}, {self.getPath()})>"
+
+class LibraryWatcher(LoggableClass):
+    """Keeps an LST library tree live using inotify.  Events are debounced, coalesced per directory and applied to
+    the existing Series/Season/Episode objects in place; the resulting ChangeEvents are available from getEvents().
+    Hold lst.lock while reading the tree if the watcher is running."""
+    def __init__(self,lst,debounce_seconds:float = 2.0,max_delay_seconds:float = 30.0,logging=True,logging_warnings=True,logging_errors=True):
+        #super init
+        self.prefix:str = "WATCH"
+        self.prefix_warning:str = "WATCH WRN"
+        self.prefix_error:str = "WATCH ERR"
+        super().__init__(prefix=self.prefix,
+                         prefix_warning=self.prefix_warning,
+                         prefix_error=self.prefix_error,
+                         logging=logging,
+                         log_warning=logging_warnings,
+                         log_errors=logging_errors)
+        self.lst = lst
+        self.root_directories:List[str] = [os.path.normpath(root_directory) for root_directory in lst.root_directories]
+        #debounce: flush once no events arrived for debounce_seconds, or max_delay_seconds after the first pending event
+        self.debounce_seconds:float = debounce_seconds
+        self.max_delay_seconds:float = max_delay_seconds
+        #inotify state
+        self.inotify:Inotify = None
+        self.watches:Dict[int,str] = {}
+        """watch descriptor -> directory path"""
+        self.watched_paths:Dict[str,int] = {}
+        """directory path -> watch descriptor"""
+        #pending changes, coalesced per directory: series paths, and (series path, season folder)
+        self.pending_series:Set[str] = set()
+        self.pending_seasons:Set[Tuple[str,str]] = set()
+        self.overflowed:bool = False
+        self.first_pending_time:float = None
+        self.last_event_time:float = None
+        self.last_flush_time:float = time.time()
+        #output
+        self.events:queue.Queue = queue.Queue()
+        self.callbacks:List[Callable[[List[ChangeEvent]],None]] = []
+        #thread
+        self.thread:threading.Thread = None
+        self.stop_event:threading.Event = threading.Event()
+
+    # ------------------------------------------------- PUBLIC -------------------------------------------------
+    def start(self) -> bool:
+        """Starts watching in a background thread.  Returns True if successful, False if inotify is unavailable."""
+        if not sys.platform.startswith("linux"):
+            self.logError("Watch mode needs Linux inotify")
+            return False
+        try:
+            self.inotify = Inotify()
+        except OSError as e:
+            self.logError(f"Could not start inotify: {e}")
+            return False
+        self.last_flush_time = time.time()
+        with self.lst.lock:
+            self.__watchPaths(self.__getKnownDirectories())
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.__run, name="lst-watcher", daemon=True)
+        self.thread.start()
+        self.log(f"Watching {len(self.watches)} directories under {', '.join(self.root_directories)}")
+        return True
+
+    def stop(self) -> None:
+        """Stops watching and closes inotify"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+        self.watches = {}
+        self.watched_paths = {}
+
+    def addCallback(self,callback:Callable[[List[ChangeEvent]],None]) -> None:
+        """Registers a callback that receives each batch of ChangeEvents, called from the watcher thread"""
+        self.callbacks.append(callback)
+
+    def getEvents(self,timeout:float = None) -> List[ChangeEvent]:
+        """Returns all queued ChangeEvents, waiting up to timeout seconds for the first one.  Returns an empty list on timeout."""
+        events:List[ChangeEvent] = []
+        try:
+            events.append(self.events.get(timeout=timeout))
+        except queue.Empty:
+            return events
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    # ------------------------------------------------- EVENTS -------------------------------------------------
+    def __run(self) -> None:
+        """Watcher thread: reads inotify events and flushes them once they settle"""
+        while not self.stop_event.is_set():
+            try:
+                raw_events = self.inotify.read(timeout=0.25)
+            except OSError as e:
+                self.logError(f"Error reading inotify events: {e}")
+                break
+            now:float = time.time()
+            for wd, mask, cookie, name in raw_events:
+                self.__recordEvent(wd, mask, name)
+                self.last_event_time = now
+                if self.first_pending_time is None:
+                    self.first_pending_time = now
+            if self.first_pending_time is None:
+                continue
+            quiet:bool = now - self.last_event_time >= self.debounce_seconds
+            overdue:bool = now - self.first_pending_time >= self.max_delay_seconds
+            if quiet or overdue:
+                self.flush()
+
+    def __recordEvent(self,wd:int,mask:int,name:str) -> None:
+        """Records the series/season an inotify event belongs to"""
+        if mask & IN_Q_OVERFLOW:
+            self.logWarning("inotify queue overflowed, falling back to a rescan of changed directories")
+            self.overflowed = True
+            return
+        directory:str = self.watches.get(wd,None)
+        if directory is None:
+            return
+        if mask & IN_IGNORED:
+            self.watches.pop(wd,None)
+            if self.watched_paths.get(directory,None) == wd:
+                self.watched_paths.pop(directory,None)
+            return
+        path:str = os.path.join(directory,name) if name else directory
+        root_directory, parts = self.__splitPath(path)
+        if len(parts) == 0:
+            return
+        if self.lst.scanner.isIgnored(os.path.dirname(path),parts[-1],bool(mask & IN_ISDIR)):
+            return
+        series_path:str = os.path.join(root_directory,parts[0])
+        if len(parts) == 1:
+            self.pending_series.add(series_path)
+        else:
+            self.pending_seasons.add((series_path,parts[1]))
+
+    def __splitPath(self,path:str) -> Tuple[str,List[str]]:
+        """Returns the root the path is under, and the path relative to it as [series, season, episode] parts (as many as apply)"""
+        path = os.path.normpath(path)
+        for root_directory in self.root_directories:
+            relative:str = os.path.relpath(path,root_directory)
+            if relative == "." or relative.startswith(".."):
+                continue
+            return root_directory, relative.split(os.sep)
+        return "", []
+
+    def flush(self) -> List[ChangeEvent]:
+        """Applies all pending changes to the tree and publishes the resulting events"""
+        pending_series:Set[str] = self.pending_series
+        pending_seasons:Set[Tuple[str,str]] = self.pending_seasons
+        overflowed:bool = self.overflowed
+        self.pending_series = set()
+        self.pending_seasons = set()
+        self.overflowed = False
+        self.first_pending_time = None
+        flush_start:float = time.time()
+        changes:List[ChangeEvent] = []
+        with self.lst.lock:
+            if overflowed:
+                pending_series |= self.__findChangedSeries()
+            series_by_path:Dict[str,Series] = {os.path.normpath(series.filepath):series for series in self.lst.local_series_data}
+            #whole series first, anything under them is covered by the series rescan
+            for series_path in sorted(pending_series):
+                changes.extend(self.__applySeries(series_path,series_by_path))
+            for series_path, season_folder in sorted(pending_seasons):
+                if series_path in pending_series:
+                    continue
+                series:Series = series_by_path.get(series_path,None)
+                if series is None:
+                    changes.extend(self.__applySeries(series_path,series_by_path))
+                    pending_series.add(series_path)
+                    continue
+                changes.extend(self.__applySeason(series,season_folder))
+            #watch anything new under the directories that changed
+            self.__watchPaths(self.__getDirectoriesUnder(pending_series,pending_seasons))
+        #directories changed while we were applying are picked up by their own inotify events
+        self.last_flush_time = flush_start
+        if changes:
+            self.log(f"Applied {len(changes)} changes to the library tree")
+            for change in changes:
+                self.events.put(change)
+            for callback in self.callbacks:
+                try:
+                    callback(changes)
+                except Exception as e:
+                    self.logError(f"Error in change callback: {e}")
+        return changes
+
+    # ------------------------------------------------- TREE -------------------------------------------------
+    def __applySeries(self,series_path:str,series_by_path:Dict[str,Series]) -> List[ChangeEvent]:
+        """Brings one series in the tree in line with the disk"""
+        existing:Series = series_by_path.get(series_path,None)
+        scanned:Series = None
+        if os.path.isdir(series_path):
+            scanned = self.lst.scanner.scanSeries(os.path.dirname(series_path),os.path.basename(series_path))
+        if existing is None and scanned is None:
+            return []
+        if existing is None:
+            self.lst.local_series_data.append(scanned)
+            series_by_path[series_path] = scanned
+            return [ChangeEvent(ChangeEvent.SERIES_ADDED,scanned)]
+        if scanned is None:
+            self.lst.local_series_data.remove(existing)
+            series_by_path.pop(series_path,None)
+            return [ChangeEvent(ChangeEvent.SERIES_REMOVED,existing)]
+        #merge season by season so consumers keep their references
+        changes:List[ChangeEvent] = []
+        scanned_seasons:Dict[str,Season] = {season.name_on_disc:season for season in scanned.seasons}
+        for season in list(existing.seasons):
+            if season.name_on_disc not in scanned_seasons:
+                existing.seasons.remove(season)
+                changes.append(ChangeEvent(ChangeEvent.SEASON_REMOVED,existing,season))
+        for season_folder, scanned_season in scanned_seasons.items():
+            changes.extend(self.__mergeSeason(existing,scanned_season))
+        return changes
+
+    def __applySeason(self,series:Series,season_folder:str) -> List[ChangeEvent]:
+        """Brings one season in the tree in line with the disk"""
+        scanned:Season = None
+        if os.path.isdir(os.path.join(series.filepath,season_folder)):
+            scanned = self.lst.scanner.scanSeason(series,season_folder)
+        if scanned is not None:
+            return self.__mergeSeason(series,scanned)
+        for season in list(series.seasons):
+            if season.name_on_disc == season_folder:
+                series.seasons.remove(season)
+                return [ChangeEvent(ChangeEvent.SEASON_REMOVED,series,season)]
+        return []
+
+    def __mergeSeason(self,series:Series,scanned:Season) -> List[ChangeEvent]:
+        """Merges a freshly scanned season into the series, adding or removing episodes on the existing Season object"""
+        existing:Season = None
+        for season in series.seasons:
+            if season.name_on_disc == scanned.name_on_disc:
+                existing = season
+                break
+        if existing is None:
+            scanned.parent = series
+            series.seasons.append(scanned)
+            return [ChangeEvent(ChangeEvent.SEASON_ADDED,series,scanned)]
+        changes:List[ChangeEvent] = []
+        scanned_episodes:Dict[str,Episode] = {episode.name_on_disc:episode for episode in scanned.episodes}
+        existing_names:Set[str] = set()
+        for episode in list(existing.episodes):
+            existing_names.add(episode.name_on_disc)
+            if episode.name_on_disc not in scanned_episodes:
+                existing.removeEpisode(episode)
+                changes.append(ChangeEvent(ChangeEvent.EPISODE_REMOVED,series,existing,episode))
+        for name, episode in scanned_episodes.items():
+            if name not in existing_names:
+                existing.addEpisode(episode)
+                changes.append(ChangeEvent(ChangeEvent.EPISODE_ADDED,series,existing,episode))
+        return changes
+
+    def __findChangedSeries(self) -> Set[str]:
+        """After a queue overflow: returns the path of every series that was added, removed, or whose directory or season
+        directories were modified since the last flush.  Only the roots are listed, the rest is stats."""
+        changed:Set[str] = set()
+        on_disk:Set[str] = set()
+        for root_directory in self.root_directories:
+            on_disk.update(os.path.join(root_directory,series_folder) for series_folder in self.lst.scanner.getSeriesFolders(root_directory))
+        in_tree:Set[str] = {os.path.normpath(series.filepath) for series in self.lst.local_series_data}
+        changed |= in_tree.symmetric_difference(on_disk)
+        since:float = self.last_flush_time - DirectorySnapshot.RACY_SECONDS
+        for series in self.lst.local_series_data:
+            paths:List[str] = [series.filepath] + [season.filepath for season in series.seasons]
+            for path in paths:
+                try:
+                    if os.stat(path).st_mtime >= since:
+                        changed.add(os.path.normpath(series.filepath))
+                        break
+                except OSError:
+                    changed.add(os.path.normpath(series.filepath))
+                    break
+        return changed
+
+    def __getKnownDirectories(self) -> List[str]:
+        """Returns the root, series and season directories from the last scan's snapshot, including seasons with no
+        episodes, which are not in the tree.  Falls back to the tree if there is no snapshot."""
+        paths:List[str] = list(self.root_directories)
+        snapshot:DirectorySnapshot = self.lst.snapshot
+        if snapshot is None:
+            for series in self.lst.local_series_data:
+                paths.append(os.path.normpath(series.filepath))
+                for season in series.seasons:
+                    paths.append(os.path.normpath(season.filepath))
+            return paths
+        records:Dict[str,tuple] = {os.path.normpath(path):record for path, record in snapshot.records.items()}
+        for root_directory in self.root_directories:
+            root_record:tuple = records.get(root_directory,None)
+            if root_record is None:
+                continue
+            for series_folder in root_record[3]:
+                if self.lst.scanner.isIgnored(root_directory,series_folder,True):
+                    continue
+                series_path:str = os.path.join(root_directory,series_folder)
+                paths.append(series_path)
+                series_record:tuple = records.get(series_path,None)
+                if series_record is None:
+                    continue
+                for season_folder in series_record[3]:
+                    if not self.lst.scanner.isIgnored(series_path,season_folder,True):
+                        paths.append(os.path.join(series_path,season_folder))
+        return paths
+
+    def __getDirectoriesUnder(self,series_paths:Set[str],seasons:Set[Tuple[str,str]]) -> List[str]:
+        """Returns the series and season directories that exist under the given changed series and seasons"""
+        paths:List[str] = []
+        for series_path in series_paths:
+            if not os.path.isdir(series_path):
+                continue
+            paths.append(series_path)
+            season_folders, _ = self.lst.scanner.listDirectory(series_path)
+            for season_folder in season_folders:
+                if not self.lst.scanner.isIgnored(series_path,season_folder,True):
+                    paths.append(os.path.join(series_path,season_folder))
+        for series_path, season_folder in seasons:
+            season_path:str = os.path.join(series_path,season_folder)
+            if os.path.isdir(season_path):
+                paths.append(season_path)
+        return paths
+
+    def __watchPaths(self,paths:List[str]) -> None:
+        """Adds watches for the given directories, skipping ones that are already watched"""
+        for path in paths:
+            if path in self.watched_paths:
+                continue
+            try:
+                wd:int = self.inotify.addWatch(path)
+            except OSError as e:
+                self.logWarning(f"Could not watch {path}: {e}")
+                continue
+            self.watches[wd] = path
+            self.watched_paths[path] = wd
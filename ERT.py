@@ -10,22 +10,76 @@ ERT (this class) iterate through LST results, and query TMDB manager for series
     -other stuff probably
 """
 from Classes.LoggableClass import LoggableClass
-from Classes.TMDB import TMDBManager
+from Classes.TMDB import TMDBManager, API
 from Classes.Filters import Filter
 from Classes.LST import LST
-from typing import List, Dict
+from Classes.IgnoreRules import IgnoreRules
+from Classes.Config import Config
+from typing import List, Dict, Tuple
 from Classes.LocalFile import Series, Season, Episode
 #database
-from Classes.Database import Database, TMDB
+from Classes.Database import Database, EpisodeRecord
 
 class ERT(LoggableClass):
-    def __init__(self,database:Database, tmdb_api_key:str):
+    def __init__(self,database:Database, tmdb_api_key:str, root_directory:str or List[str] = None, snapshot_path:str = None,
+                 config:Config = None, ignore_rules:IgnoreRules = None):
         #super init
         super().__init__("ERT","ERT ERR","ERT WRN")
         #tmdb stuff
         self.tmdb_api_key:str = tmdb_api_key
         self.database:Database = database #probably only need for TMDB
-        self.tmdb = TMDBManager(self.database, tmdb_api_key)
-        #init Local Scraper Tool
-        self.lst:LST = LST()
+        #with a config, requests use its timeouts, rate limit, response cache, offline mode and api_url
+        self.tmdb = TMDBManager(self.database, tmdb_api_key, api=API.fromConfig(config) if config is not None else None)
+        #skip rules: given ones, else the skip_* values of config.json
+        if ignore_rules is None and config is not None:
+            ignore_rules = IgnoreRules.fromConfig(config)
+        #roots and scan limits: root_directory if given, else root_series_folders with the config's workers and per-device limits
+        scan_workers:int = config.SCAN_WORKERS if config is not None else 8
+        device_limits:Dict[str,int] = config.DEVICE_CONCURRENCY if config is not None else None
+        if root_directory is None:
+            root_directory = config.ROOT_SERIES_FOLDERS if config is not None else []
+        #directory snapshot for incremental rescans (config's FILEPATH_LST_DATA unless given)
+        if snapshot_path is None and config is not None:
+            snapshot_path = config.FILEPATH_LST_DATA
+        #init Local Scraper Tool (scanning is streamed by matchSeries())
+        self.lst:LST = LST(root_directory, snapshot_path=snapshot_path, ignore_rules=ignore_rules, scan_workers=scan_workers,
+                           device_limits=device_limits, scan_on_init=False)
         self.local_series_data:List[Series] = self.lst.getData()
+        #TMDB rows for each local series, keyed by the series folder name
+        self.tmdb_series_data:Dict[str,List[EpisodeRecord]] = {}
+
+    @staticmethod
+    def fromConfig(config:Config) -> "ERT":
+        """Builds the tool from config.json: the database at FILEPATH_DATABASE with the db_* profile, the TMDB API with the
+        api_* values, and the scan of root_series_folders with its skip rules, limits and snapshot"""
+        return ERT(Database.fromConfig(config), config.TMDB_API_KEY, config=config)
+
+    def matchSeries(self,batch_size:int = 32) -> Dict[str,List[EpisodeRecord]]:
+        """Streams the local scan and looks up series on TMDB in batches of batch_size as they are scanned, each batch fetched concurrently.
+        Returns the rows keyed by series folder name."""
+        self.tmdb_series_data = {}
+        batch:List[str] = []
+        for series in self.lst.iterSeries():
+            batch.append(series.name_on_disc)
+            if len(batch) >= batch_size:
+                self.tmdb_series_data.update(self.tmdb.getManySeries(batch))
+                batch = []
+        if batch:
+            self.tmdb_series_data.update(self.tmdb.getManySeries(batch))
+        self.local_series_data = self.lst.getData()
+        return self.tmdb_series_data
+
+    def compareSeries(self,series:Series,tmdb_rows:List[EpisodeRecord]) -> Tuple[List[Tuple[Episode,EpisodeRecord]],List[EpisodeRecord]]:
+        """Matches local episodes to TMDB rows by (season, episode) through each season's episode index.
+        Returns (matched (episode, row) pairs, rows with no local file)"""
+        seasons:Dict[int,Season] = {season.season_number:season for season in series.seasons}
+        matches:List[Tuple[Episode,EpisodeRecord]] = []
+        missing:List[EpisodeRecord] = []
+        for row in tmdb_rows:
+            season:Season = seasons.get(row.season_number,None)
+            episode:Episode = season.getEpisode(row.episode_number) if season is not None else None
+            if episode is None:
+                missing.append(row)
+            else:
+                matches.append((episode,row))
+        return matches, missing
@@ -0,0 +1,71 @@
+"""Benchmark: writing a fetched series to the TMDB cache database.
+Compares the previous addSeriesToDatabase (a SELECT session plus an INSERT session and commit per episode, into the
+legacy tmbd table) against
+Database.upsertTMDBRows (one INSERT ... ON CONFLICT transaction per series), each into a fresh database file.
+Run from the repository root:  python benchmarks/bench_database_insert.py [episodes per series] [series]"""
+import os
+import sys
+import time
+import tempfile
+from typing import List
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Classes.Database import Database, TMDB
+from Classes.TMDB import TMDBManager
+
+EPISODES_PER_SEASON:int = 25
+
+def buildSeriesData(series_id:int, episode_count:int) -> dict:
+    seasons:List[dict] = []
+    for season_number in range(1, (episode_count + EPISODES_PER_SEASON - 1) // EPISODES_PER_SEASON + 1):
+        first:int = (season_number - 1) * EPISODES_PER_SEASON
+        episodes:List[dict] = [{'id':series_id*100000 + first + e, 'name':f"Episode {e}", 'episode_number':e,
+                                'overview':"An overview long enough to look like a real one. " * 4, 'still_path':f"/still_{series_id}_{first + e}.jpg"}
+                               for e in range(1, min(EPISODES_PER_SEASON, episode_count - first) + 1)]
+        seasons.append({'season_number':season_number, 'id':f"season-{series_id}-{season_number}", 'episodes':episodes})
+    return {'id':series_id, 'name':f"Series {series_id}", 'original_name':f"Series {series_id}", 'overview':"Series overview. " * 10,
+            'poster_path':f"/poster_{series_id}.jpg", 'number_of_seasons':len(seasons), 'number_of_episodes':episode_count, 'seasons':seasons}
+
+#------------------------------------ previous insert path, kept here for comparison ------------------------------------
+def legacyAddSeries(database:Database, series_data:dict, search_string:str) -> int:
+    add_count:int = 0
+    for season in series_data['seasons']:
+        for episode in season['episodes']:
+            db_id:str = f"{series_data['id']}-{season['id']}-{episode['id']}"
+            session = database.getSession()
+            tmdb = session.query(TMDB).filter(TMDB.db_id == db_id).first()
+            session.close()
+            if tmdb:
+                continue
+            session = database.getSession()
+            session.add(TMDB(db_id=db_id, episode_name=episode['name'], episode_id=episode['id'], episode_number=episode['episode_number'],
+                             episode_overview=episode['overview'], episode_still_path=episode['still_path'], season_number=season['season_number'],
+                             season_id=season['id'], number_of_episodes=series_data['number_of_episodes'], series_name=series_data['name'],
+                             series_original_name=series_data['original_name'], series_overview=series_data['overview'],
+                             series_poster_path=series_data['poster_path'], series_id=series_data['id'],
+                             number_of_seasons=series_data['number_of_seasons'], search_string=search_string))
+            session.commit()
+            session.close()
+            add_count += 1
+    return add_count
+
+def bulkAddSeries(manager:TMDBManager, series_data:dict, search_string:str) -> int:
+    return manager.database.upsertTMDBRows(manager.buildRows(series_data, search_string))
+
+def measure(label:str, writer, episode_count:int, series_count:int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        database:Database = Database(db_path=os.path.join(directory, "bench.db"))
+        database.logging = False
+        manager:TMDBManager = TMDBManager(database, "")
+        manager.logging = False
+        target = database if writer is legacyAddSeries else manager
+        start:float = time.perf_counter()
+        rows:int = sum(writer(target, buildSeriesData(1000 + s, episode_count), f"series {s}") for s in range(series_count))
+        elapsed:float = time.perf_counter() - start
+        database.close()
+    print(f"{label:<8} {rows:>7,} rows  {elapsed:>8.2f}s  {rows/elapsed:>10,.0f} rows/s")
+
+if __name__ == "__main__":
+    episode_count:int = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    series_count:int = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    measure("legacy", legacyAddSeries, episode_count, series_count)
+    measure("bulk", bulkAddSeries, episode_count, series_count)
@@ -0,0 +1,71 @@
+"""Benchmark: looking up a cached series by name in the TMDB cache database.
+Fills the legacy single table cache (tmbd) with synthetic episodes and times the previous lookup (a filter on the
+unindexed search_string column, then series_name), then runs Database.migrateLegacyRows() and times
+TMDBManager.getSeries against the indexed series/season/episode tables.
+Run from the repository root:  python benchmarks/bench_database_lookup.py [cached episodes] [lookups]"""
+import os
+import sys
+import time
+import random
+import tempfile
+import statistics
+from typing import List
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_database_insert import buildSeriesData
+from Classes.Database import Database, TMDB
+from Classes.TMDB import TMDBManager
+
+EPISODES_PER_SERIES:int = 100
+SERIES_PER_BATCH:int = 200
+
+#------------------------------------ previous lookup path, kept here for comparison ------------------------------------
+def legacyFindSeries(database:Database, series_name:str) -> List[TMDB]:
+    session = database.getSession()
+    series_list:List[TMDB] = session.query(TMDB).filter(TMDB.search_string == series_name).all()
+    if not series_list:
+        series_list = session.query(TMDB).filter(TMDB.series_name == series_name).all()
+    session.close()
+    return series_list
+
+def fillLegacyTable(database:Database, manager:TMDBManager, series_count:int) -> None:
+    connection = database.engine.connect()
+    for first in range(0, series_count, SERIES_PER_BATCH):
+        rows:List[dict] = []
+        for s in range(first, min(first + SERIES_PER_BATCH, series_count)):
+            rows += manager.buildRows(buildSeriesData(1000 + s, EPISODES_PER_SERIES), f"series {s}")
+        with connection.begin():
+            connection.execute(TMDB.__table__.insert(), rows)
+    connection.close()
+
+def measure(label:str, lookup, names:List[str]) -> None:
+    latencies:List[float] = []
+    rows:int = 0
+    for name in names:
+        start:float = time.perf_counter()
+        rows += len(lookup(name))
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(f"{label:<12} {len(names):>5} lookups  {rows/len(names):>6.0f} rows each  median {statistics.median(latencies):>9.3f}ms  "
+          f"p95 {latencies[int(len(latencies)*0.95)-1]:>9.3f}ms  max {latencies[-1]:>9.3f}ms")
+
+if __name__ == "__main__":
+    episode_count:int = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    lookup_count:int = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    series_count:int = max(1, episode_count // EPISODES_PER_SERIES)
+    names:List[str] = [f"series {s}" for s in random.Random(0).sample(range(series_count), min(lookup_count, series_count))]
+    with tempfile.TemporaryDirectory() as directory:
+        database:Database = Database(db_path=os.path.join(directory, "bench.db"))
+        database.logging = False
+        manager:TMDBManager = TMDBManager(database, "")
+        manager.logging = False
+        manager.filter.logging = False
+        start:float = time.perf_counter()
+        fillLegacyTable(database, manager, series_count)
+        print(f"filled {series_count * EPISODES_PER_SERIES:,} legacy rows in {time.perf_counter() - start:.1f}s")
+        measure("legacy", lambda name: legacyFindSeries(database, name), names)
+        start = time.perf_counter()
+        moved:int = database.migrateLegacyRows()
+        print(f"migrated {moved:,} rows in {time.perf_counter() - start:.1f}s")
+        measure("normalised", manager.getSeries, names)
+        database.close()
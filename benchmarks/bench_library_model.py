@@ -0,0 +1,104 @@
+"""Benchmark: memory and construction speed of the library tree (Series/Season/Episode).
+Compares the slotted classes in Classes/LocalFile.py against the previous design, which built a full Filter
+(LoggableClass) per object.  Run from the repository root:  python benchmarks/bench_library_model.py [episodes]"""
+import os
+import sys
+import time
+import tracemalloc
+import colorama
+from typing import List
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Classes.Filters import Filter
+from Classes.LocalFile import Series, Season, Episode
+
+#------------------------------------ previous classes, kept here for comparison ------------------------------------
+class LegacyLocalFile:
+    def __init__(self,name_on_disc:str):
+        self.name_on_disc:str = name_on_disc
+        self.formatted_name:str = ""
+        self.proposed_name:str = ""
+        self.filepath:str = ""
+        self.filter:Filter = Filter(logging=False)
+
+class LegacySeries(LegacyLocalFile):
+    def __init__(self,name:str):
+        super().__init__(name)
+        self.seasons:List[LegacySeason] = []
+        self.formatted_name = self.filter.seriesName(self.name_on_disc)
+
+class LegacySeason(LegacyLocalFile):
+    def __init__(self,name:str):
+        super().__init__(name)
+        self.episodes:List[LegacyEpisode] = []
+        self.formatted_name = self.filter.seasonName(self.name_on_disc)
+        self.season_number:int = self.filter.determineSeasonNumber(self.formatted_name)
+
+class LegacyEpisode(LegacyLocalFile):
+    def __init__(self,name:str):
+        super().__init__(name)
+        self.extension:str = ""
+        self.original_name:str = ""
+        self.formatted_name:str = self.filter.episodeName(self.original_name)
+
+#------------------------------------ builders ------------------------------------
+SEASONS_PER_SERIES:int = 5
+EPISODES_PER_SEASON:int = 20
+ROOT:str = os.path.join(os.sep, "media", "tv shows")
+
+def buildLegacy(series_count:int) -> List[LegacySeries]:
+    library:List[LegacySeries] = []
+    for s in range(series_count):
+        series = LegacySeries(f"Some Show {s} (2004)")
+        series.filepath = os.path.join(ROOT, series.name_on_disc)
+        for n in range(1, SEASONS_PER_SERIES+1):
+            season = LegacySeason(f"Season {n}")
+            season.filepath = os.path.join(series.filepath, season.name_on_disc)
+            for e in range(1, EPISODES_PER_SEASON+1):
+                name:str = f"Some Show {s} - S{n:02d}E{e:02d} - Episode Title.mkv"
+                episode = LegacyEpisode(name)
+                episode.filepath = os.path.join(season.filepath, name)
+                episode.original_name, episode.extension = name.rsplit(".", 1)
+                season.episodes.append(episode)
+            series.seasons.append(season)
+        library.append(series)
+    return library
+
+def buildCompact(series_count:int) -> List[Series]:
+    library:List[Series] = []
+    for s in range(series_count):
+        series = Series(f"Some Show {s} (2004)")
+        series.filepath = os.path.join(ROOT, series.name_on_disc)
+        for n in range(1, SEASONS_PER_SERIES+1):
+            season = Season(f"Season {n}", parent=series)
+            for e in range(1, EPISODES_PER_SEASON+1):
+                season.episodes.append(Episode(f"Some Show {s} - S{n:02d}E{e:02d} - Episode Title.mkv", parent=season))
+            series.seasons.append(season)
+        library.append(series)
+    return library
+
+def measure(label:str, builder, series_count:int) -> None:
+    episodes:int = series_count * SEASONS_PER_SERIES * EPISODES_PER_SEASON
+    objects:int = series_count * (1 + SEASONS_PER_SERIES * (1 + EPISODES_PER_SEASON))
+    #speed (without tracemalloc overhead)
+    start:float = time.perf_counter()
+    library = builder(series_count)
+    elapsed:float = time.perf_counter() - start
+    del library
+    #memory
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    library = builder(series_count)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del library
+    print(f"{label:<8} {episodes:>9,} episodes  {(after-before)/episodes:>8,.0f} bytes/episode  "
+          f"{objects/elapsed:>10,.0f} objects/s  ({elapsed:.2f}s)")
+
+if __name__ == "__main__":
+    #the old design called colorama.init() per object, which re-wraps a non-tty stdout until the stack overflows,
+    #so it is skipped here.  Legacy numbers are a lower bound.
+    colorama.init = lambda *args, **kwargs: None
+    episode_target:int = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    series_count:int = max(1, episode_target // (SEASONS_PER_SERIES * EPISODES_PER_SEASON))
+    measure("legacy", buildLegacy, series_count)
+    measure("compact", buildCompact, series_count)
@@ -0,0 +1,73 @@
+"""Benchmark: season/episode name parsing.
+Compares Classes/NameParser.py (one precompiled regex pass, memoised) against the previous LST.__getSeasonNumber
+logic, using the names in benchmarks/name_corpus.txt.  Run from the repository root:  python benchmarks/bench_name_parser.py"""
+import os
+import sys
+import time
+from typing import List
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Classes import NameParser
+
+CORPUS_PATH:str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "name_corpus.txt")
+ROUNDS:int = 2000
+
+#------------------------------------ previous season number logic, kept here for comparison ------------------------------------
+NUMBER_TEXT:List[str] = ["one","two","three","four","five","six","seven","eight","nine","ten","eleven","twelve","thirteen","fourteen",
+                         "fifteen","sixteen","seventeen","eighteen","nineteen","twenty"]
+
+def legacySeasonNumber(season_string:str) -> int:
+    if season_string.__contains__(" "):
+        possible_number:str = season_string.rsplit(" ")[1]
+        if possible_number.isdigit():
+            return int(possible_number)
+    if season_string.lower().__contains__("season"):
+        possible_number:str = season_string.lower().split("season")[1]
+        if possible_number.isdigit():
+            return int(possible_number)
+    for i in range(0,len(NUMBER_TEXT)):
+        if season_string.lower().__contains__(NUMBER_TEXT[i]):
+            return i+1
+    digits:List[str] = []
+    for i in range(len(season_string)-1,-1,-1):
+        if season_string[i].isdigit():
+            digits.append(season_string[i])
+        else:
+            break
+    digits.reverse()
+    if "".join(digits).isdigit():
+        return int("".join(digits))
+    digits = []
+    for i in range(0,len(season_string)):
+        if season_string[i].isdigit():
+            digits.append(season_string[i])
+        else:
+            break
+    if "".join(digits).isdigit():
+        return int("".join(digits))
+    digits = [char for char in season_string if char.isdigit()]
+    if "".join(digits).isdigit():
+        return int("".join(digits))
+    return -1
+
+def loadCorpus() -> List[str]:
+    with open(CORPUS_PATH, 'r', encoding='utf-8') as f:
+        return [line.rstrip("\n") for line in f if line.strip() and not line.startswith("#")]
+
+def measure(label:str, function, names:List[str]) -> None:
+    start:float = time.perf_counter()
+    for i in range(ROUNDS):
+        for name in names:
+            function(name)
+    elapsed:float = time.perf_counter() - start
+    print(f"{label:<28} {ROUNDS*len(names)/elapsed:>12,.0f} parses/s")
+
+if __name__ == "__main__":
+    names:List[str] = loadCorpus()
+    measure("legacy season number", legacySeasonNumber, names)
+    measure("parseName (uncached)", NameParser.parseNameUncached, names)
+    NameParser.clearCache()
+    measure("parseName (memoised)", NameParser.parseName, names)
+    print("")
+    for name in names:
+        parsed = NameParser.parseName(name)
+        print(f"{name:<60} season={parsed.season:<5} episode={parsed.episode:<4} end={parsed.end_episode:<4} year={parsed.year}")
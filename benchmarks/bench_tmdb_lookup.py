@@ -0,0 +1,45 @@
+"""Benchmark: cold TMDB lookup throughput, against the local stand-in server (benchmarks/fake_tmdb.py), no network needed.
+Looks up every synthetic series with API.getManySeriesData, first one request at a time, then with the configured
+concurrency.  The stand-in adds latency and enforces a rate limit, so the concurrent run should be bound by the rate limit.
+Run from the repository root:  python benchmarks/bench_tmdb_lookup.py [series] [latency seconds] [rate limit]"""
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_tmdb import FakeTMDB, SyntheticFixtures
+from Classes.TMDB import API
+from Classes.RateLimiter import RateLimiter
+
+def run(label:str, server:FakeTMDB, names, max_concurrency:int, rate_limit:float) -> None:
+    api:API = API(api_key="benchmark",
+                  api_url=server.getApiUrl(),
+                  max_concurrency=max_concurrency,
+                  rate_limiter=RateLimiter(rate=rate_limit,burst=max(1,int(rate_limit/2))),
+                  logging=False,
+                  logging_warnings=False)
+    requests_before:int = server.requests
+    start:float = time.perf_counter()
+    results = api.getManySeriesData(names)
+    elapsed:float = time.perf_counter() - start
+    found:int = sum(1 for data in results.values() if data)
+    episodes:int = sum(len(season['episodes']) for data in results.values() if data for season in data['seasons'])
+    requests:int = server.requests - requests_before
+    opened, reused = api.getConnectionCounts()
+    print(f"{label:<12} {found:>5}/{len(names)} series  {episodes:>7,} episodes  {requests:>6} requests  "
+          f"{elapsed:>7.2f}s  {len(names)/elapsed:>7.1f} series/s  {requests/elapsed:>6.1f} req/s  "
+          f"throttled {api.rate_limiter.getThrottledSeconds():.1f}s  429s {api.getStats().rate_limited}  "
+          f"connections {opened} (+{reused} reused)")
+    api.close()
+
+if __name__ == "__main__":
+    series_count:int = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency:float = float(sys.argv[2]) if len(sys.argv) > 2 else 0.04
+    rate_limit:float = float(sys.argv[3]) if len(sys.argv) > 3 else 40.0
+    fixtures:SyntheticFixtures = SyntheticFixtures(series_count)
+    names = fixtures.getNames()
+    #the server allows a little more than the client limiter, as TMDB does, so 429s only come from bursts
+    with FakeTMDB(fixtures, latency=latency, jitter=latency/4, rate_limit=rate_limit*1.25) as server:
+        run("serial", server, names, max_concurrency=1, rate_limit=rate_limit)
+        run("concurrent", server, names, max_concurrency=16, rate_limit=rate_limit)
+        print(f"server: {server.getStats()}")
@@ -0,0 +1,420 @@
+"""Local stand-in for the TMDB API, for load tests and offline testing of Classes/TMDB.py.
+Serves /3/search/tv, /3/tv/{id} (with append_to_response=season/N,...), /3/tv/{id}/season/{n}, and the
+/3/tv/changes and /3/tv/{id}/changes feeds (fed by Fixtures.addEpisode), and images at /t/p/original/{path}, from either
+synthetic fixtures (generated from a seed) or fixtures recorded by the response cache (Classes/ResponseCache.py).
+Latency, jitter, server errors and 429 rate limiting can be injected.  Responses carry ETags and answer 304.
+Images are generated bytes (image_variants > 0 makes different paths share content), support Range requests, and
+image_truncate_rate drops that share of image downloads half way, to exercise resuming.
+
+Run from the repository root:
+    python benchmarks/fake_tmdb.py [--series 1000] [--port 8765] [--latency 0.04] [--rate-limit 40] [--recorded DIR]
+then set "api_url" in config.json to http://127.0.0.1:8765/3.  Or from Python:
+    server = FakeTMDB(SyntheticFixtures(series_count=1000)); server.start(); API(..., api_url=server.getApiUrl())"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import datetime
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from typing import List, Dict, Tuple
+import re as regex
+
+WORDS:List[str] = ["Last", "Northern", "Silent", "Broken", "Golden", "Hidden", "Lost", "Red", "Dark", "Bright", "Little",
+                   "Empire", "Kingdom", "Station", "Harbor", "Doctor", "Witness", "House", "River", "Office", "Signal",
+                   "Crown", "Line", "Garden", "Street", "Code", "Game", "Sky", "Forest", "Island"]
+SERIES_PATH = regex.compile(r"^/3/tv/(\d+)$")
+SEASON_PATH = regex.compile(r"^/3/tv/(\d+)/season/(\d+)$")
+CHANGES_PATH = regex.compile(r"^/3/tv/(\d+)/changes$")
+CHANGES_PER_PAGE:int = 100
+
+#------------------------------------ fixtures ------------------------------------
+class Fixtures:
+    """Fixture store the server reads from.  Series details hold no seasons, seasons are looked up separately."""
+    def __init__(self):
+        self.series:Dict[int,dict] = {}
+        """id -> /tv/{id} body"""
+        self.seasons:Dict[Tuple[int,int],dict] = {}
+        """(id, season number) -> /tv/{id}/season/{n} body"""
+        self.searches:Dict[str,List[dict]] = {}
+        """lowercased query -> search results, for queries with recorded answers"""
+        self.changes:List[Tuple[str,int,int]] = []
+        """(ISO date, series id, season number) for every change made with addEpisode"""
+        self.lock:threading.Lock = threading.Lock()
+
+    def search(self,query:str) -> List[dict]:
+        """Returns search results for a query: recorded results, else series whose name contains the query"""
+        key:str = " ".join(query.lower().split())
+        if key in self.searches:
+            return self.searches[key]
+        exact:List[dict] = []
+        partial:List[dict] = []
+        for series in self.series.values():
+            name:str = series['name'].lower()
+            if name == key:
+                exact.append(series)
+            elif key and key in name:
+                partial.append(series)
+        return [self.__summary(series) for series in (exact + partial)[:20]]
+
+    def getSeries(self,series_id:int) -> dict or None:
+        return self.series.get(series_id,None)
+
+    def getSeason(self,series_id:int,season_number:int) -> dict or None:
+        return self.seasons.get((series_id,season_number),None)
+
+    def addEpisode(self,series_id:int,new_season:bool = False,date:str = None) -> Tuple[int,int]:
+        """Adds an episode to the latest season of a series (or starts a new season) and records it in the changes
+        feeds under date (default today).  Returns (season number, episode number)."""
+        with self.lock:
+            series:dict = self.series[series_id]
+            season_number:int = series['number_of_seasons'] + (1 if new_season else 0)
+            season:dict = self.seasons.setdefault((series_id,season_number),{'_id':f"season-{series_id}-{season_number}",
+                                                                             'id':series_id*100 + season_number,
+                                                                             'season_number':season_number,
+                                                                             'name':f"Season {season_number}",
+                                                                             'episodes':[]})
+            episode_number:int = len(season['episodes']) + 1
+            season['episodes'] = season['episodes'] + [{'id':series_id*10000 + season_number*100 + episode_number,
+                                                         'name':f"Episode {episode_number}",
+                                                         'episode_number':episode_number,
+                                                         'season_number':season_number,
+                                                         'overview':f"New episode {episode_number} of season {season_number}.",
+                                                         'still_path':f"/still_{series_id}_{season_number}_{episode_number}.jpg"}]
+            series['number_of_seasons'] = season_number
+            series['number_of_episodes'] = series.get('number_of_episodes',0) + 1
+            self.changes.append((date or datetime.date.today().isoformat(),series_id,season_number))
+            return season_number, episode_number
+
+    def getChanges(self,start_date:str,end_date:str,series_id:int = None) -> List[Tuple[str,int,int]]:
+        """Returns the changes between the dates (inclusive), optionally for one series"""
+        with self.lock:
+            return [change for change in self.changes if start_date <= change[0] <= end_date and series_id in (None,change[1])]
+
+    def __summary(self,series:dict) -> dict:
+        """Returns the fields /search/tv results carry"""
+        return {key:series.get(key,None) for key in ('id','name','original_name','overview','poster_path','first_air_date')}
+
+class SyntheticFixtures(Fixtures):
+    """series_count generated shows with 1-max_seasons seasons of 6-24 episodes.  The same seed gives the same shows."""
+    def __init__(self,series_count:int = 1000,max_seasons:int = 30,seed:int = 1):
+        super().__init__()
+        rng:random.Random = random.Random(seed)
+        for index in range(series_count):
+            series_id:int = 1000 + index
+            name:str = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {index}"
+            #most shows are short, a few run for decades
+            season_count:int = min(max_seasons,1 + int(rng.expovariate(1/3)))
+            episode_total:int = 0
+            for season_number in range(1,season_count+1):
+                episodes:List[dict] = []
+                for episode_number in range(1,rng.randint(6,24)+1):
+                    episodes.append({'id':series_id*10000 + season_number*100 + episode_number,
+                                     'name':f"Episode {episode_number}",
+                                     'episode_number':episode_number,
+                                     'season_number':season_number,
+                                     'overview':f"Episode {episode_number} of season {season_number} of {name}.",
+                                     'still_path':f"/still_{series_id}_{season_number}_{episode_number}.jpg"})
+                episode_total += len(episodes)
+                self.seasons[(series_id,season_number)] = {'_id':f"season-{series_id}-{season_number}",
+                                                           'id':series_id*100 + season_number,
+                                                           'season_number':season_number,
+                                                           'name':f"Season {season_number}",
+                                                           'episodes':episodes}
+            self.series[series_id] = {'id':series_id,
+                                      'name':name,
+                                      'original_name':name,
+                                      'overview':f"Overview of {name}.",
+                                      'poster_path':f"/poster_{series_id}.jpg",
+                                      'first_air_date':f"{rng.randint(1960,2023)}-01-01",
+                                      'number_of_seasons':season_count,
+                                      'number_of_episodes':episode_total,
+                                      'last_air_date':"2024-01-01"}
+
+    def getNames(self) -> List[str]:
+        """Returns every series name, for driving lookups"""
+        return [series['name'] for series in self.series.values()]
+
+class RecordedFixtures(Fixtures):
+    """Fixtures read back from a response cache directory (see Classes/ResponseCache.py), so real TMDB answers
+    recorded during a normal run can be replayed.  Appended seasons in /tv/{id} bodies are split back out."""
+    def __init__(self,directory:str):
+        super().__init__()
+        for folder, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if filename.endswith(".json"):
+                    self.__load(os.path.join(folder,filename))
+
+    def __load(self,filepath:str) -> None:
+        try:
+            with open(filepath,'r',encoding='utf-8') as f:
+                data:dict = json.load(f)
+            parts = urlsplit(data['url'])
+            body:dict = data['body']
+        except (OSError,ValueError,KeyError):
+            return
+        path:str = regex.sub(r"^/\d+","",parts.path)
+        if path == "/search/tv":
+            query:str = parse_qs(parts.query).get('query',[""])[0]
+            self.searches[" ".join(query.lower().split())] = body.get('results',[])
+            return
+        match = regex.match(r"^/tv/(\d+)$",path)
+        if match is not None:
+            series_id:int = int(match.group(1))
+            for key in [key for key in body if key.startswith("season/")]:
+                self.seasons[(series_id,int(key.split("/")[1]))] = body.pop(key)
+            self.series[series_id] = body
+            return
+        match = regex.match(r"^/tv/(\d+)/season/(\d+)$",path)
+        if match is not None:
+            self.seasons[(int(match.group(1)),int(match.group(2)))] = body
+
+#------------------------------------ server ------------------------------------
+class FakeTMDB:
+    """Threaded HTTP server answering TMDB requests from fixtures.
+    latency/jitter: seconds added to every response.  error_rate: share of requests answered 500.
+    rate_limit: requests per second before answering 429 (0 for no limit).  throttle_rate: share of requests answered 429 at random."""
+    def __init__(self,fixtures:Fixtures,host:str = "127.0.0.1",port:int = 0,latency:float = 0.0,jitter:float = 0.0,
+                 error_rate:float = 0.0,rate_limit:float = 0.0,throttle_rate:float = 0.0,retry_after:int = 1,seed:int = 1,
+                 image_size:int = 64*1024,image_variants:int = 0,image_truncate_rate:float = 0.0):
+        self.fixtures:Fixtures = fixtures
+        self.latency:float = latency
+        self.jitter:float = jitter
+        self.error_rate:float = error_rate
+        self.rate_limit:float = rate_limit
+        self.throttle_rate:float = throttle_rate
+        self.retry_after:int = retry_after
+        self.random:random.Random = random.Random(seed)
+        self.image_size:int = image_size
+        self.image_variants:int = image_variants
+        self.image_truncate_rate:float = image_truncate_rate
+        self.lock:threading.Lock = threading.Lock()
+        #stats
+        self.requests:int = 0
+        self.errors:int = 0
+        self.throttled:int = 0
+        self.not_modified:int = 0
+        self.image_bytes:int = 0
+        self.truncated:int = 0
+        self.paths:Dict[str,int] = {}
+        """Requests per endpoint"""
+        #rate limit window
+        self.window_start:float = 0.0
+        self.window_count:int = 0
+        self.server:ThreadingHTTPServer = ThreadingHTTPServer((host,port),self.__makeHandler())
+        self.server.daemon_threads = True
+        self.thread:threading.Thread = None
+
+    def start(self) -> str:
+        """Starts serving on a background thread.  Returns the api url"""
+        self.thread = threading.Thread(target=self.server.serve_forever,name="fake-tmdb",daemon=True)
+        self.thread.start()
+        return self.getApiUrl()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def getApiUrl(self) -> str:
+        """Returns the url to use as API.api_url"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/3"
+
+    def getImageUrl(self) -> str:
+        """Returns the url to use as API.api_image_url / ArtworkCache image_url"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/t/p/original"
+
+    def getImage(self,image_path:str) -> bytes:
+        """Returns the generated bytes for an image path"""
+        seed:str = image_path
+        if self.image_variants > 0:
+            seed = str(int(hashlib.md5(image_path.encode('utf-8')).hexdigest(),16) % self.image_variants)
+        block:bytes = hashlib.sha256(seed.encode('utf-8')).digest()
+        return (block * (self.image_size // len(block) + 1))[:self.image_size]
+
+    def __enter__(self) -> "FakeTMDB":
+        self.start()
+        return self
+
+    def __exit__(self,*args) -> None:
+        self.stop()
+
+    def route(self,path:str,query:Dict[str,List[str]]) -> Tuple[int,dict]:
+        """Returns (status, body) for a request"""
+        if path == "/3/search/tv":
+            return 200, {'page':1,'results':self.fixtures.search(query.get('query',[""])[0])}
+        start_date:str = query.get('start_date',["0000-00-00"])[0]
+        end_date:str = query.get('end_date',["9999-99-99"])[0]
+        if path == "/3/tv/changes":
+            series_ids:List[int] = sorted(set(change[1] for change in self.fixtures.getChanges(start_date,end_date)))
+            page:int = int(query.get('page',["1"])[0])
+            total_pages:int = max(1,(len(series_ids) + CHANGES_PER_PAGE - 1) // CHANGES_PER_PAGE)
+            results:List[dict] = [{'id':series_id,'adult':False} for series_id in series_ids[(page-1)*CHANGES_PER_PAGE:page*CHANGES_PER_PAGE]]
+            return 200, {'results':results,'page':page,'total_pages':total_pages,'total_results':len(series_ids)}
+        match = CHANGES_PATH.match(path)
+        if match is not None:
+            items:List[dict] = [{'id':f"{date}-{index}",'action':"updated",'time':f"{date} 00:00:00 UTC",
+                                 'value':{'season_id':series_id*100 + season_number,'season_number':season_number}}
+                                for index, (date, series_id, season_number) in enumerate(self.fixtures.getChanges(start_date,end_date,int(match.group(1))))]
+            return 200, {'changes':[{'key':"season",'items':items}] if items else []}
+        match = SERIES_PATH.match(path)
+        if match is not None:
+            series_id:int = int(match.group(1))
+            series:dict = self.fixtures.getSeries(series_id)
+            if series is None:
+                return 404, {'status_code':34,'status_message':"The resource you requested could not be found."}
+            body:dict = dict(series)
+            appended:List[str] = query.get('append_to_response',[""])[0].split(",")
+            for key in [key for key in appended if key][:20]:
+                if key.startswith("season/") and key[7:].isdigit():
+                    season:dict = self.fixtures.getSeason(series_id,int(key[7:]))
+                    if season is not None:
+                        body[key] = season
+            return 200, body
+        match = SEASON_PATH.match(path)
+        if match is not None:
+            season:dict = self.fixtures.getSeason(int(match.group(1)),int(match.group(2)))
+            if season is not None:
+                return 200, season
+        return 404, {'status_code':34,'status_message':"The resource you requested could not be found."}
+
+    def injectFailure(self) -> int or None:
+        """Returns 429 or 500 if this request should fail, counting the request against the rate limit"""
+        with self.lock:
+            self.requests += 1
+            if self.rate_limit > 0:
+                now:float = time.monotonic()
+                if now - self.window_start >= 1.0:
+                    self.window_start = now
+                    self.window_count = 0
+                self.window_count += 1
+                if self.window_count > self.rate_limit:
+                    self.throttled += 1
+                    return 429
+            if self.throttle_rate > 0 and self.random.random() < self.throttle_rate:
+                self.throttled += 1
+                return 429
+            if self.error_rate > 0 and self.random.random() < self.error_rate:
+                self.errors += 1
+                return 500
+            return None
+
+    def getDelay(self) -> float:
+        """Returns the latency to add to this response"""
+        with self.lock:
+            return max(0.0,self.latency + self.random.uniform(-self.jitter,self.jitter))
+
+    def __makeHandler(self):
+        fake:FakeTMDB = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                with fake.lock:
+                    endpoint:str = regex.sub(r"\d+","{n}",parts.path)
+                    fake.paths[endpoint] = fake.paths.get(endpoint,0) + 1
+                time.sleep(fake.getDelay())
+                if parts.path.startswith("/t/p/"):
+                    self.sendImage(parts.path.split("/",4)[-1])
+                    return
+                failure:int = fake.injectFailure()
+                if failure == 429:
+                    self.send(429,{'status_code':25,'status_message':"Your request count is over the allowed limit."},{'Retry-After':str(fake.retry_after)})
+                    return
+                if failure == 500:
+                    self.send(500,{'status_code':11,'status_message':"Internal error."})
+                    return
+                status, body = fake.route(parts.path,parse_qs(parts.query))
+                self.send(status,body)
+
+            def send(self,status:int,body:dict,headers:Dict[str,str] = None):
+                data:bytes = json.dumps(body).encode('utf-8')
+                etag:str = f'"{hashlib.md5(data).hexdigest()}"'
+                if status == 200 and self.headers.get('If-None-Match',None) == etag:
+                    with fake.lock:
+                        fake.not_modified += 1
+                    status, data = 304, b""
+                self.send_response(status)
+                self.send_header('Content-Type','application/json;charset=utf-8')
+                self.send_header('Content-Length',str(len(data)))
+                if status in (200,304):
+                    self.send_header('ETag',etag)
+                for name, value in (headers or {}).items():
+                    self.send_header(name,value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def sendImage(self,name:str):
+                data:bytes = fake.getImage("/" + name)
+                start:int = 0
+                match = regex.match(r"bytes=(\d+)-$",self.headers.get('Range',""))
+                if match is not None:
+                    start = int(match.group(1))
+                    if start >= len(data):
+                        self.send_response(416)
+                        self.send_header('Content-Range',f"bytes */{len(data)}")
+                        self.send_header('Content-Length',"0")
+                        self.end_headers()
+                        return
+                self.send_response(206 if start else 200)
+                self.send_header('Content-Type','image/jpeg')
+                self.send_header('Content-Length',str(len(data) - start))
+                if start:
+                    self.send_header('Content-Range',f"bytes {start}-{len(data)-1}/{len(data)}")
+                self.end_headers()
+                with fake.lock:
+                    truncate:bool = fake.image_truncate_rate > 0 and fake.random.random() < fake.image_truncate_rate
+                    if truncate:
+                        fake.truncated += 1
+                body:bytes = data[start:]
+                if truncate:
+                    #send half, then drop the connection
+                    self.wfile.write(body[:len(body)//2])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    self.connection.shutdown(2)
+                    body = body[:len(body)//2]
+                else:
+                    self.wfile.write(body)
+                with fake.lock:
+                    fake.image_bytes += len(body)
+
+            def log_message(self,*args):
+                pass
+
+        return Handler
+
+    def getStats(self) -> str:
+        with self.lock:
+            endpoints:str = ", ".join(f"{endpoint}: {count}" for endpoint, count in sorted(self.paths.items()))
+            return (f"{self.requests} requests, {self.throttled} throttled, {self.errors} errors, {self.not_modified} not modified, "
+                    f"{self.image_bytes} image bytes, {self.truncated} truncated ({endpoints})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the TMDB API")
+    parser.add_argument("--port",type=int,default=8765)
+    parser.add_argument("--series",type=int,default=1000,help="number of synthetic series")
+    parser.add_argument("--seed",type=int,default=1)
+    parser.add_argument("--recorded",default=None,help="response cache folder to replay instead of synthetic series")
+    parser.add_argument("--latency",type=float,default=0.04)
+    parser.add_argument("--jitter",type=float,default=0.01)
+    parser.add_argument("--error-rate",type=float,default=0.0)
+    parser.add_argument("--rate-limit",type=float,default=40.0,help="requests per second before 429 (0 for no limit)")
+    parser.add_argument("--throttle-rate",type=float,default=0.0,help="share of requests answered 429 at random")
+    args = parser.parse_args()
+    fixtures:Fixtures = RecordedFixtures(args.recorded) if args.recorded else SyntheticFixtures(args.series,seed=args.seed)
+    server = FakeTMDB(fixtures,port=args.port,latency=args.latency,jitter=args.jitter,error_rate=args.error_rate,
+                      rate_limit=args.rate_limit,throttle_rate=args.throttle_rate,seed=args.seed)
+    print(f"Serving {len(fixtures.series)} series at {server.getApiUrl()}  (Ctrl+C to stop)")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        print(server.getStats())
+        sys.exit(0)
@@ -0,0 +1,55 @@
+"""Resumed artwork downloads (Classes/Artwork.py), using the local stand-in server from benchmarks/fake_tmdb.py."""
+import os
+import sys
+import shutil
+import hashlib
+import tempfile
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from fake_tmdb import FakeTMDB, Fixtures
+from Classes.Artwork import ArtworkCache
+
+IMAGE_PATH:str = "/poster.jpg"
+
+class TestResumedDownload(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = FakeTMDB(Fixtures(), image_size=4096)
+        self.server.start()
+        self.cache = ArtworkCache(self.directory, image_url=self.server.getImageUrl(), logging=False, logging_warnings=False,
+                                  logging_errors=False)
+        self.image = self.server.getImage(IMAGE_PATH)
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def writePartial(self, data:bytes) -> None:
+        os.makedirs(self.cache.partial_directory, exist_ok=True)
+        partial_path = os.path.join(self.cache.partial_directory, hashlib.sha256(IMAGE_PATH.encode('utf-8')).hexdigest() + ".part")
+        with open(partial_path, 'wb') as f:
+            f.write(data)
+
+    def assertStoredImage(self, local_path:str) -> None:
+        self.assertIsNotNone(local_path)
+        with open(local_path, 'rb') as f:
+            self.assertEqual(f.read(), self.image)
+
+    def test_resumes_partial(self):
+        self.writePartial(self.image[:1000])
+        self.assertStoredImage(self.cache.downloadImage(IMAGE_PATH))
+        self.assertEqual(self.cache.stats.resumed, 1)
+
+    def test_complete_partial_is_stored(self):
+        self.writePartial(self.image)
+        self.assertStoredImage(self.cache.downloadImage(IMAGE_PATH))
+
+    def test_partial_longer_than_image_restarts(self):
+        #416 with a different full size: the partial is from another version of the image
+        self.writePartial(self.image + b"stale bytes")
+        self.assertStoredImage(self.cache.downloadImage(IMAGE_PATH))
+        self.assertEqual(self.cache.stats.failed, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Moving an older cache database to the normalised series/season/episode tables (Database.migrateLegacyRows,
+dropTruncatedSeries and upgradeEpisodeIndex)."""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from sqlalchemy import text
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Classes.Database import Database, TMDB, EPISODE_INDEX
+
+def buildRows(series_id:int, name:str, seasons:int = 2, episodes:int = 3, truncated:bool = False) -> list:
+    """Returns flat rows of a series.  truncated gives them the db_id older versions built ('-None', one row per season)."""
+    rows = []
+    for season_number in range(1, seasons+1):
+        for episode_number in range(1, (1 if truncated else episodes) + 1):
+            rows.append({'db_id':f"{series_id}-season-{series_id}-{season_number}-None" if truncated else f"{series_id}-{season_number}-{episode_number}",
+                         'episode_name':f"{name} {season_number}x{episode_number}", 'episode_id':str(series_id*1000 + season_number*100 + episode_number),
+                         'episode_number':episode_number, 'episode_overview':"", 'episode_still_path':None, 'season_number':season_number,
+                         'season_id':f"season-{series_id}-{season_number}", 'number_of_episodes':seasons*episodes, 'series_name':name,
+                         'series_original_name':name, 'series_overview':"", 'series_poster_path':None, 'series_id':series_id,
+                         'number_of_seasons':seasons, 'search_string':name})
+    return rows
+
+class TestDatabaseMigration(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.database = self.open()
+
+    def tearDown(self):
+        self.database.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def open(self) -> Database:
+        database = Database(os.path.join(self.directory, "test.db"))
+        database.logging = database.log_warning = database.log_errors = False
+        return database
+
+    def insertLegacy(self, rows:list) -> None:
+        with self.database.engine.begin() as connection:
+            connection.execute(TMDB.__table__.insert(), rows)
+
+    def test_legacy_rows_are_moved(self):
+        self.insertLegacy(buildRows(100, "Complete Show") + buildRows(101, "Truncated Show", truncated=True))
+        self.assertEqual(self.database.migrateLegacyRows(), 8)
+        rows = self.database.getSeriesRows(100)
+        self.assertEqual(sorted((row.season_number, row.episode_number) for row in rows), [(s, e) for s in (1, 2) for e in (1, 2, 3)])
+        self.assertEqual(rows[0].db_id, f"100-{rows[0].season_number}-{rows[0].episode_number}")
+        #series with missing episodes are left to be fetched again
+        self.assertEqual(self.database.getSeriesRows(101), [])
+        self.assertEqual(self.database.getSeriesIdBySearchString("Complete Show"), 100)
+        self.assertEqual(self.database.findSeriesFuzzy("Complete.Show", limit=1)[0].series_id, 100)
+        #the legacy table is emptied, so later runs do nothing
+        self.assertEqual(self.database.migrateLegacyRows(), 0)
+
+    def test_truncated_series_are_dropped(self):
+        self.database.upsertTMDBRows(buildRows(100, "Complete Show"))
+        self.database.upsertTMDBRows(buildRows(101, "Truncated Show", truncated=True))
+        self.database.addAlias("truncated", "Truncated", 101)
+        self.assertEqual(self.database.dropTruncatedSeries(), 1)
+        self.assertEqual(self.database.getSeriesRows(101), [])
+        self.assertIsNone(self.database.getAliasSeriesId("truncated"))
+        self.assertEqual(len(self.database.getSeriesRows(100)), 6)
+        self.assertNotIn(101, [match.series_id for match in self.database.findSeriesFuzzy("Truncated Show")])
+
+    def test_episode_index_is_made_unique(self):
+        self.database.upsertTMDBRows(buildRows(100, "Complete Show"))
+        #an older database: a plain index, duplicate episode numbers and db_ids built from other ids
+        with self.database.engine.begin() as connection:
+            connection.execute(text(f"DROP INDEX {EPISODE_INDEX}"))
+            connection.execute(text(f"CREATE INDEX {EPISODE_INDEX} ON episode (series_id, season_number, episode_number)"))
+            connection.execute(text("UPDATE episode SET db_id = 'old-' || db_id"))
+            connection.execute(text("INSERT INTO episode (db_id, series_id, season_number, episode_number, episode_id, episode_name) "
+                                    "VALUES ('old-duplicate', 100, 1, 1, '9', 'Newer Name')"))
+        #opening the database upgrades it, once
+        self.database.close()
+        self.database = self.open()
+        self.assertFalse(self.database.upgradeEpisodeIndex())
+        rows = self.database.getSeriesRows(100)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(sorted(row.db_id for row in rows), sorted(f"100-{s}-{e}" for s in (1, 2) for e in (1, 2, 3)))
+        #the most recently written copy is kept
+        self.assertEqual([row.episode_name for row in rows if row.db_id == "100-1-1"], ["Newer Name"])
+
+if __name__ == "__main__":
+    unittest.main()
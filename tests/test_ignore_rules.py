@@ -0,0 +1,42 @@
+"""Skip rules and .ertignore layering (Classes/IgnoreRules.py)."""
+import os
+import sys
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Classes.IgnoreRules import IgnoreRules
+
+class TestIgnoreRules(unittest.TestCase):
+    def setUp(self):
+        self.rules = IgnoreRules(skip_patterns=["*.part"])
+
+    def test_defaults(self):
+        self.assertTrue(self.rules.isIgnored("Extras", is_directory=True))
+        self.assertTrue(self.rules.isIgnored("poster.JPG"))
+        self.assertTrue(self.rules.isIgnored("download.part"))
+        self.assertTrue(self.rules.isIgnored(".ertignore"))
+        self.assertFalse(self.rules.isIgnored("S01E01.mkv"))
+
+    def test_no_rules_returns_self(self):
+        self.assertIs(self.rules.extend(["# comment", "", "   "]), self.rules)
+
+    def test_negation(self):
+        child = self.rules.extend(["featurettes", "!extras"])
+        self.assertTrue(child.isIgnored("Featurettes", is_directory=True))
+        self.assertFalse(child.isIgnored("Extras", is_directory=True))
+        #later rules win, so a child directory can ignore it again
+        self.assertTrue(child.extend(["extras"]).isIgnored("Extras", is_directory=True))
+
+    def test_directories_only(self):
+        child = self.rules.extend(["behind the scenes/"])
+        self.assertTrue(child.isIgnored("Behind the Scenes", is_directory=True))
+        self.assertFalse(child.isIgnored("Behind the Scenes", is_directory=False))
+
+    def test_combined_regex(self):
+        child = self.rules.extend(["a*"])
+        self.assertIsNotNone(child.rules_regex)
+        self.assertTrue(child.isIgnored("abc"))
+        self.assertIsNone(child.extend(["!abc"]).rules_regex)
+        self.assertFalse(child.extend(["!abc"]).isIgnored("abc"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""Season/episode/year parsing and series name normalisation (Classes/NameParser.py)."""
+import os
+import sys
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Classes.NameParser import ParsedName, parseName, parseSeasonNumber, normaliseSeriesName, splitSeriesQualifier
+
+class TestParseName(unittest.TestCase):
+    def test_season_episode_markers(self):
+        self.assertEqual(parseName("Show.S01E02.720p.mkv"), ParsedName(1, 2, -1, -1))
+        self.assertEqual(parseName("Show - 2x05 - Title.avi"), ParsedName(2, 5, -1, -1))
+        self.assertEqual(parseName("Season 2 Episode 4"), ParsedName(2, 4, -1, -1))
+        self.assertEqual(parseName("Episode 7"), ParsedName(-1, 7, -1, -1))
+
+    def test_multi_episode_range(self):
+        self.assertEqual(parseName("Show S01E01-E02.mkv"), ParsedName(1, 1, 2, -1))
+        #a resolution or an end episode too far away is not a range
+        self.assertEqual(parseName("Show S01E01 - 720p"), ParsedName(1, 1, -1, -1))
+        self.assertEqual(parseName("Show S01E01-E40"), ParsedName(1, 1, -1, -1))
+
+    def test_year_and_resolution(self):
+        self.assertEqual(parseName("Show (2019) S03E04"), ParsedName(3, 4, -1, 2019))
+        self.assertEqual(parseName("Show.1080p.mkv"), ParsedName())
+
+class TestParseSeasonNumber(unittest.TestCase):
+    def test_season_folders(self):
+        cases = {"Season 1 - 1080p":1, "Season 3":3, "Season 10":10, "S03":3, "Series Three":3, "Staffel 2":2,
+                 "Book 3":3, "3":3, "03 - Extras":3, "2019":2019}
+        for folder, season in cases.items():
+            with self.subTest(folder=folder):
+                self.assertEqual(parseSeasonNumber(folder), season)
+
+    def test_not_a_season(self):
+        self.assertEqual(parseSeasonNumber("Extras (2019)"), -1)
+        self.assertEqual(parseSeasonNumber("Specials"), -1)
+
+class TestNormaliseSeriesName(unittest.TestCase):
+    def test_normalised_words(self):
+        self.assertEqual(normaliseSeriesName("Law & Order"), "law and order")
+        self.assertEqual(normaliseSeriesName("Marvel's Agents of S.H.I.E.L.D."), "marvels agents of shield")
+        self.assertEqual(normaliseSeriesName("This Is Us"), "this is us")
+
+    def test_qualifiers(self):
+        self.assertEqual(normaliseSeriesName("The Office (US)"), "office (us)")
+        self.assertEqual(normaliseSeriesName("Shameless UK"), "shameless (uk)")
+        self.assertEqual(normaliseSeriesName("Ghosts (2021) (US)"), "ghosts (2021 us)")
+
+    def test_split_qualifier(self):
+        self.assertEqual(splitSeriesQualifier("ghosts (2021 us)"), ("ghosts", "2021 us"))
+        self.assertEqual(splitSeriesQualifier("this is us"), ("this is us", ""))
+
+if __name__ == "__main__":
+    unittest.main()
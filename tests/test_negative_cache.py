@@ -0,0 +1,79 @@
+"""Negative cache of series TMDB could not match (Database negative results, TMDBManager.getSeries/getManySeries), using
+the local stand-in server from benchmarks/fake_tmdb.py."""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from fake_tmdb import FakeTMDB, Fixtures
+from Classes.Database import Database
+from Classes.TMDB import TMDBManager, API, FAILURE_NO_RESULTS
+from Classes.RateLimiter import RateLimiter
+
+class TestNegativeResults(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.database = Database(os.path.join(self.directory, "test.db"))
+        self.database.logging = False
+
+    def tearDown(self):
+        self.database.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_add_and_expire(self):
+        self.database.addNegativeResult("missing show", "Missing Show", FAILURE_NO_RESULTS, 60)
+        self.database.addNegativeResult("expired show", "Expired Show", FAILURE_NO_RESULTS, -1)
+        negative = self.database.getNegativeResult("missing show")
+        self.assertIsNotNone(negative)
+        self.assertEqual(negative.reason, FAILURE_NO_RESULTS)
+        self.assertIsNone(self.database.getNegativeResult("expired show"))
+        self.assertEqual([negative.db_id for negative in self.database.getNegativeResults()], ["missing show"])
+
+    def test_clear(self):
+        self.database.addNegativeResult("a", "A", FAILURE_NO_RESULTS, 60)
+        self.database.addNegativeResult("b", "B", FAILURE_NO_RESULTS, 60)
+        self.database.addNegativeResult("expired", "Expired", FAILURE_NO_RESULTS, -1)
+        #clearing one key also drops the expired entries
+        self.assertEqual(self.database.clearNegativeResults("a"), 2)
+        self.assertIsNone(self.database.getNegativeResult("a"))
+        self.assertEqual(self.database.clearNegativeResults(), 1)
+
+class TestNegativeLookups(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = FakeTMDB(Fixtures())
+        self.server.start()
+        self.database = Database(os.path.join(self.directory, "test.db"))
+        self.database.logging = False
+        api = API("test", api_url=self.server.getApiUrl(), rate_limiter=RateLimiter(1000, 100), logging=False, logging_warnings=False, logging_errors=False)
+        self.manager = TMDBManager(self.database, "test", api=api)
+        self.manager.logging = self.manager.log_warning = self.manager.log_errors = False
+        self.manager.filter.logging = False
+
+    def tearDown(self):
+        self.database.close()
+        self.server.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_failed_search_is_not_repeated(self):
+        self.assertEqual(self.manager.getSeries("No Such Show"), [])
+        requests = self.server.requests
+        self.assertEqual(self.manager.getSeries("No Such Show"), [])
+        self.assertEqual(self.server.requests, requests)
+        self.assertEqual(self.manager.negative_hits, 1)
+        self.assertEqual(self.database.getNegativeResult("no such show").reason, FAILURE_NO_RESULTS)
+        #clearing the entry searches again
+        self.assertEqual(self.manager.clearNegativeResults("No Such Show"), 1)
+        self.manager.getSeries("No Such Show")
+        self.assertGreater(self.server.requests, requests)
+
+    def test_concurrent_hits_are_counted(self):
+        names = [f"Missing Show {i}" for i in range(32)]
+        self.manager.getManySeries(names)
+        self.manager.getManySeries(names)
+        self.assertEqual(self.manager.negative_hits, len(names))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""Token bucket rate limiter (Classes/RateLimiter.py)."""
+import os
+import sys
+import time
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Classes.RateLimiter import RateLimiter
+
+class TestRateLimiter(unittest.TestCase):
+    def test_burst_then_rate(self):
+        limiter = RateLimiter(rate=50.0, burst=5)
+        for i in range(5):
+            self.assertEqual(limiter.acquire(), 0.0)
+        #the sixth waits for one token, 1/50s
+        waited = limiter.acquire()
+        self.assertGreater(waited, 0.0)
+        self.assertLess(waited, 0.1)
+        self.assertEqual(limiter.throttled_requests, 1)
+
+    def test_refill_is_capped_at_burst(self):
+        limiter = RateLimiter(rate=1000.0, burst=3)
+        time.sleep(0.05)
+        limiter.configure()
+        self.assertEqual(limiter.tokens, 3.0)
+
+    def test_pause_holds_everyone(self):
+        limiter = RateLimiter(rate=1000.0, burst=10)
+        limiter.pause(0.2)
+        start = time.monotonic()
+        limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+        self.assertEqual(limiter.pauses, 1)
+
+    def test_no_tokens_earned_while_paused(self):
+        limiter = RateLimiter(rate=10.0, burst=10)
+        limiter.pause(0.2)
+        time.sleep(0.25)
+        #only the ~0.05s since the pause ended counts, not the time paused
+        limiter.configure()
+        self.assertLess(limiter.tokens, 1.0)
+
+    def test_shorter_pause_keeps_the_longer_one(self):
+        limiter = RateLimiter()
+        limiter.pause(10.0)
+        paused_until = limiter.paused_until
+        limiter.pause(0.1)
+        self.assertEqual(limiter.paused_until, paused_until)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""On-disk cache of raw API responses (Classes/ResponseCache.py) and its use by API.sendGet, using the local stand-in
+server from benchmarks/fake_tmdb.py."""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from fake_tmdb import FakeTMDB, SyntheticFixtures
+from Classes.ResponseCache import ResponseCache, DAY
+from Classes.TMDB import API
+from Classes.RateLimiter import RateLimiter
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_key_ignores_parameter_order_and_api_key(self):
+        cache = ResponseCache(self.directory)
+        self.assertEqual(cache.getKey("https://host/3/tv/1?api_key=a&language=en&page=1"),
+                         cache.getKey("https://host/3/tv/1?page=1&language=en&api_key=b"))
+        self.assertNotIn("api_key", cache.normaliseUrl("https://host/3/tv/1?api_key=secret"))
+        cache.store("https://host/3/tv/1?api_key=secret", {'id':1})
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                    self.assertNotIn("secret", f.read())
+
+    def test_ttl_by_endpoint(self):
+        cache = ResponseCache(self.directory)
+        self.assertEqual(cache.getTTL("https://host/3/search/tv?query=x"), 7 * DAY)
+        self.assertEqual(cache.getTTL("https://host/3/tv/changes?page=1"), 0.0)
+        self.assertEqual(cache.getTTL("https://host/3/tv/12/changes"), 0.0)
+        self.assertEqual(cache.getTTL("https://host/3/tv/12"), 1 * DAY)
+        cache.store("https://host/3/tv/12", {'id':12}, etag='"v1"')
+        entry = cache.get("https://host/3/tv/12")
+        self.assertEqual((entry.body, entry.etag), ({'id':12}, '"v1"'))
+        self.assertTrue(cache.isFresh(entry))
+        entry.stored -= 2 * DAY
+        self.assertFalse(cache.isFresh(entry))
+
+    def test_evicts_least_recently_used(self):
+        cache = ResponseCache(self.directory, max_bytes=1300)
+        for i in range(4):
+            cache.store(f"https://host/3/tv/{i}", {'padding':"x" * 150})
+        #touch the oldest so the next one goes instead
+        cache.get("https://host/3/tv/0")
+        cache.store("https://host/3/tv/4", {'padding':"x" * 150})
+        self.assertLessEqual(cache.total_bytes, 1300)
+        self.assertIsNotNone(cache.get("https://host/3/tv/0"))
+        self.assertIsNone(cache.get("https://host/3/tv/1"))
+        #the index is rebuilt from the files
+        self.assertEqual(len(ResponseCache(self.directory, max_bytes=1300)), len(cache))
+
+class TestCachedRequests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = FakeTMDB(SyntheticFixtures(series_count=5, max_seasons=2))
+        self.server.start()
+        self.cache = ResponseCache(self.directory)
+        self.api = API("test", api_url=self.server.getApiUrl(), rate_limiter=RateLimiter(1000, 100), cache=self.cache,
+                       logging=False, logging_warnings=False, logging_errors=False)
+        self.url = f"{self.server.getApiUrl()}/tv/{next(iter(self.server.fixtures.series))}?api_key=test"
+
+    def tearDown(self):
+        self.api.close()
+        self.server.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_fresh_entries_skip_the_server(self):
+        body = self.api.sendGet(self.url)
+        requests = self.server.requests
+        self.assertEqual(self.api.sendGet(self.url), body)
+        self.assertEqual(self.server.requests, requests)
+        self.assertEqual(self.api.getStats().cache_hits, 1)
+
+    def test_stale_entries_are_revalidated(self):
+        self.cache.ttls = []
+        self.cache.default_ttl = 0.0
+        body = self.api.sendGet(self.url)
+        self.assertEqual(self.api.sendGet(self.url), body)
+        self.assertEqual(self.server.not_modified, 1)
+        self.assertEqual(self.api.getStats().cache_revalidated, 1)
+
+    def test_offline_answers_from_the_cache(self):
+        body = self.api.sendGet(self.url)
+        self.api.setOffline(True)
+        requests = self.server.requests
+        self.assertEqual(self.api.sendGet(self.url, revalidate=True), body)
+        self.assertIsNone(self.api.sendGet(self.url.replace("/tv/", "/tv/9")))
+        self.assertEqual(self.server.requests, requests)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""Library scanning (Classes/Scanner.py) over a small library in a temporary directory."""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Classes.Scanner import Scanner
+from Classes.IgnoreRules import IgnoreRules
+
+LIBRARY = {
+    "Show A": {"Season 1": ["Show A - S01E01.mkv", "Show A - S01E02-E03.mkv", "poster.jpg"],
+               "Season 2": ["Show A - S02E01.mkv"],
+               "Extras": ["Behind the scenes.mkv"]},
+    "Show B": {"Season 1": ["Show B - 1x01.avi"]},
+    "Empty Show": {},
+}
+
+def buildLibrary(root:str, library:dict) -> None:
+    """Creates the series/season/episode folders and (empty) files"""
+    for series, seasons in library.items():
+        os.makedirs(os.path.join(root, series))
+        for season, files in seasons.items():
+            os.makedirs(os.path.join(root, series, season))
+            for name in files:
+                open(os.path.join(root, series, season, name), 'w').close()
+
+class TestScanner(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        buildLibrary(self.root, LIBRARY)
+        self.scanner = Scanner(IgnoreRules(), max_workers=4, logging=False, logging_warnings=False, logging_errors=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_builds_the_tree(self):
+        library = {series.name_on_disc:series for series in self.scanner.scan([self.root])}
+        self.assertTrue(self.scanner.isCompleted())
+        #series without seasons are left out
+        self.assertEqual(sorted(library), ["Show A", "Show B"])
+        seasons = {season.name_on_disc:season for season in library["Show A"].seasons}
+        #'Extras' and 'poster.jpg' are skipped by the default rules
+        self.assertEqual(sorted(seasons), ["Season 1", "Season 2"])
+        self.assertEqual(sorted(episode.name_on_disc for episode in seasons["Season 1"].episodes),
+                         ["Show A - S01E01.mkv", "Show A - S01E02-E03.mkv"])
+        self.assertEqual(seasons["Season 1"].getEpisode(3).name_on_disc, "Show A - S01E02-E03.mkv")
+        self.assertEqual(seasons["Season 1"].getMissingEpisodes([1, 2, 3, 4]), [4])
+        episode = library["Show B"].seasons[0].episodes[0]
+        self.assertEqual((episode.getKey(), episode.extension), ((1, 1), "avi"))
+        self.assertEqual(episode.filepath, os.path.join(self.root, "Show B", "Season 1", "Show B - 1x01.avi"))
+
+    def test_cancelled_scan(self):
+        iterator = self.scanner.iterScan([self.root], max_buffer=1)
+        next(iterator)
+        iterator.close()
+        self.assertFalse(self.scanner.isCompleted())
+
+    def test_ertignore_files(self):
+        with open(os.path.join(self.root, "Show A", ".ertignore"), 'w') as f:
+            f.write("season 2/\n!extras\n")
+        library = {series.name_on_disc:series for series in self.scanner.scan([self.root])}
+        self.assertEqual(sorted(season.name_on_disc for season in library["Show A"].seasons), ["Extras", "Season 1"])
+
+    def test_roots_in_order(self):
+        second = tempfile.mkdtemp()
+        try:
+            buildLibrary(second, {"Show C": {"Season 1": ["Show C - S01E01.mkv"]}})
+            names = [series.name_on_disc for series in self.scanner.scan([second, self.root])]
+            self.assertEqual(names[0], "Show C")
+            self.assertEqual(sorted(names[1:]), ["Show A", "Show B"])
+        finally:
+            shutil.rmtree(second, ignore_errors=True)
+
+if __name__ == "__main__":
+    unittest.main()
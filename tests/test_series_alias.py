@@ -0,0 +1,72 @@
+"""Folder names resolved through the series alias table (Database.addAlias/getAliasSeriesId, TMDBManager.getSeries),
+using the local stand-in server from benchmarks/fake_tmdb.py."""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from fake_tmdb import FakeTMDB, Fixtures
+from Classes.Database import Database
+from Classes.TMDB import TMDBManager, API
+from Classes.RateLimiter import RateLimiter
+
+def addSeries(fixtures:Fixtures, series_id:int, name:str, searches:list) -> None:
+    """Adds a one season show, answered by TMDB for each of the searches"""
+    episodes = [{'id':series_id*100 + e, 'name':f"{name} episode {e}", 'episode_number':e, 'season_number':1,
+                 'overview':"", 'still_path':None} for e in range(1, 4)]
+    fixtures.seasons[(series_id, 1)] = {'_id':f"season-{series_id}-1", 'id':series_id*10 + 1, 'season_number':1, 'episodes':episodes}
+    fixtures.series[series_id] = {'id':series_id, 'name':name, 'original_name':name, 'overview':"", 'poster_path':None,
+                                  'first_air_date':"2005-01-01", 'number_of_seasons':1, 'number_of_episodes':len(episodes)}
+    for search in searches:
+        fixtures.searches[search.lower()] = [{'id':series_id, 'name':name, 'original_name':name}]
+
+class TestSeriesAlias(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        fixtures = Fixtures()
+        addSeries(fixtures, 3000, "Doctor Who", ["Doctor Who", "Dr Who"])
+        addSeries(fixtures, 3001, "Doctor Who Classic", [])
+        self.server = FakeTMDB(fixtures)
+        self.server.start()
+        self.database = Database(os.path.join(self.directory, "test.db"))
+        self.database.logging = False
+
+    def tearDown(self):
+        self.database.close()
+        self.server.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def getManager(self) -> TMDBManager:
+        api = API("test", api_url=self.server.getApiUrl(), rate_limiter=RateLimiter(1000, 100), logging=False, logging_warnings=False, logging_errors=False)
+        manager = TMDBManager(self.database, "test", api=api)
+        manager.logging = manager.log_warning = manager.log_errors = False
+        manager.filter.logging = False
+        return manager
+
+    def test_searched_spelling_becomes_an_alias(self):
+        manager = self.getManager()
+        self.assertEqual(manager.getSeries("Doctor Who")[0].series_id, 3000)
+        #a second spelling searches TMDB once, finds the cached series and is remembered
+        self.assertEqual(manager.getSeries("Dr Who")[0].series_id, 3000)
+        self.assertEqual(self.database.getAliasSeriesId("dr who"), 3000)
+        requests = self.server.requests
+        fresh = self.getManager()
+        self.assertEqual(fresh.getSeries("Dr Who")[0].series_id, 3000)
+        self.assertEqual(self.server.requests, requests)
+        self.assertEqual(fresh.alias_hits, 1)
+
+    def test_alias_can_be_repointed(self):
+        manager = self.getManager()
+        manager.getSeries("Doctor Who")
+        manager.getSeries("Doctor Who Classic")
+        self.database.addAlias("doctor who classic", "Doctor Who Classic", 3000)
+        self.assertEqual(self.database.getAliasSeriesId("doctor who classic"), 3000)
+        self.database.addAlias("doctor who classic", "Doctor Who Classic", 3001)
+        self.assertEqual(self.database.getAliasSeriesId("doctor who classic"), 3001)
+        #the fuzzy name index follows the alias
+        self.assertEqual(self.database.findSeriesFuzzy("Doctor Who Classic", limit=1)[0].series_id, 3001)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""In-process LRU of cached series (Classes/SeriesCache.py)."""
+import os
+import sys
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Classes.Database import EpisodeRecord
+from Classes.SeriesCache import SeriesCache, SeriesRecord
+
+def buildRecord(series_id:int, episodes:int) -> SeriesRecord:
+    """Returns a one season record with the given number of episodes"""
+    return SeriesRecord.fromRows([EpisodeRecord(db_id=f"{series_id}-1-{e}", episode_name=f"Episode {e}", episode_id=str(e),
+                                                episode_number=e, episode_overview="", episode_still_path=None, season_number=1,
+                                                season_id="1", number_of_episodes=episodes, series_name=f"Show {series_id}",
+                                                series_original_name=f"Show {series_id}", series_overview="", series_poster_path=None,
+                                                series_id=series_id, number_of_seasons=1, search_string=f"Show {series_id}")
+                                  for e in range(1, episodes+1)])
+
+class TestSeriesCache(unittest.TestCase):
+    def test_record(self):
+        record = buildRecord(1, 3)
+        self.assertEqual(record.getEpisodeName(1, 2), "Episode 2")
+        self.assertIsNone(record.getEpisodeName(2, 1))
+        #episodes share one copy of the series fields
+        self.assertIs(record.rows[0].series_overview, record.rows[2].series_overview)
+
+    def test_stale_fill_is_rejected(self):
+        cache = SeriesCache()
+        version = cache.getVersion(1)
+        #a writer replaced the series while the reader was reading it
+        cache.invalidate(1)
+        self.assertFalse(cache.put(buildRecord(1, 3), version))
+        self.assertIsNone(cache.get(1))
+        self.assertTrue(cache.put(buildRecord(1, 3), cache.getVersion(1)))
+        self.assertIsNotNone(cache.get(1))
+
+    def test_evicts_least_recently_used(self):
+        cache = SeriesCache(max_episodes=10)
+        for series_id in (1, 2, 3):
+            cache.put(buildRecord(series_id, 4), 0)
+        #4 + 4 + 4 > 10, so the oldest went
+        self.assertIsNone(cache.get(1))
+        cache.get(2)
+        cache.put(buildRecord(4, 4), 0)
+        self.assertIsNotNone(cache.get(2))
+        self.assertIsNone(cache.get(3))
+        self.assertEqual(cache.getStats()['episodes'], 8)
+        self.assertEqual(cache.evictions, 2)
+        #too big to cache at all
+        self.assertFalse(cache.put(buildRecord(5, 11), 0))
+
+    def test_names_follow_records(self):
+        cache = SeriesCache(max_episodes=8)
+        self.assertFalse(cache.addName("show one", 1))
+        cache.put(buildRecord(1, 4), 0)
+        cache.put(buildRecord(2, 4), 0)
+        self.assertTrue(cache.addName("show one", 1))
+        self.assertTrue(cache.addName("show two", 2))
+        self.assertEqual(cache.getByName("show one").series_id, 1)
+        #re-pointing a name
+        cache.addName("show one", 2)
+        self.assertEqual(cache.getByName("show one").series_id, 2)
+        cache.addName("show one", 1)
+        #names go with their record when it is invalidated or evicted
+        cache.invalidate(2)
+        self.assertIsNone(cache.getByName("show two"))
+        cache.put(buildRecord(3, 8), 0)
+        self.assertIsNone(cache.getByName("show one"))
+        self.assertEqual(cache.getStats()['names'], 0)
+
+if __name__ == "__main__":
+    unittest.main()
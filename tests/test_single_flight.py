@@ -0,0 +1,47 @@
+"""Coalescing of concurrent calls (Classes/SingleFlight.py)."""
+import os
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Classes.SingleFlight import SingleFlight
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_callers_share_one_call(self):
+        flights = SingleFlight()
+        release = threading.Event()
+        calls = []
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return "result"
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [executor.submit(flights.do, "key", slow) for i in range(8)]
+            #let every caller reach do() before the leader finishes
+            while flights.calls + flights.shared < 8:
+                threading.Event().wait(0.01)
+            release.set()
+            results = [future.result() for future in futures]
+        self.assertEqual(results, ["result"] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((flights.calls, flights.shared), (1, 7))
+
+    def test_exception_is_shared_and_key_released(self):
+        flights = SingleFlight()
+        def fail():
+            raise ValueError("failed")
+        with self.assertRaises(ValueError):
+            flights.do("key", fail)
+        self.assertEqual(flights.in_flight, {})
+        #the next call runs again rather than reusing the failure
+        self.assertEqual(flights.do("key", lambda: 1), 1)
+        self.assertEqual(flights.calls, 2)
+
+    def test_different_keys_run_separately(self):
+        flights = SingleFlight()
+        self.assertEqual([flights.do(key, lambda key=key: key * 2) for key in (1, 2, 3)], [2, 4, 6])
+        self.assertEqual(flights.calls, 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Reusing directory listings from a previous scan (Classes/Snapshot.py, Scanner.listDirectory)."""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Classes.Scanner import Scanner
+from Classes.Snapshot import DirectorySnapshot
+from Classes.IgnoreRules import IgnoreRules
+
+class TestSnapshotReuse(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for series in ("Show A", "Show B"):
+            for season in ("Season 1", "Season 2"):
+                os.makedirs(os.path.join(self.root, series, season))
+                open(os.path.join(self.root, series, season, f"{series} - S0{season[-1]}E01.mkv"), 'w').close()
+        self.directories = [self.root] + [os.path.join(path, name) for path, names, _ in os.walk(self.root) for name in names]
+        self.scanner = Scanner(IgnoreRules(), logging=False, logging_warnings=False, logging_errors=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def age(self, seconds:float = 60.0) -> None:
+        """Moves every directory's mtime into the past, out of the racy window"""
+        past = time.time() - seconds
+        for path in self.directories:
+            os.utime(path, (past, past))
+
+    def countEpisodes(self, library) -> int:
+        return sum(len(season.episodes) for series in library for season in series.seasons)
+
+    def test_unchanged_directories_are_reused(self):
+        self.age()
+        self.scanner.scan([self.root])
+        snapshot = self.scanner.getSnapshot()
+        self.assertEqual(len(snapshot), 7)
+        library = self.scanner.scan([self.root], previous_snapshot=snapshot)
+        self.assertEqual((self.scanner.getStats().directories, self.scanner.getStats().reused), (0, 7))
+        self.assertEqual(self.countEpisodes(library), 4)
+
+    def test_changed_directory_is_listed_again(self):
+        self.age()
+        self.scanner.scan([self.root])
+        snapshot = self.scanner.getSnapshot()
+        time.sleep(0.01)
+        open(os.path.join(self.root, "Show A", "Season 1", "Show A - S01E02.mkv"), 'w').close()
+        #Season 1's mtime is now recent, so it is re-listed even though the new scan is in the same second
+        library = self.scanner.scan([self.root], previous_snapshot=snapshot)
+        self.assertEqual((self.scanner.getStats().directories, self.scanner.getStats().reused), (1, 6))
+        self.assertEqual(self.countEpisodes(library), 5)
+
+    def test_recent_directories_are_not_trusted(self):
+        #modified within RACY_SECONDS of the scan: a later change in the same mtime tick would go unnoticed
+        self.scanner.scan([self.root])
+        self.scanner.scan([self.root], previous_snapshot=self.scanner.getSnapshot())
+        self.assertEqual(self.scanner.getStats().reused, 0)
+
+    def test_round_trip(self):
+        self.age()
+        self.scanner.scan([self.root])
+        data = self.scanner.getSnapshot().toData()
+        snapshot = DirectorySnapshot.fromData(data)
+        self.assertEqual(len(snapshot), 7)
+        self.scanner.scan([self.root], previous_snapshot=snapshot)
+        self.assertEqual(self.scanner.getStats().reused, 7)
+        self.assertIsNone(DirectorySnapshot.fromData(dict(data, version=DirectorySnapshot.VERSION + 1)))
+        self.assertIsNone(DirectorySnapshot.fromData(None))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Fuzzy folder name resolution against the local TMDB cache (TMDBManager / Database.findSeriesFuzzy), using the local
+stand-in server from benchmarks/fake_tmdb.py."""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from fake_tmdb import FakeTMDB, Fixtures
+from Classes.Database import Database
+from Classes.TMDB import TMDBManager, API
+from Classes.RateLimiter import RateLimiter
+
+def addSeries(fixtures:Fixtures, series_id:int, name:str, searches:list) -> None:
+    """Adds a one season show, answered by TMDB for each of the searches"""
+    episodes = [{'id':series_id*100 + e, 'name':f"{name} {series_id} episode {e}", 'episode_number':e, 'season_number':1,
+                 'overview':"", 'still_path':None} for e in range(1, 4)]
+    fixtures.seasons[(series_id, 1)] = {'_id':f"season-{series_id}-1", 'id':series_id*10 + 1, 'season_number':1, 'episodes':episodes}
+    fixtures.series[series_id] = {'id':series_id, 'name':name, 'original_name':name, 'overview':"", 'poster_path':None,
+                                  'first_air_date':"2005-01-01", 'number_of_seasons':1, 'number_of_episodes':len(episodes)}
+    for search in searches:
+        fixtures.searches[search.lower()] = [{'id':series_id, 'name':name, 'original_name':name}]
+
+class TestFuzzyResolution(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        fixtures = Fixtures()
+        addSeries(fixtures, 1000, "The Office", ["The Office (UK)"])
+        addSeries(fixtures, 1001, "The Office", ["The Office (US)"])
+        addSeries(fixtures, 1002, "Shameless", ["Shameless"])
+        addSeries(fixtures, 1003, "Shameless", ["Shameless US"])
+        addSeries(fixtures, 1004, "Mr. Robot", ["Mr. Robot"])
+        self.server = FakeTMDB(fixtures)
+        self.server.start()
+        self.database = Database(os.path.join(self.directory, "test.db"))
+        self.database.logging = False
+
+    def tearDown(self):
+        self.database.close()
+        self.server.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def getManager(self) -> TMDBManager:
+        api = API("test", api_url=self.server.getApiUrl(), rate_limiter=RateLimiter(1000, 100), logging=False, logging_warnings=False, logging_errors=False)
+        manager = TMDBManager(self.database, "test", api=api)
+        manager.logging = manager.log_warning = manager.log_errors = False
+        manager.filter.logging = False
+        return manager
+
+    def getSeriesId(self, manager:TMDBManager, name:str) -> int:
+        rows = manager.getSeries(name)
+        self.assertTrue(rows, name)
+        return rows[0].series_id
+
+    def test_country_qualifiers_are_not_merged(self):
+        manager = self.getManager()
+        self.assertEqual(self.getSeriesId(manager, "The Office (UK)"), 1000)
+        requests = self.server.requests
+        self.assertEqual(self.getSeriesId(manager, "The Office (US)"), 1001)
+        self.assertGreater(self.server.requests, requests)
+        self.assertEqual(manager.fuzzy_hits, 0)
+        #the aliases recorded are the right ones
+        fresh = self.getManager()
+        self.assertEqual(self.getSeriesId(fresh, "The Office (US)"), 1001)
+        self.assertEqual(self.getSeriesId(fresh, "The Office (UK)"), 1000)
+
+    def test_trailing_country_code_is_not_merged_with_unqualified_name(self):
+        manager = self.getManager()
+        self.assertEqual(self.getSeriesId(manager, "Shameless"), 1002)
+        self.assertEqual(self.getSeriesId(manager, "Shameless US"), 1003)
+
+    def test_same_qualifier_resolves_locally(self):
+        manager = self.getManager()
+        self.assertEqual(self.getSeriesId(manager, "The Office (US)"), 1001)
+        requests = self.server.requests
+        self.assertEqual(self.getSeriesId(manager, "The.Office.(US)"), 1001)
+        self.assertEqual(self.server.requests, requests)
+        self.assertEqual(self.getSeriesId(manager, "Mr. Robot"), 1004)
+        requests = self.server.requests
+        self.assertEqual(self.getSeriesId(manager, "Mr.Robot"), 1004)
+        self.assertEqual(self.server.requests, requests)
+        self.assertEqual(manager.fuzzy_hits, 2)
+
+if __name__ == "__main__":
+    unittest.main()
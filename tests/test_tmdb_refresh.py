@@ -0,0 +1,76 @@
+"""Incremental refresh of cached series from the changes feed (TMDBManager.refreshChangedSeries), using the local
+stand-in server from benchmarks/fake_tmdb.py."""
+import os
+import sys
+import shutil
+import datetime
+import tempfile
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from fake_tmdb import FakeTMDB, Fixtures
+from Classes.Database import Database
+from Classes.TMDB import TMDBManager, API, REFRESH_SYNC_KEY
+from Classes.RateLimiter import RateLimiter
+
+def addSeries(fixtures:Fixtures, series_id:int, name:str, seasons:int = 2) -> None:
+    """Adds a show with three episodes per season"""
+    for season_number in range(1, seasons+1):
+        episodes = [{'id':series_id*10000 + season_number*100 + e, 'name':f"{name} {season_number}x{e}", 'episode_number':e,
+                     'season_number':season_number, 'overview':"", 'still_path':None} for e in range(1, 4)]
+        fixtures.seasons[(series_id, season_number)] = {'_id':f"season-{series_id}-{season_number}", 'id':series_id*100 + season_number,
+                                                        'season_number':season_number, 'episodes':episodes}
+    fixtures.series[series_id] = {'id':series_id, 'name':name, 'original_name':name, 'overview':"", 'poster_path':None,
+                                  'first_air_date':"2005-01-01", 'number_of_seasons':seasons, 'number_of_episodes':seasons*3}
+
+class TestRefreshChangedSeries(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.fixtures = Fixtures()
+        addSeries(self.fixtures, 2000, "Running Show")
+        addSeries(self.fixtures, 2001, "Finished Show")
+        addSeries(self.fixtures, 2002, "Uncached Show")
+        self.server = FakeTMDB(self.fixtures)
+        self.server.start()
+        self.database = Database(os.path.join(self.directory, "test.db"))
+        self.database.logging = False
+        api = API("test", api_url=self.server.getApiUrl(), rate_limiter=RateLimiter(1000, 100), logging=False, logging_warnings=False, logging_errors=False)
+        self.manager = TMDBManager(self.database, "test", api=api)
+        self.manager.logging = self.manager.log_warning = self.manager.log_errors = False
+        self.manager.filter.logging = False
+        self.assertEqual(len(self.manager.getSeries("Running Show")), 6)
+        self.assertEqual(len(self.manager.getSeries("Finished Show")), 6)
+
+    def tearDown(self):
+        self.database.close()
+        self.server.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def getKeys(self, name:str) -> set:
+        return set((row.season_number, row.episode_number) for row in self.manager.getSeries(name))
+
+    def test_new_episode_and_season(self):
+        self.fixtures.addEpisode(2000)
+        self.fixtures.addEpisode(2000, new_season=True)
+        self.fixtures.addEpisode(2002)
+        refreshed = self.manager.refreshChangedSeries()
+        #only cached series are refreshed
+        self.assertEqual(refreshed, {2000:[2, 3]})
+        self.assertIn((2, 4), self.getKeys("Running Show"))
+        self.assertIn((3, 1), self.getKeys("Running Show"))
+        self.assertEqual(len(self.getKeys("Finished Show")), 6)
+        self.assertEqual(self.database.getSyncValue(REFRESH_SYNC_KEY), datetime.datetime.utcnow().date().isoformat())
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.manager.refreshChangedSeries(), {})
+
+    def test_specials_are_not_stored(self):
+        #a change to season 0 names no regular season, so the latest one is refreshed instead
+        self.fixtures.seasons[(2000, 0)] = {'_id':"season-2000-0", 'id':200000, 'season_number':0,
+                                            'episodes':[{'id':1, 'name':"Special", 'episode_number':1, 'season_number':0}]}
+        self.fixtures.changes.append((datetime.date.today().isoformat(), 2000, 0))
+        self.assertEqual(self.manager.refreshChangedSeries(), {2000:[2]})
+        self.assertNotIn(0, set(season for season, _ in self.getKeys("Running Show")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Watch mode (Classes/Watcher.py): inotify events applied to a scanned library tree in a temporary directory."""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Classes.LST import LST
+from Classes.Watcher import ChangeEvent
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "watch mode needs Linux inotify")
+class TestLibraryWatcher(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.touch("Show A", "Season 1", "Show A - S01E01.mkv")
+        self.lst = LST(self.root, logging=False, logging_warnings=False, logging_errors=False)
+        self.watcher = self.lst.watch(debounce_seconds=0.1, max_delay_seconds=1.0)
+        self.assertIsNotNone(self.watcher)
+
+    def tearDown(self):
+        self.watcher.stop()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def touch(self, *parts:str) -> None:
+        os.makedirs(os.path.join(self.root, *parts[:-1]), exist_ok=True)
+        open(os.path.join(self.root, *parts), 'w').close()
+
+    def waitFor(self, kinds:list, timeout:float = 5.0) -> list:
+        """Returns the events received until every kind in kinds was seen, or the timeout passed"""
+        events = []
+        deadline = time.time() + timeout
+        while time.time() < deadline and not all(kind in [event.kind for event in events] for kind in kinds):
+            events += self.watcher.getEvents(timeout=0.2)
+        return events
+
+    def getSeries(self, name:str):
+        with self.lst.lock:
+            return next((series for series in self.lst.getData() if series.name_on_disc == name), None)
+
+    def test_episode_added_and_removed(self):
+        season = self.getSeries("Show A").seasons[0]
+        self.touch("Show A", "Season 1", "Show A - S01E02.mkv")
+        events = self.waitFor([ChangeEvent.EPISODE_ADDED])
+        self.assertEqual([event.kind for event in events], [ChangeEvent.EPISODE_ADDED])
+        #the existing Season object is updated in place, index included
+        self.assertIs(events[0].season, season)
+        self.assertEqual(season.getEpisode(2).name_on_disc, "Show A - S01E02.mkv")
+        os.remove(os.path.join(self.root, "Show A", "Season 1", "Show A - S01E01.mkv"))
+        self.waitFor([ChangeEvent.EPISODE_REMOVED])
+        self.assertIsNone(season.getEpisode(1))
+
+    def test_series_and_season_added(self):
+        self.touch("Show A", "Season 2", "Show A - S02E01.mkv")
+        self.touch("Show B", "Season 1", "Show B - S01E01.mkv")
+        self.waitFor([ChangeEvent.SEASON_ADDED, ChangeEvent.SERIES_ADDED])
+        self.assertEqual(sorted(season.name_on_disc for season in self.getSeries("Show A").seasons), ["Season 1", "Season 2"])
+        self.assertIsNotNone(self.getSeries("Show B"))
+        #directories created after the watch started are watched too
+        self.touch("Show B", "Season 1", "Show B - S01E02.mkv")
+        self.waitFor([ChangeEvent.EPISODE_ADDED])
+        self.assertEqual(len(self.getSeries("Show B").seasons[0].episodes), 2)
+
+    def test_ignored_files_make_no_events(self):
+        self.touch("Show A", "Season 1", "poster.jpg")
+        self.assertEqual(self.waitFor([ChangeEvent.EPISODE_ADDED], timeout=1.0), [])
+
+    def test_series_removed(self):
+        shutil.rmtree(os.path.join(self.root, "Show A"))
+        self.waitFor([ChangeEvent.SERIES_REMOVED])
+        self.assertIsNone(self.getSeries("Show A"))
+
+if __name__ == "__main__":
+    unittest.main()